@@ -2,7 +2,22 @@
 Django admin configuration for Employee and Attendance models.
 """
 from django.contrib import admin
-from .models import Employee, Attendance
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .models import Department, Employee, Attendance, AttendanceArchive, Job, ProfileReport, WorkCalendar
+from .pagination import EstimatedCountPaginator
+from . import counters, profiling
+
+
+@admin.register(Department)
+class DepartmentAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the Department lookup table.
+    """
+    list_display = ['name']
+    search_fields = ['name']
 
 
 @admin.register(Employee)
@@ -12,9 +27,12 @@ class EmployeeAdmin(admin.ModelAdmin):
     """
     list_display = ['employee_id', 'name', 'email', 'department', 'created_at']
     list_filter = ['department', 'created_at']
-    search_fields = ['employee_id', 'name', 'email', 'department']
+    list_select_related = ['department']
+    search_fields = ['employee_id', 'name', 'email', 'department__name']
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'updated_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Employee Information', {
@@ -31,12 +49,20 @@ class EmployeeAdmin(admin.ModelAdmin):
 class AttendanceAdmin(admin.ModelAdmin):
     """
     Admin interface for Attendance model.
+
+    Tuned for multi-million-row tables: employees are joined in the changelist
+    query, ordering stays on the date index, and counts are estimated.
     """
     list_display = ['employee', 'date', 'status', 'created_at']
-    list_filter = ['status', 'date', 'created_at']
+    list_filter = ['status']
+    list_select_related = ['employee']
     search_fields = ['employee__name', 'employee__employee_id']
-    ordering = ['-date', 'employee__name']
+    ordering = ['-date']
+    date_hierarchy = 'date'
+    autocomplete_fields = ['employee']
     readonly_fields = ['created_at', 'updated_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Attendance Information', {
@@ -47,3 +73,142 @@ class AttendanceAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    def delete_model(self, request, obj):
+        employee_id, record_status = obj.employee_id, obj.status
+        super().delete_model(request, obj)
+        counters.record_change(employee_id, removed=record_status)
+
+    def delete_queryset(self, request, queryset):
+        employee_pks = set(queryset.values_list('employee_id', flat=True))
+        super().delete_queryset(request, queryset)
+        counters.rebuild(employee_pks)
+
+
+@admin.register(AttendanceArchive)
+class AttendanceArchiveAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for archived attendance records.
+    """
+    list_display = ['employee', 'date', 'status']
+    list_filter = ['status']
+    list_select_related = ['employee']
+    search_fields = ['employee__employee_id']
+    date_hierarchy = 'date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for background jobs.
+    """
+    list_display = ['id', 'kind', 'status', 'progress', 'worker', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'kind', 'params', 'status', 'progress', 'message', 'error', 'input_file',
+        'result_file', 'result_content_type', 'worker', 'created_at', 'started_at',
+        'heartbeat_at', 'finished_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(WorkCalendar)
+class WorkCalendarAdmin(admin.ModelAdmin):
+    """
+    Admin interface for holidays and working weekend days.
+    """
+    list_display = ['date', 'name', 'is_working']
+    list_filter = ['is_working']
+    search_fields = ['name']
+    date_hierarchy = 'date'
+
+
+@admin.register(ProfileReport)
+class ProfileReportAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for request profiles, with downloads of the
+    pstats dump and the collapsed stacks (for flamegraph.pl or speedscope).
+    """
+    list_display = ['created_at', 'method', 'path', 'status_code', 'duration_ms', 'sql_count', 'sql_ms', 'trigger']
+    list_filter = ['trigger', 'method']
+    search_fields = ['path']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'method', 'path', 'status_code', 'trigger', 'user', 'created_at', 'duration_ms',
+        'sql_count', 'sql_ms', 'downloads', 'summary_text', 'query_table'
+    ]
+    exclude = ['queries', 'summary', 'stats_file', 'collapsed_file']
+
+    FILES = {
+        'pstats': ('stats_file', 'application/octet-stream'),
+        'collapsed': ('collapsed_file', 'text/plain'),
+    }
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/<str:kind>/',
+                self.admin_site.admin_view(self.download),
+                name='employees_profilereport_download',
+            ),
+        ] + super().get_urls()
+
+    def download(self, request, pk, kind):
+        if not self.has_view_permission(request) or kind not in self.FILES:
+            raise Http404
+        report = get_object_or_404(ProfileReport, pk=pk)
+        field, content_type = self.FILES[kind]
+        filename = getattr(report, field)
+        if not filename or not profiling.report_path(filename).exists():
+            raise Http404
+        return FileResponse(
+            open(profiling.report_path(filename), 'rb'),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type
+        )
+
+    @admin.display(description='Files')
+    def downloads(self, obj):
+        return format_html_join(' | ', '<a href="{}">{}</a>', (
+            (reverse('admin:employees_profilereport_download', args=[obj.pk, kind]), kind)
+            for kind, (field, _) in self.FILES.items() if getattr(obj, field)
+        ))
+
+    @admin.display(description='Top functions')
+    def summary_text(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+
+    @admin.display(description='SQL queries')
+    def query_table(self, obj):
+        rows = format_html_join('', '<tr><td>{}</td><td><code>{}</code></td><td>{}</td></tr>', (
+            (query['ms'], query['sql'], ' <- '.join(reversed(query['origin'])))
+            for query in obj.queries
+        ))
+        return format_html('<table><tr><th>ms</th><th>SQL</th><th>Origin</th></tr>{}</table>', rows)
+
+    def delete_model(self, request, obj):
+        profiling.delete_files(obj)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for report in queryset:
+            profiling.delete_files(report)
+        super().delete_queryset(request, queryset)
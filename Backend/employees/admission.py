@@ -0,0 +1,281 @@
+"""
+Request coalescing and admission control for expensive read endpoints.
+
+``@coalesced`` makes concurrent identical GETs (same action, path, query
+string and replica pinning) share one computation: the first request runs
+the view and the others wait for its response, marked ``X-Coalesced: true``.
+Waiting is bounded too: at most ``EXPENSIVE_READ_QUEUE`` followers per
+computation, each for at most ``EXPENSIVE_READ_QUEUE_TIMEOUT`` plus
+``EXPENSIVE_READ_COALESCE_TIMEOUT`` seconds; the rest get the same 503.
+
+``@admission_limited`` gives each endpoint its own gate per process: at most
+``EXPENSIVE_READ_CONCURRENCY`` computations run at once, up to
+``EXPENSIVE_READ_QUEUE`` more wait for a slot for at most
+``EXPENSIVE_READ_QUEUE_TIMEOUT`` seconds, and anything beyond that is shed
+with a 503 and ``Retry-After``. Writes never pass through a gate, so a burst
+of dashboard reads cannot hold every worker while check-ins wait. Streaming
+responses (CSV, Parquet, Arrow exports) keep their slot until the body has
+been sent or the response is closed, since that is when their work happens.
+
+Stack ``@coalesced`` above ``@admission_limited`` so only the request that
+actually computes takes a slot.
+"""
+import functools
+import math
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .utils import error_response
+
+
+COALESCED_HEADER = 'X-Coalesced'
+
+
+class Overloaded(Exception):
+    """
+    Raised by ``AdmissionGate.admit`` when a request is shed.
+    """
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded, time-limited queue.
+    """
+
+    def __init__(self, name, limit, queue, timeout):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.waiting = 0
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+
+    @property
+    def config(self):
+        return (self.limit, self.queue, self.timeout)
+
+    @contextmanager
+    def admit(self):
+        """
+        Hold a slot for the duration of the block, or raise ``Overloaded``.
+        """
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self):
+        """
+        Take a slot, waiting in the queue if needed, or raise ``Overloaded``.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.queue:
+                    raise Overloaded(self.name)
+                self.waiting += 1
+            try:
+                acquired = self._slots.acquire(timeout=self.timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            if not acquired:
+                raise Overloaded(self.name)
+
+    def release(self):
+        self._slots.release()
+
+
+class _SlotHoldingContent:
+    """
+    Streaming content that releases its gate slot once fully sent, failed or
+    closed, whichever comes first.
+    """
+
+    def __init__(self, content, release):
+        self._content = content
+        self._release = release
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        try:
+            yield from self._content
+        finally:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def gate_for(name):
+    """
+    Return the gate for endpoint ``name``, rebuilt when its settings change.
+
+    ``EXPENSIVE_READ_LIMITS`` overrides the concurrency of single endpoints.
+    """
+    config = (
+        settings.EXPENSIVE_READ_LIMITS.get(name, settings.EXPENSIVE_READ_CONCURRENCY),
+        settings.EXPENSIVE_READ_QUEUE,
+        settings.EXPENSIVE_READ_QUEUE_TIMEOUT,
+    )
+    with _gates_lock:
+        gate = _gates.get(name)
+        if gate is None or gate.config != config:
+            gate = _gates[name] = AdmissionGate(name, *config)
+        return gate
+
+
+def overloaded_response(gate):
+    response = error_response(
+        error=f'Too many concurrent {gate.name} requests; retry shortly.',
+        message='Server busy.',
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = str(max(1, math.ceil(gate.timeout)))
+    return response
+
+
+def admission_limited(view_method):
+    """
+    Run a viewset method through its endpoint's ``AdmissionGate``.
+
+    A streaming response holds the slot until its content is consumed or
+    the response is closed.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        gate = gate_for(view_method.__name__)
+        try:
+            gate.acquire()
+        except Overloaded:
+            return overloaded_response(gate)
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            gate.release()
+            raise
+        if getattr(response, 'streaming', False):
+            # The body is produced while it is sent, after the view returns;
+            # Django registers the content's close() with the response.
+            response.streaming_content = _SlotHoldingContent(response.streaming_content, gate.release)
+        else:
+            gate.release()
+        return response
+    return wrapper
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers with the same
+    key wait for it and get its result.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, max_followers=None, timeout=None):
+        """
+        Return ``(result, shared)``; ``shared`` is True for callers that
+        waited on another caller's computation. Exceptions are shared too.
+
+        Raises ``Overloaded`` for a caller that would be follower number
+        ``max_followers + 1``, or that waited ``timeout`` seconds in vain.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            elif max_followers is not None and call.followers >= max_followers:
+                raise Overloaded(key[0])
+            else:
+                call.followers += 1
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    call.followers -= 1
+                raise Overloaded(key[0])
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+_flights = SingleFlight()
+
+
+def request_key(view_method, request):
+    query = urlencode(sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    ))
+    pinned = getattr(request, 'replica_pinned', False)
+    return (view_method.__qualname__, request.path, query, pinned)
+
+
+def coalesced(view_method):
+    """
+    Share one run of a viewset method among concurrent identical GETs.
+
+    Only DRF ``Response`` results are shared; a follower of a streaming
+    response runs the view itself. Followers are limited in number and wait
+    time by the endpoint's gate settings and are shed with a 503 beyond them.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return view_method(self, request, *args, **kwargs)
+        gate = gate_for(view_method.__name__)
+        try:
+            response, shared = _flights.do(
+                request_key(view_method, request),
+                lambda: view_method(self, request, *args, **kwargs),
+                max_followers=gate.queue,
+                timeout=gate.timeout + settings.EXPENSIVE_READ_COALESCE_TIMEOUT
+            )
+        except Overloaded:
+            return overloaded_response(gate)
+        if not shared:
+            return response
+        if not isinstance(response, Response):
+            return view_method(self, request, *args, **kwargs)
+        copy = Response(response.data, status=response.status_code)
+        for header, value in response.items():
+            copy[header] = value
+        copy[COALESCED_HEADER] = 'true'
+        return copy
+    return wrapper
@@ -0,0 +1,468 @@
+"""
+Vectorized attendance analytics.
+
+``load()`` streams ``(employee_id, date, status)`` rows with chunked
+``values_list`` scans into flat arrays sorted by employee and day. The
+metrics below run over those arrays with NumPy when it is installed and with
+an equivalent pure-Python loop otherwise:
+
+- longest absence streak (consecutive absent records) per employee
+- rolling N-day attendance rates, organisation-wide and per employee
+- Monday/Friday absence skew against Tuesday-Thursday
+- attendance trend (least-squares slope of presence over time)
+"""
+import random
+from array import array
+from datetime import date, timedelta
+
+from .archive import may_be_archived
+from .models import Attendance, AttendanceArchive, Department, Employee
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+
+PRESENT = Attendance.STATUS_CODES['Present']
+ABSENT = Attendance.STATUS_CODES['Absent']
+
+METRICS = ('absence_streaks', 'rolling_rates', 'weekday_skew', 'trending_down')
+
+# Rows fetched per round trip while loading
+LOAD_CHUNK_SIZE = 20000
+
+# Fewest records needed in each weekday group / overall before a skew or
+# trend is reported for an employee
+MIN_SKEW_RECORDS = 4
+MIN_TREND_RECORDS = 10
+
+# Trend slopes are reported as change in attendance rate per this many days;
+# employees at or below -TREND_DOWN_THRESHOLD points are trending down
+TREND_PERIOD_DAYS = 30
+TREND_DOWN_THRESHOLD = 10.0
+
+# Range analysed when no start / end is given
+DEFAULT_RANGE_DAYS = 90
+
+
+class AttendanceData:
+    """
+    Attendance for ``employees`` between ``start`` and ``end`` as parallel
+    flat arrays sorted by (employee, day): ``emp`` (row index into
+    ``employees``), ``day`` (offset from ``start``) and ``status`` (code).
+    """
+
+    def __init__(self, start, end, employees, emp, day, status):
+        self.start = start
+        self.end = end
+        self.employees = employees
+        self.emp = emp
+        self.day = day
+        self.status = status
+
+    @property
+    def n_days(self):
+        return (self.end - self.start).days + 1
+
+    def __len__(self):
+        return len(self.emp)
+
+    def arrays(self):
+        """
+        Return ``(emp, day, status)`` as NumPy arrays sharing the buffers.
+        """
+        return (
+            np.frombuffer(self.emp, dtype=np.int32) if len(self.emp) else np.zeros(0, np.int32),
+            np.frombuffer(self.day, dtype=np.int32) if len(self.day) else np.zeros(0, np.int32),
+            np.frombuffer(self.status, dtype=np.uint8) if len(self.status) else np.zeros(0, np.uint8),
+        )
+
+
+def use_numpy(engine=None):
+    """
+    Resolve ``engine`` ('numpy', 'python' or None for the best available).
+    """
+    if engine == 'python':
+        return False
+    if engine == 'numpy' and np is None:
+        raise ValueError('NumPy is not installed.')
+    return np is not None
+
+
+def default_range(start=None, end=None):
+    """
+    Fill in a missing ``end`` (today) and ``start`` (``DEFAULT_RANGE_DAYS``
+    before ``end``).
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    return start, end
+
+
+def load(start, end, department_id=None):
+    """
+    Load attendance between ``start`` and ``end`` (inclusive) from the hot
+    and, when needed, archive tables.
+    """
+    employees = Employee.objects.order_by('pk')
+    if department_id is not None:
+        employees = employees.filter(department_id=department_id)
+    employees = list(employees.values_list('pk', 'employee_id', 'name', 'department_id'))
+    rows = {employee[0]: index for index, employee in enumerate(employees)}
+
+    # Archived records first so hot records win for the same day.
+    models = [AttendanceArchive, Attendance] if may_be_archived(start) else [Attendance]
+
+    emp, day, status = array('i'), array('i'), array('B')
+    codes = Attendance.STATUS_CODES
+    start_ordinal = start.toordinal()
+    for model in models:
+        records = model.objects.filter(date__gte=start, date__lte=end)
+        if department_id is not None:
+            records = records.filter(employee__department_id=department_id)
+        records = records.order_by('employee_id', 'date').values_list('employee_id', 'date', 'status')
+        for employee_pk, record_date, record_status in records.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            row = rows.get(employee_pk)
+            if row is None:
+                continue
+            emp.append(row)
+            day.append(record_date.toordinal() - start_ordinal)
+            status.append(codes[record_status])
+
+    data = AttendanceData(start, end, employees, emp, day, status)
+    if len(models) > 1:
+        _sort(data)
+    return data
+
+
+def synthetic(n_employees, n_days, absent_rate=0.1, seed=0):
+    """
+    Build an ``AttendanceData`` of random records for every employee and
+    day ending today, without touching the database (used by benchmarks).
+    """
+    end = date.today()
+    start = end - timedelta(days=n_days - 1)
+    generator = random.Random(seed)
+    employees = [
+        (index + 1, f'EMP{index + 1:06d}', f'Employee {index + 1}', None)
+        for index in range(n_employees)
+    ]
+    emp = array('i', (row for row in range(n_employees) for _ in range(n_days)))
+    day = array('i', range(n_days)) * n_employees
+    status = array('B', (
+        ABSENT if generator.random() < absent_rate else PRESENT
+        for _ in range(n_employees * n_days)
+    ))
+    return AttendanceData(start, end, employees, emp, day, status)
+
+
+def _sort(data):
+    """
+    Restore (employee, day) order after concatenating two tables, keeping
+    the later (hot) record where both hold the same day.
+    """
+    if np is not None and len(data):
+        emp, day, status = data.arrays()
+        order = np.lexsort((day, emp))  # stable: archive before hot
+        emp, day, status = emp[order], day[order], status[order]
+        keep = np.r_[(emp[1:] != emp[:-1]) | (day[1:] != day[:-1]), True]
+        data.emp = array('i', emp[keep].tobytes())
+        data.day = array('i', day[keep].tobytes())
+        data.status = array('B', status[keep].tobytes())
+        return
+    merged = {}
+    for row, offset, code in zip(data.emp, data.day, data.status):
+        merged[(row, offset)] = code
+    keys = sorted(merged)
+    data.emp = array('i', (key[0] for key in keys))
+    data.day = array('i', (key[1] for key in keys))
+    data.status = array('B', (merged[key] for key in keys))
+
+
+def longest_absence_streaks(data, engine=None):
+    """
+    Return ``[(length, end_date)]`` per employee: the longest run of
+    consecutive absent records (the most recent one on ties). ``end_date`` is
+    None when the employee has no absences.
+    """
+    if use_numpy(engine):
+        return _streaks_numpy(data)
+    return _streaks_python(data)
+
+
+def _streaks_numpy(data):
+    result = [(0, None)] * len(data.employees)
+    if not len(data):
+        return result
+    emp, day, status = data.arrays()
+    index = np.arange(len(emp))
+    absent = status == ABSENT
+    starts = np.flatnonzero(np.r_[True, emp[1:] != emp[:-1]])
+
+    # Position of the most recent non-absent record (or the employee's
+    # boundary); the run length is the distance to it.
+    breaks = np.where(absent, -1, index)
+    breaks[starts] = np.maximum(breaks[starts], starts - 1)
+    runs = np.where(absent, index - np.maximum.accumulate(breaks), 0)
+
+    order = np.lexsort((index, runs, emp))
+    ordered_emp = emp[order]
+    last = order[np.flatnonzero(np.r_[ordered_emp[1:] != ordered_emp[:-1], True])]
+    for position in last.tolist():
+        length = int(runs[position])
+        if length:
+            result[int(emp[position])] = (length, data.start + timedelta(days=int(day[position])))
+    return result
+
+
+def _streaks_python(data):
+    result = [(0, None)] * len(data.employees)
+    current_emp, run = None, 0
+    for row, offset, code in zip(data.emp, data.day, data.status):
+        if row != current_emp:
+            current_emp, run = row, 0
+        if code == ABSENT:
+            run += 1
+            if run >= result[row][0]:
+                result[row] = (run, data.start + timedelta(days=offset))
+        else:
+            run = 0
+    return result
+
+
+def rolling_rates(data, window=30, engine=None):
+    """
+    Return rolling ``window``-day attendance rates (present / recorded, in
+    percent):
+
+    - ``series``: ``[(date, rate)]`` for every day, organisation-wide
+    - ``latest``: per employee, the rate over the last ``window`` days
+
+    Rates are None where nothing was recorded.
+    """
+    if use_numpy(engine):
+        return _rolling_numpy(data, window)
+    return _rolling_python(data, window)
+
+
+def _rolling_numpy(data, window):
+    n_days, n_employees = data.n_days, len(data.employees)
+    emp, day, status = data.arrays()
+    present = (status == PRESENT).astype(np.float64)
+
+    daily_present = np.bincount(day, weights=present, minlength=n_days)
+    daily_recorded = np.bincount(day, minlength=n_days).astype(np.float64)
+    cumulative_present = np.r_[0.0, np.cumsum(daily_present)]
+    cumulative_recorded = np.r_[0.0, np.cumsum(daily_recorded)]
+    upper = np.arange(1, n_days + 1)
+    lower = np.maximum(upper - window, 0)
+    window_present = cumulative_present[upper] - cumulative_present[lower]
+    window_recorded = cumulative_recorded[upper] - cumulative_recorded[lower]
+
+    recent = day >= n_days - window
+    latest_present = np.bincount(emp[recent], weights=present[recent], minlength=n_employees)
+    latest_recorded = np.bincount(emp[recent], minlength=n_employees)
+
+    return {
+        'window': window,
+        'series': [
+            (data.start + timedelta(days=offset), _percent(p, r))
+            for offset, (p, r) in enumerate(zip(window_present.tolist(), window_recorded.tolist()))
+        ],
+        'latest': [
+            _percent(p, r) for p, r in zip(latest_present.tolist(), latest_recorded.tolist())
+        ],
+    }
+
+
+def _rolling_python(data, window):
+    n_days, n_employees = data.n_days, len(data.employees)
+    daily_present = [0] * n_days
+    daily_recorded = [0] * n_days
+    latest_present = [0] * n_employees
+    latest_recorded = [0] * n_employees
+    for row, offset, code in zip(data.emp, data.day, data.status):
+        present = code == PRESENT
+        daily_present[offset] += present
+        daily_recorded[offset] += 1
+        if offset >= n_days - window:
+            latest_present[row] += present
+            latest_recorded[row] += 1
+
+    series = []
+    window_present = window_recorded = 0
+    for offset in range(n_days):
+        window_present += daily_present[offset]
+        window_recorded += daily_recorded[offset]
+        if offset >= window:
+            window_present -= daily_present[offset - window]
+            window_recorded -= daily_recorded[offset - window]
+        series.append((data.start + timedelta(days=offset), _percent(window_present, window_recorded)))
+
+    return {
+        'window': window,
+        'series': series,
+        'latest': [_percent(p, r) for p, r in zip(latest_present, latest_recorded)],
+    }
+
+
+def weekday_skew(data, engine=None):
+    """
+    Return, per employee, the absence rate on Mondays and Fridays minus the
+    absence rate on Tuesdays to Thursdays, in percentage points. None when
+    either group has fewer than ``MIN_SKEW_RECORDS`` records.
+    """
+    if use_numpy(engine):
+        return _skew_numpy(data)
+    return _skew_python(data)
+
+
+def _skew_numpy(data):
+    n_employees = len(data.employees)
+    emp, day, status = data.arrays()
+    weekday = (day + data.start.weekday()) % 7
+    edge = (weekday == 0) | (weekday == 4)
+    middle = (weekday >= 1) & (weekday <= 3)
+    absent = status == ABSENT
+
+    edge_absent = np.bincount(emp[edge & absent], minlength=n_employees)
+    edge_total = np.bincount(emp[edge], minlength=n_employees)
+    middle_absent = np.bincount(emp[middle & absent], minlength=n_employees)
+    middle_total = np.bincount(emp[middle], minlength=n_employees)
+    return [
+        _skew(*values) for values in zip(
+            edge_absent.tolist(), edge_total.tolist(), middle_absent.tolist(), middle_total.tolist()
+        )
+    ]
+
+
+def _skew_python(data):
+    n_employees = len(data.employees)
+    edge_absent, edge_total = [0] * n_employees, [0] * n_employees
+    middle_absent, middle_total = [0] * n_employees, [0] * n_employees
+    first_weekday = data.start.weekday()
+    for row, offset, code in zip(data.emp, data.day, data.status):
+        weekday = (offset + first_weekday) % 7
+        if weekday in (0, 4):
+            edge_total[row] += 1
+            edge_absent[row] += code == ABSENT
+        elif weekday in (1, 2, 3):
+            middle_total[row] += 1
+            middle_absent[row] += code == ABSENT
+    return [
+        _skew(*values) for values in zip(edge_absent, edge_total, middle_absent, middle_total)
+    ]
+
+
+def _skew(edge_absent, edge_total, middle_absent, middle_total):
+    if edge_total < MIN_SKEW_RECORDS or middle_total < MIN_SKEW_RECORDS:
+        return None
+    return round((edge_absent / edge_total - middle_absent / middle_total) * 100, 1)
+
+
+def attendance_trends(data, engine=None):
+    """
+    Return, per employee, the least-squares slope of presence (1/0) against
+    time, as the change in attendance rate in percentage points per
+    ``TREND_PERIOD_DAYS`` days. Negative values are trending down. None with
+    fewer than ``MIN_TREND_RECORDS`` records or all on one day.
+    """
+    if use_numpy(engine):
+        return _trends_numpy(data)
+    return _trends_python(data)
+
+
+def _trends_numpy(data):
+    n_employees = len(data.employees)
+    emp, day, status = data.arrays()
+    x = day.astype(np.float64)
+    y = (status == PRESENT).astype(np.float64)
+    sums = [
+        np.bincount(emp, minlength=n_employees).astype(np.float64),
+        np.bincount(emp, weights=x, minlength=n_employees),
+        np.bincount(emp, weights=y, minlength=n_employees),
+        np.bincount(emp, weights=x * y, minlength=n_employees),
+        np.bincount(emp, weights=x * x, minlength=n_employees),
+    ]
+    return [_slope(*values) for values in zip(*(column.tolist() for column in sums))]
+
+
+def _trends_python(data):
+    n_employees = len(data.employees)
+    n, sx, sy, sxy, sxx = ([0.0] * n_employees for _ in range(5))
+    for row, offset, code in zip(data.emp, data.day, data.status):
+        present = 1.0 if code == PRESENT else 0.0
+        n[row] += 1
+        sx[row] += offset
+        sy[row] += present
+        sxy[row] += offset * present
+        sxx[row] += offset * offset
+    return [_slope(*values) for values in zip(n, sx, sy, sxy, sxx)]
+
+
+def _slope(n, sx, sy, sxy, sxx):
+    denominator = n * sxx - sx * sx
+    if n < MIN_TREND_RECORDS or denominator <= 0:
+        return None
+    return round((n * sxy - sx * sy) / denominator * TREND_PERIOD_DAYS * 100, 1)
+
+
+def _percent(present, recorded):
+    return round(present / recorded * 100, 1) if recorded else None
+
+
+def report(data, metric, limit=20, window=30, engine=None):
+    """
+    Rank employees by ``metric`` (one of ``METRICS``) and return a
+    JSON-friendly dict with at most ``limit`` rows.
+    """
+    if metric == 'absence_streaks':
+        values = longest_absence_streaks(data, engine)
+        rows = sorted(
+            (index for index, (length, _) in enumerate(values) if length),
+            key=lambda index: (-values[index][0], index)
+        )
+        return {'employees': [
+            dict(_employee(data, index), longest_streak=values[index][0], streak_end=values[index][1])
+            for index in rows[:limit]
+        ]}
+    if metric == 'rolling_rates':
+        rates = rolling_rates(data, window, engine)
+        latest = rates['latest']
+        rows = sorted(
+            (index for index, rate in enumerate(latest) if rate is not None),
+            key=lambda index: (latest[index], index)
+        )
+        return {
+            'window': window,
+            'series': [{'date': day, 'rate': rate} for day, rate in rates['series']],
+            'lowest': [dict(_employee(data, index), rate=latest[index]) for index in rows[:limit]],
+        }
+    if metric == 'weekday_skew':
+        values = weekday_skew(data, engine)
+        rows = sorted(
+            (index for index, skew in enumerate(values) if skew is not None and skew > 0),
+            key=lambda index: (-values[index], index)
+        )
+        return {'employees': [dict(_employee(data, index), skew=values[index]) for index in rows[:limit]]}
+    if metric == 'trending_down':
+        values = attendance_trends(data, engine)
+        rows = sorted(
+            (
+                index for index, trend in enumerate(values)
+                if trend is not None and trend <= -TREND_DOWN_THRESHOLD
+            ),
+            key=lambda index: (values[index], index)
+        )
+        return {'employees': [dict(_employee(data, index), trend=values[index]) for index in rows[:limit]]}
+    raise ValueError(f'metric must be one of: {", ".join(METRICS)}.')
+
+
+def _employee(data, index):
+    _, employee_id, name, department_id = data.employees[index]
+    return {
+        'employee_id': employee_id,
+        'name': name,
+        'department': Department.objects.name_for(department_id),
+    }
@@ -8,3 +8,6 @@ class EmployeesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'employees'
     verbose_name = 'Employee Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,96 @@
+"""
+Attendance archiving: moves old records from the hot Attendance table into
+AttendanceArchive and helps read endpoints query both transparently.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Min
+
+from .models import Attendance, AttendanceArchive
+
+
+def archive_boundary(today=None):
+    """
+    Return the first day of the current month.
+
+    Records on or after this date are never archived, so dashboard and
+    check-in queries for the current month only ever touch the hot table.
+    """
+    today = today or date.today()
+    return today.replace(day=1)
+
+
+def archive_cutoff(days=None, today=None):
+    """
+    Return the date before which records should be archived.
+
+    The horizon defaults to ``ATTENDANCE_ARCHIVE_DAYS`` and is clamped so the
+    current month always stays in the hot table.
+    """
+    today = today or date.today()
+    if days is None:
+        days = settings.ATTENDANCE_ARCHIVE_DAYS
+    return min(today - timedelta(days=days), archive_boundary(today))
+
+
+def may_be_archived(day, today=None):
+    """
+    Return True if records for ``day`` could live in the archive table.
+    """
+    return day < archive_boundary(today)
+
+
+def pending_count(before):
+    """
+    Return the number of hot records older than ``before``.
+    """
+    return Attendance.objects.filter(date__lt=before).count()
+
+
+def archive_attendance(before, batch_days=31):
+    """
+    Move every attendance record dated before ``before`` into the archive.
+
+    Records are moved in date windows of ``batch_days`` days, each with one
+    INSERT ... SELECT and one DELETE inside its own transaction, so a long
+    backlog never holds locks on the hot table for long. Returns the number
+    of records moved.
+    """
+    oldest = Attendance.objects.filter(date__lt=before).aggregate(
+        oldest=Min('date')
+    )['oldest']
+
+    moved = 0
+    while oldest is not None and oldest < before:
+        window_end = min(oldest + timedelta(days=batch_days), before)
+        moved += _move_window(oldest, window_end)
+        oldest = window_end
+    return moved
+
+
+def _move_window(start, end):
+    """
+    Move records with ``start <= date < end`` into the archive table.
+    """
+    quote = connection.ops.quote_name
+    hot_table = quote(Attendance._meta.db_table)
+    archive_table = quote(AttendanceArchive._meta.db_table)
+    params = [
+        connection.ops.adapt_datefield_value(start),
+        connection.ops.adapt_datefield_value(end),
+    ]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {archive_table} ("employee_id", "date", "status") '
+                f'SELECT "employee_id", "date", "status" FROM {hot_table} '
+                f'WHERE "date" >= %s AND "date" < %s '
+                f'ON CONFLICT ("employee_id", "date") '
+                f'DO UPDATE SET "status" = excluded."status"',
+                params
+            )
+        window = Attendance.objects.filter(date__gte=start, date__lt=end)
+        return window._raw_delete(window.db)
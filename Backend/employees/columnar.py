@@ -0,0 +1,265 @@
+"""
+Columnar attendance exports (Arrow IPC and Parquet) for analytics consumers.
+
+``record_batches()`` streams attendance rows joined with the employee's ID,
+name and department from chunked ``values_list`` scans (a server-side cursor
+on PostgreSQL) into Arrow record batches, so memory stays bounded by one
+batch whatever the range. Department and status are dictionary encoded and
+load as pandas categoricals:
+
+    pandas.read_feather('attendance.arrow')
+    pandas.read_parquet('attendance.parquet')
+    pandas.read_parquet('attendance/')    # date-partitioned directory
+
+PyArrow is an optional dependency (``pip install pyarrow``); ``available()``
+reports whether exports can be produced.
+"""
+from datetime import date, timedelta
+
+from .archive import may_be_archived
+from .models import Attendance, AttendanceArchive, Department, Employee
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+
+FORMATS = {
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+PARTITIONS = ('day', 'month')
+
+# Rows per record batch (and Parquet row group), and days read per query
+BATCH_SIZE = 65536
+WINDOW_DAYS = 31
+
+STATUSES = [status for status, _ in Attendance.STATUS_CHOICES]
+
+
+def available():
+    return pa is not None
+
+
+def schema():
+    return pa.schema([
+        ('employee_id', pa.string()),
+        ('name', pa.string()),
+        ('department', pa.dictionary(pa.int16(), pa.string())),
+        ('date', pa.date32()),
+        ('status', pa.dictionary(pa.int8(), pa.string())),
+    ])
+
+
+class BatchEncoder:
+    """
+    Turns attendance rows into record batches for one export.
+
+    Employees are loaded once up front, so encoding a row is a dict lookup
+    instead of a join. Every batch carries the same dictionaries, as the IPC
+    file format requires.
+    """
+
+    def __init__(self, department_id=None):
+        self.department_id = department_id
+        employees = Employee.objects.all()
+        if department_id is not None:
+            employees = employees.filter(department_id=department_id)
+        self.employees = {
+            pk: (employee_id, name, department)
+            for pk, employee_id, name, department in employees.values_list(
+                'pk', 'employee_id', 'name', 'department_id'
+            ).iterator(chunk_size=BATCH_SIZE)
+        }
+        department_ids = sorted(Department.objects.values_list('pk', flat=True))
+        self.departments = pa.array(
+            [Department.objects.name_for(pk) for pk in department_ids], pa.string()
+        )
+        self.department_index = {pk: index for index, pk in enumerate(department_ids)}
+        self.statuses = pa.array(STATUSES, pa.string())
+        self.status_index = {status: index for index, status in enumerate(STATUSES)}
+        self.schema = schema()
+
+    def batches(self, start, end, batch_size=None):
+        """
+        Yield record batches of the attendance between ``start`` and ``end``
+        (inclusive), ordered by date, from the hot and archive tables.
+        """
+        batch_size = batch_size or BATCH_SIZE
+        columns = ([], [], [], [], [])
+        window_start = start
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=WINDOW_DAYS - 1), end)
+            for employee_pk, day, status in self._rows(window_start, window_end, batch_size):
+                employee = self.employees.get(employee_pk)
+                if employee is None:
+                    continue
+                columns[0].append(employee[0])
+                columns[1].append(employee[1])
+                columns[2].append(self.department_index[employee[2]])
+                columns[3].append(day)
+                columns[4].append(self.status_index[status])
+                if len(columns[0]) >= batch_size:
+                    yield self._batch(columns)
+            window_start = window_end + timedelta(days=1)
+        if columns[0]:
+            yield self._batch(columns)
+
+    def _rows(self, start, end, chunk_size):
+        models = [Attendance]
+        if may_be_archived(start):
+            models.append(AttendanceArchive)
+        for model in models:
+            rows = model.objects.filter(date__gte=start, date__lte=end)
+            if self.department_id is not None:
+                rows = rows.filter(employee__department_id=self.department_id)
+            rows = rows.order_by('date', 'employee_id').values_list('employee_id', 'date', 'status')
+            yield from rows.iterator(chunk_size=chunk_size)
+
+    def _batch(self, columns):
+        batch = pa.record_batch([
+            pa.array(columns[0], pa.string()),
+            pa.array(columns[1], pa.string()),
+            pa.DictionaryArray.from_arrays(pa.array(columns[2], pa.int16()), self.departments),
+            pa.array(columns[3], pa.date32()),
+            pa.DictionaryArray.from_arrays(pa.array(columns[4], pa.int8()), self.statuses),
+        ], schema=self.schema)
+        for column in columns:
+            column.clear()
+        return batch
+
+
+def record_batches(start, end, department_id=None, batch_size=None):
+    """
+    Yield record batches of the attendance between ``start`` and ``end``
+    (inclusive); see ``BatchEncoder``.
+    """
+    return BatchEncoder(department_id).batches(start, end, batch_size)
+
+
+def open_writer(sink, fmt):
+    """
+    Return a writer for ``fmt`` over ``sink`` (a path or a binary file object).
+    """
+    if fmt == 'arrow':
+        return pa.ipc.new_file(sink, schema())
+    if fmt == 'parquet':
+        return pq.ParquetWriter(sink, schema())
+    raise ValueError(f'Unknown format "{fmt}". Available: {", ".join(FORMATS)}.')
+
+
+def write(sink, fmt, batches):
+    """
+    Write ``batches`` to ``sink`` as one file; return the number of rows.
+    """
+    rows = 0
+    with open_writer(sink, fmt) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def partitions(start, end, partition):
+    """
+    Yield ``(label, first day, last day)`` for each day or month in range.
+    """
+    if partition not in PARTITIONS:
+        raise ValueError(f'Unknown partition "{partition}". Available: {", ".join(PARTITIONS)}.')
+    current = start
+    while current <= end:
+        if partition == 'day':
+            yield current.isoformat(), current, current
+            current += timedelta(days=1)
+        else:
+            following = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+            yield current.strftime('%Y-%m'), current, min(following - timedelta(days=1), end)
+            current = following
+
+
+def write_partitioned(directory, fmt, start, end, department_id=None, partition='day'):
+    """
+    Write one file per day or month under ``directory`` in Hive layout
+    (``day=2024-01-15/part-0.parquet`` or ``month=2024-01/...``); empty
+    partitions are skipped.
+
+    Returns ``(files, rows)``.
+    """
+    extension = FORMATS[fmt][0]
+    encoder = BatchEncoder(department_id)
+    files = rows = 0
+    for label, first, last in partitions(start, end, partition):
+        batches = encoder.batches(first, last)
+        batch = next(batches, None)
+        if batch is None:
+            continue
+        folder = directory / f'{partition}={label}'
+        folder.mkdir(parents=True, exist_ok=True)
+        rows += write(str(folder / f'part-0.{extension}'), fmt, _chain(batch, batches))
+        files += 1
+    return files, rows
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+class ChunkSink:
+    """
+    Write-only binary file object that hands written bytes out in chunks,
+    for streaming a writer's output in an HTTP response.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def readable(self):
+        return False
+
+    def seekable(self):
+        return False
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream(fmt, batches):
+    """
+    Yield the bytes of a ``fmt`` file of ``batches`` as it is written.
+    """
+    sink = ChunkSink()
+    writer = open_writer(pa.PythonFile(sink, mode='w'), fmt)
+    for batch in batches:
+        writer.write_batch(batch)
+        data = sink.take()
+        if data:
+            yield data
+    writer.close()
+    yield sink.take()
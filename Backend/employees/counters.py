@@ -0,0 +1,196 @@
+"""
+Maintenance of the denormalized per-employee AttendanceCounter rows.
+
+Single-record writes adjust counters incrementally with F() expressions;
+set-based writes and the reconcile command rebuild them from the attendance
+and archive tables with one INSERT ... SELECT per chunk of employees. An
+archived record that also has a hot record for its day is not counted: the
+hot record wins, as it does in the attendance reads.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+
+from .models import Attendance, AttendanceArchive, AttendanceCounter, Employee
+
+
+# Counter column incremented for each status label
+STATUS_COLUMNS = {
+    'Present': 'present',
+    'Absent': 'absent',
+}
+
+REBUILD_CHUNK_SIZE = 500
+
+
+def record_change(employee_pk, added=None, removed=None):
+    """
+    Apply one attendance change to an employee's counters.
+
+    ``added`` is the status of a record that now exists, ``removed`` the
+    status of a record that no longer does; pass both for a status change.
+    """
+    deltas = {}
+    if added is not None:
+        deltas['total'] = deltas.get('total', 0) + 1
+        deltas[STATUS_COLUMNS[added]] = deltas.get(STATUS_COLUMNS[added], 0) + 1
+    if removed is not None:
+        deltas['total'] = deltas.get('total', 0) - 1
+        deltas[STATUS_COLUMNS[removed]] = deltas.get(STATUS_COLUMNS[removed], 0) - 1
+
+    updates = {column: F(column) + delta for column, delta in deltas.items() if delta}
+    if not updates:
+        return
+    if not AttendanceCounter.objects.filter(employee_id=employee_pk).update(**updates):
+        # No counter row yet: build it from the records, which already
+        # include this change.
+        rebuild([employee_pk])
+
+
+def get_counts(employee_pk):
+    """
+    Return ``(total, present, absent)`` for an employee, building the
+    counter row on first use.
+    """
+    row = AttendanceCounter.objects.filter(employee_id=employee_pk).values_list(
+        'total', 'present', 'absent'
+    ).first()
+    if row is None:
+        rebuild([employee_pk])
+        row = AttendanceCounter.objects.filter(employee_id=employee_pk).values_list(
+            'total', 'present', 'absent'
+        ).first() or (0, 0, 0)
+    return row
+
+
+def count_range(employee_pk, start=None, end=None):
+    """
+    Return ``(total, present, absent)`` for records dated within
+    ``[start, end]``; unbounded ranges are answered from the counter row.
+    """
+    if start is None and end is None:
+        return get_counts(employee_pk)
+
+    filters = Q(employee_id=employee_pk)
+    if start is not None:
+        filters &= Q(date__gte=start)
+    if end is not None:
+        filters &= Q(date__lte=end)
+
+    archived = AttendanceArchive.objects.filter(filters).exclude(
+        Exists(Attendance.objects.filter(employee_id=OuterRef('employee_id'), date=OuterRef('date')))
+    )
+    totals = [0, 0, 0]
+    for queryset in (Attendance.objects.filter(filters), archived):
+        row = queryset.aggregate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status='Present')),
+            absent=Count('id', filter=Q(status='Absent')),
+        )
+        totals[0] += row['total']
+        totals[1] += row['present']
+        totals[2] += row['absent']
+    return tuple(totals)
+
+
+def first_record_date(employee_pk):
+    """
+    Return the date of the employee's earliest hot or archived record, or None.
+    """
+    dates = [
+        model.objects.filter(employee_id=employee_pk).order_by('date').values_list('date', flat=True).first()
+        for model in (AttendanceArchive, Attendance)
+    ]
+    dates = [day for day in dates if day is not None]
+    return min(dates) if dates else None
+
+
+def rebuild(employee_pks=None):
+    """
+    Recompute counters from the attendance and archive tables.
+
+    With ``employee_pks`` only those employees are rebuilt, otherwise every
+    employee is. Returns the number of counter rows written.
+    """
+    if employee_pks is None:
+        with transaction.atomic():
+            AttendanceCounter.objects.all()._raw_delete(AttendanceCounter.objects.db)
+            return _insert_counts(None)
+
+    pks = sorted(set(employee_pks))
+    written = 0
+    for start in range(0, len(pks), REBUILD_CHUNK_SIZE):
+        chunk = pks[start:start + REBUILD_CHUNK_SIZE]
+        with transaction.atomic():
+            stale = AttendanceCounter.objects.filter(employee_id__in=chunk)
+            stale._raw_delete(stale.db)
+            written += _insert_counts(chunk)
+    return written
+
+
+def find_mismatches():
+    """
+    Return ``{employee_pk: (stored, actual)}`` for counters that disagree
+    with the records. Missing counter rows are reported as ``None``.
+    """
+    stored = {
+        pk: (total, present, absent)
+        for pk, total, present, absent in AttendanceCounter.objects.values_list(
+            'employee_id', 'total', 'present', 'absent'
+        )
+    }
+    mismatches = {}
+    for pk, total, present, absent in _select_counts(None):
+        actual = (total, present, absent)
+        if stored.get(pk) != actual:
+            mismatches[pk] = (stored.get(pk), actual)
+    return mismatches
+
+
+def _counts_sql(employee_pks):
+    quote = connection.ops.quote_name
+    status_field = Attendance._meta.get_field('status')
+    where = ''
+    params = [
+        status_field.code_for('Present'),
+        status_field.code_for('Absent'),
+    ]
+    if employee_pks is not None:
+        where = f'WHERE e.{quote("id")} IN ({", ".join(["%s"] * len(employee_pks))}) '
+        params.extend(employee_pks)
+
+    sql = (
+        f'SELECT e.{quote("id")}, COUNT(r.{quote("status")}), '
+        f'COALESCE(SUM(CASE WHEN r.{quote("status")} = %s THEN 1 ELSE 0 END), 0), '
+        f'COALESCE(SUM(CASE WHEN r.{quote("status")} = %s THEN 1 ELSE 0 END), 0) '
+        f'FROM {quote(Employee._meta.db_table)} e '
+        f'LEFT JOIN ('
+        f'SELECT {quote("employee_id")}, {quote("status")} FROM {quote(Attendance._meta.db_table)} '
+        f'UNION ALL '
+        f'SELECT a.{quote("employee_id")}, a.{quote("status")} FROM {quote(AttendanceArchive._meta.db_table)} a '
+        f'WHERE NOT EXISTS (SELECT 1 FROM {quote(Attendance._meta.db_table)} h '
+        f'WHERE h.{quote("employee_id")} = a.{quote("employee_id")} AND h.{quote("date")} = a.{quote("date")})'
+        f') r ON r.{quote("employee_id")} = e.{quote("id")} '
+        f'{where}'
+        f'GROUP BY e.{quote("id")}'
+    )
+    return sql, params
+
+
+def _select_counts(employee_pks):
+    sql, params = _counts_sql(employee_pks)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _insert_counts(employee_pks):
+    quote = connection.ops.quote_name
+    sql, params = _counts_sql(employee_pks)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(AttendanceCounter._meta.db_table)} '
+            f'({quote("employee_id")}, {quote("total")}, {quote("present")}, {quote("absent")}) '
+            f'{sql}',
+            params
+        )
+        return cursor.rowcount
@@ -0,0 +1,168 @@
+"""
+In-process employee directory cache.
+
+Maps ``employee_id`` (and primary key) to a lightweight snapshot of the
+employee so hot paths such as marking attendance can resolve an employee
+without a database round trip. Entries are evicted LRU-style and invalidated
+by signals on ``Employee``; set-based writes that bypass signals must call
+``employee_directory.invalidate()`` themselves. Invalidation only reaches
+the current process: others pick up a change when their entry expires
+(``EMPLOYEE_DIRECTORY_TTL``), so checks that must be exact, such as
+uniqueness, go to the database.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from .models import Department, Employee
+
+
+DIRECTORY_FIELDS = (
+    'id',
+    'employee_id',
+    'name',
+    'email',
+    'department_id',
+    'created_at',
+    'updated_at',
+)
+
+
+class DirectoryEntry(namedtuple('DirectoryEntry', DIRECTORY_FIELDS)):
+    """
+    Immutable snapshot of an employee row.
+    """
+    __slots__ = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def department(self):
+        return Department.objects.name_for(self.department_id)
+
+    def as_employee(self):
+        """
+        Build an ``Employee`` instance from the snapshot without a query.
+        """
+        return Employee.from_db('default', DIRECTORY_FIELDS, tuple(self))
+
+
+class EmployeeDirectory:
+    """
+    Thread-safe LRU cache of employees keyed by employee_id.
+
+    Every entry records the directory version it was loaded under; bumping
+    the version (``invalidate()`` without arguments) makes all entries stale
+    at once. Entries also expire after ``ttl`` seconds, which bounds how long
+    other worker processes can serve a stale snapshot.
+    """
+
+    def __init__(self, max_size=10000, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._pk_index = {}
+        self._version = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, employee_id):
+        """
+        Return the entry for ``employee_id`` (matched case-insensitively),
+        loading it on a miss, or None.
+        """
+        employee_id = Employee.normalize_employee_id(employee_id)
+        if not employee_id:
+            return None
+        entry = self._lookup(employee_id)
+        if entry is not None:
+            return entry
+        return self._load(employee_id=employee_id)
+
+    def get_by_pk(self, pk):
+        """
+        Return the entry for primary key ``pk``, loading it on a miss, or None.
+        """
+        with self._lock:
+            employee_id = self._pk_index.get(int(pk))
+        if employee_id is not None:
+            entry = self._lookup(employee_id)
+            if entry is not None:
+                return entry
+        return self._load(pk=pk)
+
+    def invalidate(self, employee_id=None, pk=None):
+        """
+        Drop one employee (by employee_id and/or pk) or, with no arguments,
+        every cached employee.
+        """
+        with self._lock:
+            self._generation += 1
+            if employee_id is None and pk is None:
+                self._version += 1
+                self._entries.clear()
+                self._pk_index.clear()
+                return
+            if pk is not None:
+                stale_id = self._pk_index.pop(pk, None)
+                if stale_id is not None:
+                    self._entries.pop(stale_id, None)
+            if employee_id is not None:
+                cached = self._entries.pop(Employee.normalize_employee_id(employee_id), None)
+                if cached is not None:
+                    self._pk_index.pop(cached[0].id, None)
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        self.invalidate()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, employee_id):
+        with self._lock:
+            cached = self._entries.get(employee_id)
+            if cached is None:
+                return None
+            entry, version, loaded_at = cached
+            if version != self._version or time.monotonic() - loaded_at > self.ttl:
+                del self._entries[employee_id]
+                self._pk_index.pop(entry.id, None)
+                return None
+            self._entries.move_to_end(employee_id)
+            return entry
+
+    def _load(self, employee_id=None, pk=None):
+        with self._lock:
+            version, generation = self._version, self._generation
+
+        queryset = Employee.objects.filter(
+            **({'employee_id__upper': employee_id} if employee_id is not None else {'pk': pk})
+        )
+        rows = list(queryset.values_list(*DIRECTORY_FIELDS)[:1])
+        if not rows:
+            return None
+        entry = DirectoryEntry(*rows[0])
+
+        with self._lock:
+            # Skip caching if an invalidation raced with the query.
+            if generation == self._generation:
+                self._entries[entry.employee_id] = (entry, version, time.monotonic())
+                self._entries.move_to_end(entry.employee_id)
+                self._pk_index[entry.id] = entry.employee_id
+                while len(self._entries) > self.max_size:
+                    _, (evicted, _, _) = self._entries.popitem(last=False)
+                    self._pk_index.pop(evicted.id, None)
+        return entry
+
+
+employee_directory = EmployeeDirectory(
+    max_size=settings.EMPLOYEE_DIRECTORY_SIZE,
+    ttl=settings.EMPLOYEE_DIRECTORY_TTL,
+)
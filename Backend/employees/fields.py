@@ -0,0 +1,66 @@
+"""
+Custom model fields for the employees app.
+"""
+from django.core import exceptions
+from django.db import models
+from django.utils.functional import cached_property
+
+
+class CodedChoiceField(models.PositiveSmallIntegerField):
+    """
+    Stores string choices as small integer codes.
+
+    Python code, querysets and the API work with the labels (e.g. 'Present'),
+    while the database column and its indexes hold the compact code given in
+    ``codes``. Raw SQL must use ``field.code_for(label)``.
+    """
+
+    def __init__(self, *args, codes=None, **kwargs):
+        self.codes = dict(codes or {})
+        self.labels = {code: label for label, code in self.codes.items()}
+        kwargs.setdefault('choices', [(label, label) for label in self.codes])
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['codes'] = self.codes
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # Integer range validators do not apply to the string labels.
+        return [*self.default_validators, *self._validators]
+
+    def code_for(self, label):
+        """
+        Return the integer code stored for ``label``.
+        """
+        try:
+            return self.codes[label]
+        except KeyError:
+            raise ValueError(
+                f"Field '{self.name}' expected one of {', '.join(self.codes)} but got {label!r}."
+            )
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.labels.get(value, value)
+
+    def to_python(self, value):
+        if value is None or value in self.codes:
+            return value
+        if value in self.labels:
+            return self.labels[value]
+        raise exceptions.ValidationError(
+            self.error_messages['invalid_choice'],
+            code='invalid_choice',
+            params={'value': value},
+        )
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        if isinstance(value, int) and value in self.labels:
+            return value
+        return self.code_for(value)
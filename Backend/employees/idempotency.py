@@ -0,0 +1,135 @@
+"""
+Idempotency-Key support for write endpoints.
+
+Clients that retry a POST/PATCH/DELETE send the same ``Idempotency-Key``
+header with every attempt. The first attempt claims the key and its response
+is stored; retries replay the stored response without running validation or
+touching the main tables. Keys are scoped to the HTTP method and path and
+expire after ``IDEMPOTENCY_KEY_TTL`` seconds.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+from .utils import error_response
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+MAX_KEY_LENGTH = 255
+
+
+def idempotent(view_method):
+    """
+    Make a viewset method honour the ``Idempotency-Key`` header.
+
+    Requests without the header run unchanged. Responses with a 5xx status
+    are not stored, so a retry after a server error runs the write again.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER, '').strip()
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return error_response(
+                error=f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters.',
+                message='Validation failed.',
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        scope = f'{request.method}:{request.path}'[:100]
+        request_hash = _hash_request(request)
+        record, claimed = _claim(key, scope, request_hash)
+        if not claimed:
+            return _replay(record, request_hash)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status_code=response.status_code,
+                response_body=response.data
+            )
+        return response
+    return wrapper
+
+
+def purge_expired(ttl=None):
+    """
+    Delete keys older than ``ttl`` seconds (default ``IDEMPOTENCY_KEY_TTL``)
+    and return how many were removed.
+    """
+    expired = IdempotencyKey.objects.filter(created_at__lt=_cutoff(ttl))
+    return expired._raw_delete(expired.db)
+
+
+def _cutoff(ttl=None):
+    if ttl is None:
+        ttl = settings.IDEMPOTENCY_KEY_TTL
+    return timezone.now() - timedelta(seconds=ttl)
+
+
+def _hash_request(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def _claim(key, scope, request_hash):
+    """
+    Return ``(record, claimed)``. ``claimed`` is True when this request owns
+    the key and must run; otherwise ``record`` is the earlier attempt (or
+    None if it vanished meanwhile).
+    """
+    existing = IdempotencyKey.objects.filter(
+        key=key, scope=scope, created_at__gte=_cutoff()
+    ).first()
+    if existing is not None:
+        return existing, False
+
+    IdempotencyKey.objects.filter(key=key, scope=scope).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                key=key, scope=scope, request_hash=request_hash
+            ), True
+    except IntegrityError:
+        # A concurrent attempt claimed the key first.
+        return IdempotencyKey.objects.filter(key=key, scope=scope).first(), False
+
+
+def _replay(record, request_hash):
+    if record is None or record.status_code is None:
+        response = error_response(
+            error='A request with this Idempotency-Key is still being processed.',
+            message='Request in progress.',
+            status_code=status.HTTP_409_CONFLICT
+        )
+        response['Retry-After'] = '1'
+        return response
+    if record.request_hash != request_hash:
+        return error_response(
+            error='This Idempotency-Key was already used with a different request body.',
+            message='Idempotency key reuse.',
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    response = Response(record.response_body, status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
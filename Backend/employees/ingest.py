@@ -0,0 +1,234 @@
+"""
+Write-behind ingestion of attendance marks.
+
+With ``ATTENDANCE_WRITE_BEHIND`` enabled, POST /api/attendance/ validates the
+mark, appends it to a local append-only log, queues it in memory and answers
+202 straight away. A flusher thread writes the queue every
+``ATTENDANCE_FLUSH_INTERVAL_MS`` milliseconds (or as soon as
+``ATTENDANCE_FLUSH_BATCH_SIZE`` marks are waiting) as one batched upsert, so
+check-in bursts cost one transaction per batch instead of one per request.
+
+Each process logs to its own file in ``ATTENDANCE_INGEST_DIR``. The log is
+rotated at every flush and the rotated file removed once the batch commits,
+so files left behind by a crashed process hold exactly the marks that never
+reached the database; ``replay_logs()`` (and ``python manage.py
+replay_checkin_log``) applies them.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from .upsert import upsert_marks
+
+try:
+    import fcntl
+except ImportError:  # Windows: logs are not locked, replay only via the command
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+LOG_SUFFIX = '.log'
+FLUSHING_SUFFIX = '.flushing'
+
+
+class CheckinQueue:
+    """
+    In-process write-behind queue of attendance marks.
+
+    Marks for the same employee and date within one batch collapse to the
+    latest one. The flusher thread starts with the first ``enqueue()`` when
+    ``autostart`` is set; otherwise call ``flush()`` yourself.
+    """
+
+    def __init__(self, log_dir, interval_ms=200, batch_size=500, autostart=True):
+        self.log_dir = Path(log_dir)
+        self.interval = interval_ms / 1000.0
+        self.batch_size = batch_size
+        self.autostart = autostart
+        self._buffer = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._log = None
+        self._log_path = None
+        self._rotations = 0
+        self._thread = None
+        self._stopping = False
+
+    def enqueue(self, employee_pk, day, record_status):
+        """
+        Log and queue one mark; returns once it is in the local log.
+        """
+        line = json.dumps({'e': employee_pk, 'd': day.isoformat(), 's': record_status})
+        with self._condition:
+            if self._log is None:
+                self._open_log()
+            self._log.write(line + '\n')
+            self._log.flush()
+            self._buffer[(employee_pk, day)] = record_status
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+        if self.autostart and self._thread is None:
+            self.start()
+
+    def pending(self):
+        """
+        Return the number of marks waiting to be written.
+        """
+        with self._condition:
+            return len(self._buffer)
+
+    def start(self):
+        """
+        Start the flusher thread (idempotent).
+        """
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name='attendance-flusher', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """
+        Stop the flusher thread after writing everything still queued.
+        """
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
+        with self._condition:
+            # Everything logged has been written; drop the empty log.
+            if self._log is not None and not self._buffer:
+                self._log.close()
+                os.remove(self._log_path)
+                self._log = None
+
+    def flush(self):
+        """
+        Write every queued mark in one batch and return how many were written.
+
+        On failure the marks are put back (newer marks win) and re-logged so a
+        later flush, or a replay after a crash, still applies them.
+        """
+        with self._flush_lock:
+            with self._condition:
+                if not self._buffer:
+                    return 0
+                batch, self._buffer = self._buffer, {}
+                flushing, flushing_log = self._rotate_log()
+            try:
+                written = upsert_marks(batch)
+            except Exception:
+                logger.exception('Failed to flush %d attendance mark(s)', len(batch))
+                with self._condition:
+                    for key, record_status in batch.items():
+                        if key not in self._buffer:
+                            self._buffer[key] = record_status
+                            self._log.write(json.dumps({
+                                'e': key[0], 'd': key[1].isoformat(), 's': record_status
+                            }) + '\n')
+                    self._log.flush()
+                raise
+            finally:
+                # The rotated log stays locked until its batch is settled.
+                os.remove(flushing)
+                flushing_log.close()
+            return written
+
+    def _run(self):
+        try:
+            replay_logs(self.log_dir)
+        except Exception:
+            logger.exception('Failed to replay attendance ingest logs')
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stopping or len(self._buffer) >= self.batch_size,
+                    timeout=self.interval
+                )
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception:
+                # Already logged and re-queued; retry on the next tick with
+                # a fresh connection.
+                connections.close_all()
+            if stopping:
+                connections.close_all()
+                return
+
+    def _open_log(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._log_path = self.log_dir / f'checkins-{os.getpid()}-{uuid.uuid4().hex[:8]}{LOG_SUFFIX}'
+        self._log = open(self._log_path, 'a', encoding='utf-8')
+        if fcntl is not None:
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _rotate_log(self):
+        """
+        Move the current log aside for the batch being flushed and start a
+        new one; returns the rotated path and its still-open (locked) file.
+        """
+        self._rotations += 1
+        flushing = self._log_path.with_name(
+            f'{self._log_path.stem}.{self._rotations}{FLUSHING_SUFFIX}'
+        )
+        os.rename(self._log_path, flushing)
+        flushing_log = self._log
+        self._open_log()
+        return flushing, flushing_log
+
+
+def replay_logs(log_dir):
+    """
+    Apply marks from logs left behind by processes that stopped before
+    flushing, oldest file first, and delete the files. Logs still locked by
+    a running process are skipped. Returns the number of marks written.
+    """
+    log_dir = Path(log_dir)
+    if not log_dir.is_dir():
+        return 0
+    paths = sorted(
+        (path for path in log_dir.iterdir() if path.suffix in (LOG_SUFFIX, FLUSHING_SUFFIX)),
+        key=lambda path: path.stat().st_mtime
+    )
+    written = 0
+    for path in paths:
+        with open(path, 'r+', encoding='utf-8') as log:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(log.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue
+            marks = {}
+            for line in log:
+                try:
+                    entry = json.loads(line)
+                    marks[(entry['e'], date.fromisoformat(entry['d']))] = entry['s']
+                except (ValueError, KeyError):
+                    continue  # torn final line from a crash
+            written += upsert_marks(marks)
+        os.remove(path)
+    return written
+
+
+checkin_queue = CheckinQueue(
+    log_dir=settings.ATTENDANCE_INGEST_DIR,
+    interval_ms=settings.ATTENDANCE_FLUSH_INTERVAL_MS,
+    batch_size=settings.ATTENDANCE_FLUSH_BATCH_SIZE,
+)
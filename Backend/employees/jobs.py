@@ -0,0 +1,473 @@
+"""
+Database-backed background jobs.
+
+Long operations (month-wide exports, counter rebuilds, large imports) are
+queued as ``Job`` rows by the API and executed by ``python manage.py
+run_jobs``, which claims queued rows with a conditional UPDATE so any number
+of workers can share the table without an external broker. Handlers are
+registered with ``@job_handler`` and report progress through a ``JobContext``.
+"""
+import csv
+import logging
+import os
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.utils import timezone
+
+from . import columnar, counters, idempotency
+from .archive import archive_attendance, archive_cutoff, may_be_archived
+from .models import Attendance, AttendanceArchive, Department, Employee, Job
+from .upsert import close_days
+
+
+logger = logging.getLogger(__name__)
+
+JobType = namedtuple('JobType', ['handler', 'validate', 'requires_file'])
+
+JOB_TYPES = {}
+
+# Days exported per query window by ``attendance_export``
+EXPORT_WINDOW_DAYS = 7
+
+# Rows validated and inserted per batch by ``employee_import``
+IMPORT_BATCH_SIZE = 500
+
+
+def job_handler(kind, validate=None, requires_file=False):
+    """
+    Register a job handler under ``kind``.
+
+    The handler receives a ``JobContext``. ``validate`` is called with the
+    submitted params when the job is queued and returns the cleaned params or
+    raises ``ValueError``; ``requires_file`` jobs need an uploaded input file.
+    """
+    def register(func):
+        JOB_TYPES[kind] = JobType(func, validate, requires_file)
+        return func
+    return register
+
+
+def results_dir():
+    """
+    Return the directory holding job inputs and results, creating it if needed.
+    """
+    path = Path(settings.JOB_RESULTS_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def result_path(job):
+    """
+    Return the absolute path of a job's result file.
+    """
+    return results_dir() / job.result_file
+
+
+class JobContext:
+    """
+    Handle passed to job handlers for params, files and progress reporting.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.params = job.params
+
+    def set_progress(self, percent, message=''):
+        """
+        Record progress (0-100) and refresh the job's heartbeat.
+        """
+        percent = max(0, min(100, int(percent)))
+        Job.objects.filter(pk=self.job.pk).update(
+            progress=percent,
+            message=message[:255],
+            heartbeat_at=timezone.now()
+        )
+
+    def open_input(self):
+        """
+        Open the uploaded input file as text.
+        """
+        return open(results_dir() / self.job.input_file, newline='', encoding='utf-8-sig')
+
+    def open_result(self, filename, content_type, binary=False):
+        """
+        Open the job's result file for writing as text (or bytes if ``binary``).
+        """
+        self.job.result_file = f'{self.job.pk}-{filename}'
+        self.job.result_content_type = content_type
+        Job.objects.filter(pk=self.job.pk).update(
+            result_file=self.job.result_file,
+            result_content_type=content_type
+        )
+        if binary:
+            return open(result_path(self.job), 'wb')
+        return open(result_path(self.job), 'w', newline='', encoding='utf-8')
+
+
+def submit(kind, params=None, upload=None):
+    """
+    Validate and queue a job; ``upload`` is an optional uploaded input file.
+
+    Raises ``ValueError`` for unknown kinds, invalid params or a missing file.
+    """
+    job_type = JOB_TYPES.get(kind)
+    if job_type is None:
+        raise ValueError(f'Unknown job kind "{kind}". Available: {", ".join(sorted(JOB_TYPES))}.')
+    if job_type.requires_file and upload is None:
+        raise ValueError(f'Job kind "{kind}" requires an uploaded file.')
+    params = params or {}
+    if job_type.validate is not None:
+        params = job_type.validate(params)
+
+    job = Job.objects.create(kind=kind, params=params)
+    if upload is not None:
+        job.input_file = f'{job.pk}-input{Path(upload.name).suffix}'
+        with open(results_dir() / job.input_file, 'wb') as destination:
+            for chunk in upload.chunks():
+                destination.write(chunk)
+        Job.objects.filter(pk=job.pk).update(input_file=job.input_file)
+    return job
+
+
+def claim_next(worker):
+    """
+    Claim the oldest queued job for ``worker`` and return its id, or None.
+
+    The claim is a conditional UPDATE on ``status``, so concurrent workers
+    never run the same job.
+    """
+    candidates = list(
+        Job.objects.filter(status=Job.QUEUED)
+        .order_by('created_at', 'pk')
+        .values_list('pk', flat=True)[:10]
+    )
+    now = timezone.now()
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            worker=worker[:100],
+            started_at=now,
+            heartbeat_at=now
+        )
+        if claimed:
+            return pk
+    return None
+
+
+def heartbeat(job_ids):
+    """
+    Mark running jobs as alive so they are not requeued as stale.
+    """
+    if job_ids:
+        Job.objects.filter(pk__in=list(job_ids), status=Job.RUNNING).update(
+            heartbeat_at=timezone.now()
+        )
+
+
+def requeue_stale(stale_after):
+    """
+    Requeue running jobs whose worker stopped sending heartbeats.
+
+    Returns the number of jobs requeued.
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff).update(
+        status=Job.QUEUED,
+        worker='',
+        progress=0
+    )
+
+
+def execute(job_id):
+    """
+    Run a claimed job to completion and return its final status.
+
+    Handler exceptions mark the job as failed; they never escape.
+    """
+    job = Job.objects.get(pk=job_id)
+    job_type = JOB_TYPES.get(job.kind)
+    try:
+        if job_type is None:
+            raise ValueError(f'Unknown job kind "{job.kind}".')
+        message = job_type.handler(JobContext(job))
+    except Exception as e:
+        logger.exception('Job %s (%s) failed', job.pk, job.kind)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED,
+            error=str(e) or e.__class__.__name__,
+            finished_at=timezone.now()
+        )
+        return Job.FAILED
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.SUCCEEDED,
+        progress=100,
+        message=(message or 'Completed.')[:255],
+        finished_at=timezone.now()
+    )
+    return Job.SUCCEEDED
+
+
+def _parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        raise ValueError(f'{name} is required.')
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format.')
+
+
+def _validate_export(params):
+    start = _parse_date(params, 'start')
+    end = _parse_date(params, 'end')
+    if end < start:
+        raise ValueError('end must not be before start.')
+    cleaned = {'start': start.isoformat(), 'end': end.isoformat()}
+    export_format = params.get('format') or 'csv'
+    if export_format not in ('csv', *columnar.FORMATS):
+        raise ValueError(f'format must be one of: csv, {", ".join(columnar.FORMATS)}.')
+    if export_format != 'csv':
+        if not columnar.available():
+            raise ValueError('Columnar exports require PyArrow, which is not installed on the server.')
+        cleaned['format'] = export_format
+    if params.get('department'):
+        if Department.objects.id_for(params['department']) is None:
+            raise ValueError('Select a valid department.')
+        cleaned['department'] = params['department']
+    return cleaned
+
+
+@job_handler('attendance_export', validate=_validate_export)
+def export_attendance(context):
+    """
+    Write every attendance record in ``[start, end]`` to a CSV file, or to
+    an Arrow or Parquet file when ``format`` says so.
+    """
+    start = date.fromisoformat(context.params['start'])
+    end = date.fromisoformat(context.params['end'])
+    department = context.params.get('department')
+    filters = {}
+    if department:
+        filters['employee__department_id'] = Department.objects.id_for(department)
+    if context.params.get('format', 'csv') != 'csv':
+        return _export_columnar(context, start, end, filters.get('employee__department_id'))
+
+    columns = ('employee__employee_id', 'employee__name', 'employee__department_id', 'date', 'status')
+    total_days = (end - start).days + 1
+    written = 0
+    with context.open_result(f'attendance-{start}-{end}.csv', 'text/csv') as output:
+        writer = csv.writer(output)
+        writer.writerow(['employee_id', 'name', 'department', 'date', 'status'])
+        window_start = start
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=EXPORT_WINDOW_DAYS - 1), end)
+            window = {'date__gte': window_start, 'date__lte': window_end, **filters}
+            models = [Attendance]
+            if may_be_archived(window_start):
+                models.append(AttendanceArchive)
+            for model in models:
+                rows = model.objects.filter(**window).order_by('date', 'employee_id')
+                for employee_id, name, department_id, day, record_status in rows.values_list(
+                    *columns
+                ).iterator(chunk_size=2000):
+                    writer.writerow([
+                        employee_id, name, Department.objects.name_for(department_id),
+                        day.isoformat(), record_status
+                    ])
+                    written += 1
+            context.set_progress(
+                ((window_end - start).days + 1) * 100 / total_days,
+                f'Exported records up to {window_end}.'
+            )
+            window_start = window_end + timedelta(days=1)
+    return f'Exported {written} record(s).'
+
+
+def _export_columnar(context, start, end, department_id):
+    export_format = context.params['format']
+    extension, content_type = columnar.FORMATS[export_format]
+    encoder = columnar.BatchEncoder(department_id)
+    total_days = (end - start).days + 1
+    written = 0
+    with context.open_result(f'attendance-{start}-{end}.{extension}', content_type, binary=True) as output:
+        with columnar.open_writer(output, export_format) as writer:
+            window_start = start
+            while window_start <= end:
+                window_end = min(window_start + timedelta(days=EXPORT_WINDOW_DAYS - 1), end)
+                for batch in encoder.batches(window_start, window_end):
+                    writer.write_batch(batch)
+                    written += batch.num_rows
+                context.set_progress(
+                    ((window_end - start).days + 1) * 100 / total_days,
+                    f'Exported records up to {window_end}.'
+                )
+                window_start = window_end + timedelta(days=1)
+    return f'Exported {written} record(s).'
+
+
+@job_handler('rebuild_counters')
+def rebuild_counters(context):
+    """
+    Rebuild every employee's attendance counters.
+    """
+    written = counters.rebuild()
+    return f'Rebuilt {written} attendance counter(s).'
+
+
+@job_handler('purge_idempotency_keys')
+def purge_idempotency_keys(context):
+    """
+    Delete expired Idempotency-Key responses.
+    """
+    deleted = idempotency.purge_expired()
+    return f'Purged {deleted} expired idempotency key(s).'
+
+
+def _validate_close_days(params):
+    today = date.today()
+    end = _parse_date(params, 'end') if params.get('end') else today
+    start = _parse_date(params, 'start') if params.get('start') else end
+    if end < start:
+        raise ValueError('end must not be before start.')
+    if end > today:
+        raise ValueError('Cannot close days in the future.')
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'include_non_working': bool(params.get('include_non_working', False)),
+    }
+
+
+@job_handler('close_attendance_days', validate=_validate_close_days)
+def close_attendance_days(context):
+    """
+    Mark employees without a record as Absent on each working day in
+    ``[start, end]`` (see ``upsert.close_day``).
+    """
+    start = date.fromisoformat(context.params['start'])
+    end = date.fromisoformat(context.params['end'])
+    total_days = (end - start).days + 1
+    marked = 0
+    day = start
+    while day <= end:
+        marked += sum(close_days(day, day, context.params['include_non_working']).values())
+        context.set_progress(
+            ((day - start).days + 1) * 100 / total_days,
+            f'Closed days up to {day}.'
+        )
+        day += timedelta(days=1)
+    return f'Marked {marked} absence(s).'
+
+
+def _validate_archive(params):
+    days = params.get('days', settings.ATTENDANCE_ARCHIVE_DAYS)
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        raise ValueError('days must be an integer.')
+    if days < 0:
+        raise ValueError('days must not be negative.')
+    return {'days': days}
+
+
+@job_handler('archive_attendance', validate=_validate_archive)
+def archive_old_attendance(context):
+    """
+    Move attendance older than ``days`` into the archive table.
+    """
+    moved = archive_attendance(archive_cutoff(context.params['days']))
+    return f'Archived {moved} record(s).'
+
+
+@job_handler('employee_import', requires_file=True)
+def import_employees(context):
+    """
+    Create employees from an uploaded CSV with employee_id, name, email and
+    department columns.
+
+    Rows are validated and inserted in batches; rejected rows are written to
+    the result CSV with the reason.
+    """
+    with context.open_input() as source:
+        rows = list(csv.DictReader(source))
+
+    created = 0
+    rejected = 0
+    seen_ids = set()
+    seen_emails = set()
+    with context.open_result('import-errors.csv', 'text/csv') as output:
+        writer = csv.writer(output)
+        writer.writerow(['row', 'employee_id', 'error'])
+        for batch_start in range(0, len(rows), IMPORT_BATCH_SIZE):
+            batch = rows[batch_start:batch_start + IMPORT_BATCH_SIZE]
+            ids = [Employee.normalize_employee_id(row.get('employee_id')) for row in batch]
+            emails = [Employee.normalize_email(row.get('email')) for row in batch]
+            existing_ids = {
+                Employee.normalize_employee_id(employee_id) for employee_id in
+                Employee.objects.filter(employee_id__upper__in=ids).values_list('employee_id', flat=True)
+            }
+            existing_emails = {
+                Employee.normalize_email(email) for email in
+                Employee.objects.filter(email__lower__in=emails).values_list('email', flat=True)
+            }
+
+            employees = []
+            for offset, row in enumerate(batch):
+                number = batch_start + offset + 2  # header is line 1
+                employee_id, email = ids[offset], emails[offset]
+                error = _import_row_error(
+                    row, employee_id, email,
+                    existing_ids | seen_ids, existing_emails | seen_emails
+                )
+                if error:
+                    writer.writerow([number, employee_id, error])
+                    rejected += 1
+                    continue
+                seen_ids.add(employee_id)
+                seen_emails.add(email)
+                employees.append(Employee(
+                    employee_id=employee_id,
+                    name=row['name'].strip(),
+                    email=email,
+                    department_id=Department.objects.id_for(row['department'].strip())
+                ))
+
+            Employee.objects.bulk_create(employees)
+            created += len(employees)
+            context.set_progress(
+                (batch_start + len(batch)) * 100 / len(rows),
+                f'Processed {batch_start + len(batch)} of {len(rows)} row(s).'
+            )
+
+    if not rejected:
+        os.remove(result_path(context.job))
+        Job.objects.filter(pk=context.job.pk).update(result_file='', result_content_type='')
+    return f'Imported {created} employee(s), rejected {rejected}.'
+
+
+def _import_row_error(row, employee_id, email, taken_ids, taken_emails):
+    if not employee_id or len(employee_id) > 20:
+        return 'Employee ID is required and must be at most 20 characters.'
+    if employee_id in taken_ids:
+        return f'Employee with ID {employee_id} already exists.'
+    name = (row.get('name') or '').strip()
+    if not name:
+        return 'Full name is required.'
+    if not re.match(r'^[a-zA-Z\s]+$', name) or len(name) > 100:
+        return 'Name should only contain letters and spaces.'
+    try:
+        validate_email(email)
+    except ValidationError:
+        return 'Enter a valid email address.'
+    if email in taken_emails:
+        return f'Employee with email {email} already exists.'
+    if Department.objects.id_for((row.get('department') or '').strip()) is None:
+        return 'Select a valid department.'
+    return None
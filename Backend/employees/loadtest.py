@@ -0,0 +1,233 @@
+"""
+Load-testing driver.
+
+Replays a weighted mix of realistic API scenarios (morning check-ins,
+dashboard polling, searches, history lookups) against a running server from
+a pool of worker threads and reports throughput and latency percentiles.
+"""
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from urllib.parse import urlencode, urlsplit
+
+
+SCENARIOS = {}
+
+DEFAULT_MIX = {
+    'checkin': 60,
+    'dashboard': 25,
+    'search': 10,
+    'history': 5,
+}
+
+
+def scenario(name):
+    """
+    Register a scenario under ``name``.
+
+    A scenario receives the worker's ``random.Random`` and the list of known
+    employee IDs and returns ``(method, path, body)``.
+    """
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+@scenario('checkin')
+def checkin(rng, employee_ids):
+    return 'POST', '/api/attendance/', {
+        'employee_id': rng.choice(employee_ids),
+        'date': date.today().isoformat(),
+        'status': 'Present' if rng.random() < 0.9 else 'Absent',
+    }
+
+
+@scenario('dashboard')
+def dashboard(rng, employee_ids):
+    return 'GET', '/api/attendance/statistics/', None
+
+
+@scenario('search')
+def search(rng, employee_ids):
+    term = rng.choice(employee_ids)[:-2]
+    return 'GET', '/api/employees/?' + urlencode({'q': term}), None
+
+
+@scenario('history')
+def history(rng, employee_ids):
+    query = urlencode({'employee_id': rng.choice(employee_ids)})
+    return 'GET', '/api/attendance/by_employee/?' + query, None
+
+
+@scenario('by_date')
+def by_date(rng, employee_ids):
+    return 'GET', '/api/attendance/by_date/', None
+
+
+def parse_mix(text):
+    """
+    Parse ``"checkin=60,dashboard=25"`` into a scenario weight mapping.
+    """
+    mix = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(
+                f'Unknown scenario "{name}". Available: {", ".join(sorted(SCENARIOS))}.'
+            )
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError('The scenario mix must contain at least one positive weight.')
+    return mix
+
+
+def percentile(sorted_values, pct):
+    """
+    Return the nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadResult:
+    """
+    Latencies (in milliseconds) and error counts collected during a run.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, name, latency_ms, ok):
+        with self._lock:
+            self.latencies[name].append(latency_ms)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self):
+        """
+        Return one row per scenario plus a ``total`` row.
+        """
+        rows = []
+        names = sorted(self.latencies)
+        everything = []
+        for name in names:
+            everything.extend(self.latencies[name])
+            rows.append(self._row(name, self.latencies[name], self.errors[name]))
+        rows.append(self._row('total', everything, sum(self.errors.values())))
+        return rows
+
+    def _row(self, name, latencies, errors):
+        values = sorted(latencies)
+        elapsed = self.elapsed or 1.0
+        return {
+            'scenario': name,
+            'requests': len(values),
+            'errors': errors,
+            'rps': round(len(values) / elapsed, 1),
+            'p50_ms': round(percentile(values, 50), 1),
+            'p95_ms': round(percentile(values, 95), 1),
+            'p99_ms': round(percentile(values, 99), 1),
+            'max_ms': round(values[-1], 1) if values else 0.0,
+        }
+
+
+class LoadDriver:
+    """
+    Runs scenarios from ``concurrency`` threads for ``duration`` seconds.
+
+    Each thread keeps its own keep-alive HTTP connection so the measurement
+    reflects server throughput rather than connection setup.
+    """
+
+    def __init__(self, base_url, employee_ids, mix=None, concurrency=16,
+                 duration=30.0, seed=0, timeout=30.0):
+        if not employee_ids:
+            raise ValueError('At least one employee is required to run scenarios.')
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.employee_ids = list(employee_ids)
+        self.mix = mix or DEFAULT_MIX
+        self.concurrency = concurrency
+        self.duration = duration
+        self.seed = seed
+        self.timeout = timeout
+
+    def run(self):
+        result = LoadResult()
+        deadline = time.perf_counter() + self.duration
+        threads = [
+            threading.Thread(target=self._worker, args=(index, deadline, result), daemon=True)
+            for index in range(self.concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _worker(self, index, deadline, result):
+        rng = random.Random(self.seed + index)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        connection = None
+
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, body = SCENARIOS[name](rng, self.employee_ids)
+            payload = json.dumps(body) if body is not None else None
+            headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+
+            started = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = http.client.HTTPConnection(
+                        self.host, self.port, timeout=self.timeout
+                    )
+                connection.request(method, self.prefix + path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status < 400
+                if response.getheader('Connection', '').lower() == 'close':
+                    connection.close()
+                    connection = None
+            except (OSError, http.client.HTTPException):
+                ok = False
+                if connection is not None:
+                    connection.close()
+                connection = None
+            result.record(name, (time.perf_counter() - started) * 1000.0, ok)
+
+        if connection is not None:
+            connection.close()
+
+
+def format_summary(rows):
+    """
+    Render summary rows as a fixed-width text table.
+    """
+    header = f"{'scenario':<12}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['scenario']:<12}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,59 @@
+"""
+Management command to move old attendance records into the archive table.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.archive import archive_attendance, archive_cutoff, pending_count
+
+
+class Command(BaseCommand):
+    help = 'Move attendance records older than the archive horizon into the archive table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Archive records older than this many days (defaults to ATTENDANCE_ARCHIVE_DAYS).'
+        )
+        parser.add_argument(
+            '--before',
+            default=None,
+            help='Archive records dated before YYYY-MM-DD (overrides --days).'
+        )
+        parser.add_argument(
+            '--batch-days',
+            type=int,
+            default=31,
+            help='Number of days moved per transaction.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many records would be archived.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_days'] < 1:
+            raise CommandError('--batch-days must be at least 1.')
+
+        cutoff = archive_cutoff(days=options['days'])
+        if options['before']:
+            try:
+                requested = date.fromisoformat(options['before'])
+            except ValueError:
+                raise CommandError('--before must be a date in YYYY-MM-DD format.')
+            cutoff = min(requested, archive_cutoff(days=0))
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'{pending_count(cutoff)} record(s) dated before {cutoff} would be archived.'
+            )
+            return
+
+        moved = archive_attendance(cutoff, batch_days=options['batch_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {moved} record(s) dated before {cutoff}.'
+        ))
@@ -0,0 +1,126 @@
+"""
+Management command that prints absence analytics or benchmarks the engines.
+
+Usage:
+    python manage.py attendance_analytics absence_streaks --start 2024-01-01 --end 2024-03-31
+    python manage.py attendance_analytics trending_down --department Engineering --json
+    python manage.py attendance_analytics --benchmark --employees 5000 --days 365
+"""
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from employees import analytics
+from employees.models import Department
+
+
+BENCHMARKS = (
+    ('absence_streaks', analytics.longest_absence_streaks),
+    ('rolling_rates', analytics.rolling_rates),
+    ('weekday_skew', analytics.weekday_skew),
+    ('trending_down', analytics.attendance_trends),
+)
+
+
+class Command(BaseCommand):
+    help = 'Print absence analytics for a date range, or benchmark the NumPy and pure-Python engines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('metric', nargs='?', choices=analytics.METRICS, help='Metric to report.')
+        parser.add_argument('--start', default=None, help='First day, YYYY-MM-DD (default: 90 days before --end).')
+        parser.add_argument('--end', default=None, help='Last day, YYYY-MM-DD (default: today).')
+        parser.add_argument('--department', default=None, help='Only employees of this department.')
+        parser.add_argument('--limit', type=int, default=20, help='Employees to report.')
+        parser.add_argument('--window', type=int, default=30, help='Rolling window in days.')
+        parser.add_argument(
+            '--engine',
+            choices=('numpy', 'python'),
+            default=None,
+            help='Force an engine (default: NumPy when installed).'
+        )
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+        parser.add_argument(
+            '--benchmark',
+            action='store_true',
+            help='Time every metric with each available engine instead of reporting.'
+        )
+        parser.add_argument(
+            '--employees',
+            type=int,
+            default=None,
+            help='With --benchmark: use this many synthetic employees instead of the database.'
+        )
+        parser.add_argument('--days', type=int, default=365, help='With --employees: synthetic days per employee.')
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            self._benchmark(options)
+            return
+        if not options['metric']:
+            raise CommandError('Give a metric or --benchmark.')
+        try:
+            analytics.use_numpy(options['engine'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        data = self._load(options)
+        result = analytics.report(
+            data, options['metric'], limit=options['limit'], window=options['window'], engine=options['engine']
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(result, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write(f'{options["metric"]} from {data.start} to {data.end} ({len(data)} records)')
+        if 'series' in result:
+            self.stdout.write(f'Organisation-wide {result["window"]}-day rate: {result["series"][-1]["rate"]}')
+        for row in result.get('employees', result.get('lowest', [])):
+            values = ', '.join(
+                f'{key}={value}' for key, value in row.items() if key not in ('employee_id', 'name')
+            )
+            self.stdout.write(f'  {row["employee_id"]}  {row["name"]}  {values}')
+
+    def _load(self, options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError:
+            raise CommandError('--start and --end must be dates in YYYY-MM-DD format.')
+        start, end = analytics.default_range(start, end)
+        if end < start:
+            raise CommandError('--end must not be before --start.')
+
+        department_id = None
+        if options['department']:
+            department_id = Department.objects.id_for(options['department'])
+            if department_id is None:
+                raise CommandError(f'Unknown department: {options["department"]}.')
+        return analytics.load(start, end, department_id=department_id)
+
+    def _benchmark(self, options):
+        started = time.perf_counter()
+        if options['employees']:
+            if options['employees'] < 1 or options['days'] < 1:
+                raise CommandError('--employees and --days must be at least 1.')
+            data = analytics.synthetic(options['employees'], options['days'])
+            source = 'synthetic'
+        else:
+            data = self._load(options)
+            source = 'loaded'
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{len(data)} records {source} in {elapsed:.3f}s')
+
+        engines = ['python'] if analytics.np is None else ['numpy', 'python']
+        if analytics.np is None:
+            self.stdout.write('NumPy is not installed; timing the pure-Python engine only.')
+        self.stdout.write(f'{"metric":<18}' + ''.join(f'{engine:>12}' for engine in engines))
+        for name, func in BENCHMARKS:
+            timings = []
+            for engine in engines:
+                started = time.perf_counter()
+                func(data, engine=engine)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(f'{name:<18}' + ''.join(f'{seconds:>11.3f}s' for seconds in timings))
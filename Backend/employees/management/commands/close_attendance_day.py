@@ -0,0 +1,75 @@
+"""
+Management command that closes attendance days: every employee without a
+record on a working day is marked Absent with one INSERT ... SELECT per day,
+and their attendance counters are adjusted.
+
+Run it at the end of each day (e.g. from cron at 23:55), or with --start and
+--end to backfill. It is idempotent: days that are already closed insert
+nothing. Days off in the WorkCalendar are skipped unless
+--include-non-working is given.
+
+Usage:
+    python manage.py close_attendance_day
+    python manage.py close_attendance_day --date 2024-03-15
+    python manage.py close_attendance_day --start 2024-01-01 --end 2024-03-31 --dry-run
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.upsert import close_days
+
+
+class Command(BaseCommand):
+    help = 'Mark employees without a record as Absent for a day or a range of days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', default=None, help='Day to close, YYYY-MM-DD (default: today).')
+        parser.add_argument('--start', default=None, help='First day of a backfill, YYYY-MM-DD.')
+        parser.add_argument('--end', default=None, help='Last day of a backfill, YYYY-MM-DD (default: today).')
+        parser.add_argument(
+            '--include-non-working',
+            action='store_true',
+            help='Also close weekends and holidays.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many employees would be marked.'
+        )
+
+    def handle(self, *args, **options):
+        today = date.today()
+        if options['date'] and (options['start'] or options['end']):
+            raise CommandError('Use either --date or --start/--end.')
+        if options['start']:
+            start = self._date(options['start'], '--start')
+            end = self._date(options['end'], '--end') if options['end'] else today
+        elif options['end']:
+            raise CommandError('--end requires --start.')
+        else:
+            start = end = self._date(options['date'], '--date') if options['date'] else today
+        if end < start:
+            raise CommandError('--end must not be before --start.')
+        if end > today:
+            raise CommandError('Cannot close days in the future.')
+
+        closed = close_days(
+            start, end,
+            include_non_working=options['include_non_working'],
+            dry_run=options['dry_run']
+        )
+        verb = 'Would mark' if options['dry_run'] else 'Marked'
+        for day, marked in closed.items():
+            if marked:
+                self.stdout.write(f'  {day}: {marked}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {sum(closed.values())} absence(s) across {len(closed)} day(s).'
+        ))
+
+    @staticmethod
+    def _date(value, name):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'{name} must be a date in YYYY-MM-DD format.')
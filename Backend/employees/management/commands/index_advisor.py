@@ -0,0 +1,90 @@
+"""
+Management command that explains the API's representative queries and
+reviews the indexes behind them.
+
+It prints each query's plan (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on
+PostgreSQL), flags full table scans and sorts without an index, and lists
+indexes that are unused or covered by another index. --snapshot stores the
+plans under employees/query_plans/<vendor>.json; --check fails when a plan
+regresses against that snapshot.
+
+Usage:
+    python manage.py index_advisor
+    python manage.py index_advisor --snapshot
+    python manage.py index_advisor --check
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from employees import queryplans
+
+
+class Command(BaseCommand):
+    help = 'Explain representative queries, flag scans and unused or redundant indexes, and check plan snapshots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to explain against.')
+        parser.add_argument(
+            '--snapshot',
+            action='store_true',
+            help='Store the current plans as the snapshot for this database vendor.'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail if a plan regressed against the stored snapshot.'
+        )
+        parser.add_argument(
+            '--real-costs',
+            action='store_true',
+            help='On PostgreSQL, keep sequential scans enabled (use on production-sized data).'
+        )
+        parser.add_argument('--plans', action='store_true', help='Print every plan, not only flagged ones.')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        vendor = connections[using].vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Unsupported database vendor: {vendor}.')
+
+        results = queryplans.analyze(using=using, real_costs=options['real_costs'])
+
+        if options['check']:
+            self._check(results, vendor)
+            return
+        if options['snapshot']:
+            path = queryplans.write_snapshot(results, vendor)
+            self.stdout.write(self.style.SUCCESS(f'Stored {len(results)} plan(s) in {path}.'))
+            return
+
+        for name, result in results.items():
+            if not result['flags'] and not options['plans']:
+                continue
+            self.stdout.write(f'{name}  ({result["endpoint"]})')
+            for line in result['plan']:
+                self.stdout.write(f'    {line}')
+            for flag in result['flags']:
+                self.stdout.write(self.style.WARNING(f'  ! {flag}'))
+        flagged = sum(1 for result in results.values() if result['flags'])
+        self.stdout.write(f'{len(results)} representative queries, {flagged} flagged.')
+
+        unused, redundant = queryplans.index_report(results, using=using)
+        for title, rows in (('Redundant indexes', redundant), ('Unused indexes', unused)):
+            self.stdout.write(f'{title}: {len(rows)}')
+            for table, index, reason in rows:
+                self.stdout.write(f'  {table}.{index}: {reason}')
+
+    def _check(self, results, vendor):
+        try:
+            regressions, changes = queryplans.compare(results, vendor)
+        except FileNotFoundError:
+            raise CommandError(
+                f'No plan snapshot for {vendor}; create one with "python manage.py index_advisor --snapshot".'
+            )
+        for change in changes:
+            self.stdout.write(f'  {change}')
+        if regressions:
+            raise CommandError('Query plans regressed:\n' + '\n'.join(f'  {line}' for line in regressions))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(results)} plan(s) match the {vendor} snapshot ({len(changes)} non-regressing change(s)).'
+        ))
@@ -0,0 +1,186 @@
+"""
+Management command to load test the API.
+
+By default it creates a scratch database, seeds it, starts the app locally
+(gunicorn when installed, otherwise runserver) and replays a scenario mix
+against it. Pass --url to target an already running server instead.
+"""
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.loadtest import DEFAULT_MIX, LoadDriver, format_summary, parse_mix
+
+
+class Command(BaseCommand):
+    help = 'Measure API throughput and latency percentiles under a realistic request mix.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=None, help='Base URL of a running server (skips local setup).')
+        parser.add_argument('--employees', type=int, default=1000, help='Employees to seed locally.')
+        parser.add_argument('--history-days', type=int, default=20, help='Weekdays of history to seed per employee.')
+        parser.add_argument('--concurrency', type=int, default=16, help='Number of concurrent clients.')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run.')
+        parser.add_argument(
+            '--mix',
+            default=','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()),
+            help='Scenario weights, e.g. "checkin=80,dashboard=20".'
+        )
+        parser.add_argument(
+            '--server',
+            choices=['auto', 'gunicorn', 'runserver'],
+            default='auto',
+            help='Server used for the local stand-in.'
+        )
+        parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes.')
+        parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker.')
+        parser.add_argument(
+            '--database',
+            default=None,
+            help='Scratch PostgreSQL database name (required when DB_ENGINE=postgresql).'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for scenarios.')
+        parser.add_argument('--json', dest='json_path', default=None, help='Also write the summary as JSON.')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['url']:
+            base_url = options['url'].rstrip('/')
+            employee_ids = self._fetch_employee_ids(base_url)
+            result = self._drive(base_url, employee_ids, mix, options)
+        else:
+            result = self._run_locally(mix, options)
+
+        rows = result.summary()
+        self.stdout.write(format_summary(rows))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as handle:
+                json.dump(rows, handle, indent=2)
+
+    def _drive(self, base_url, employee_ids, mix, options):
+        self.stdout.write(
+            f"Running {options['concurrency']} client(s) for {options['duration']}s against {base_url} ..."
+        )
+        driver = LoadDriver(
+            base_url,
+            employee_ids,
+            mix=mix,
+            concurrency=options['concurrency'],
+            duration=options['duration'],
+            seed=options['seed'],
+        )
+        return driver.run()
+
+    def _run_locally(self, mix, options):
+        workdir = tempfile.mkdtemp(prefix='hrm-loadtest-')
+        env = dict(os.environ, DEBUG='False', PYTHONUNBUFFERED='1')
+        if settings.DATABASES['default']['ENGINE'].endswith('postgresql'):
+            if not options['database']:
+                raise CommandError('--database is required with PostgreSQL; it must name an empty scratch database.')
+            env['DB_NAME'] = options['database']
+        else:
+            env['SQLITE_PATH'] = os.path.join(workdir, 'loadtest.sqlite3')
+
+        server = None
+        try:
+            self._manage(env, 'migrate', '--noinput', '-v', '0')
+            self._manage(
+                env, 'seed_employees',
+                '--employees', str(options['employees']),
+                '--days', str(options['history_days']),
+                '--prefix', 'LT',
+            )
+            port = self._free_port()
+            server = self._start_server(env, port, options)
+            base_url = f'http://127.0.0.1:{port}'
+            self._wait_until_ready(base_url, server)
+
+            width = max(5, len(str(options['employees'])))
+            employee_ids = [f'LT{number:0{width}d}' for number in range(1, options['employees'] + 1)]
+            return self._drive(base_url, employee_ids, mix, options)
+        finally:
+            if server is not None:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _manage(self, env, *args):
+        completed = subprocess.run(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), *args],
+            env=env,
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f'manage.py {args[0]} failed:\n{completed.stdout}')
+
+    def _start_server(self, env, port, options):
+        use_gunicorn = options['server'] == 'gunicorn'
+        if options['server'] == 'auto':
+            use_gunicorn = shutil.which('gunicorn') is not None
+
+        if use_gunicorn:
+            command = [
+                'gunicorn', 'hrm_backend.wsgi:application',
+                '--bind', f'127.0.0.1:{port}',
+                '--workers', str(options['workers']),
+                '--threads', str(options['threads']),
+                '--log-level', 'warning',
+            ]
+        else:
+            command = [
+                sys.executable, str(settings.BASE_DIR / 'manage.py'),
+                'runserver', f'127.0.0.1:{port}', '--noreload',
+            ]
+        self.stdout.write(f'Starting local server: {" ".join(command)}')
+        return subprocess.Popen(
+            command,
+            env=env,
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def _wait_until_ready(self, base_url, server, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('The local server exited during startup.')
+            try:
+                urllib.request.urlopen(f'{base_url}/api/attendance/statistics/', timeout=2).read()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError('The local server did not become ready in time.')
+
+    def _fetch_employee_ids(self, base_url):
+        with urllib.request.urlopen(f'{base_url}/api/employees/', timeout=30) as response:
+            payload = json.load(response)
+        employee_ids = [employee['employee_id'] for employee in payload.get('data', [])]
+        if not employee_ids:
+            raise CommandError('The target server has no employees to run scenarios against.')
+        return employee_ids
+
+    @staticmethod
+    def _free_port():
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
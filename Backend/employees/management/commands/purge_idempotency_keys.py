@@ -0,0 +1,26 @@
+"""
+Management command to delete expired Idempotency-Key responses.
+
+Usage:
+    python manage.py purge_idempotency_keys
+    python manage.py purge_idempotency_keys --ttl 3600
+"""
+from django.core.management.base import BaseCommand
+
+from employees.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete stored Idempotency-Key responses older than the TTL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ttl',
+            type=int,
+            default=None,
+            help='Age in seconds after which keys are deleted (default: IDEMPOTENCY_KEY_TTL).'
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(options['ttl'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} expired idempotency key(s).'))
@@ -0,0 +1,45 @@
+"""
+Management command to verify and rebuild the denormalized attendance counters.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from employees import counters
+from employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'Compare per-employee attendance counters with the records and rebuild them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'employee_ids',
+            nargs='*',
+            help='Only rebuild these employees (by employee_id).'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report mismatches; exit with an error if any are found.'
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = counters.find_mismatches()
+            for pk, (stored, actual) in sorted(mismatches.items()):
+                self.stdout.write(f'Employee {pk}: stored {stored}, actual {actual}')
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} counter(s) out of date.')
+            self.stdout.write(self.style.SUCCESS('All attendance counters are up to date.'))
+            return
+
+        if options['employee_ids']:
+            pks = list(
+                Employee.objects.filter(employee_id__upper__in=[
+                    Employee.normalize_employee_id(employee_id) for employee_id in options['employee_ids']
+                ])
+                .values_list('pk', flat=True)
+            )
+            written = counters.rebuild(pks)
+        else:
+            written = counters.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} attendance counter(s).'))
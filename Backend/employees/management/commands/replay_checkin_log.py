@@ -0,0 +1,27 @@
+"""
+Management command to apply write-behind check-ins left in local logs by a
+process that stopped before flushing them.
+
+Usage:
+    python manage.py replay_checkin_log
+    python manage.py replay_checkin_log --dir /var/lib/hrm/ingest_logs
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from employees.ingest import replay_logs
+
+
+class Command(BaseCommand):
+    help = 'Replay unflushed write-behind attendance marks from the ingest logs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            default=settings.ATTENDANCE_INGEST_DIR,
+            help='Directory holding the ingest logs (default: ATTENDANCE_INGEST_DIR).'
+        )
+
+    def handle(self, *args, **options):
+        written = replay_logs(options['dir'])
+        self.stdout.write(self.style.SUCCESS(f'Replayed {written} attendance mark(s).'))
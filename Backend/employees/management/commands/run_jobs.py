@@ -0,0 +1,144 @@
+"""
+Management command that runs queued background jobs.
+
+SQLite allows one writer at a time, so on SQLite a worker runs one job at a
+time whatever --concurrency says (in either pool): concurrent jobs would fail
+with "database is locked". The worker keeps sending heartbeats while the job
+runs. Use PostgreSQL to run jobs in parallel.
+
+Usage:
+    python manage.py run_jobs
+    python manage.py run_jobs --concurrency 4 --pool process
+    python manage.py run_jobs --once
+"""
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from employees import jobs
+from employees.models import Job
+
+
+def _run_job(job_id):
+    """
+    Execute one job in a pool worker, then release that worker's connections.
+    """
+    try:
+        return job_id, jobs.execute(job_id)
+    finally:
+        connections.close_all()
+
+
+def _init_process():
+    # Needed when the pool uses the spawn start method; a no-op after fork.
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Claim and run queued background jobs from a thread or process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.JOB_WORKER_CONCURRENCY,
+            help='Number of jobs to run at once (default: JOB_WORKER_CONCURRENCY).'
+        )
+        parser.add_argument(
+            '--pool',
+            choices=['thread', 'process'],
+            default='thread',
+            help='Run jobs in threads (default) or separate processes for CPU-bound work.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Seconds to wait between polls of an empty queue.'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=settings.JOB_STALE_SECONDS,
+            help='Requeue running jobs without a heartbeat for this many seconds.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling forever.'
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError('--concurrency must be at least 1.')
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        process_pool = options['pool'] == 'process'
+        if connection.vendor == 'sqlite' and concurrency > 1:
+            self.stdout.write('SQLite allows one writer at a time; running jobs one at a time.')
+            concurrency = 1
+
+        if process_pool:
+            executor = ProcessPoolExecutor(max_workers=concurrency, initializer=_init_process)
+        else:
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job')
+
+        self.stdout.write(f'Worker {worker} running up to {concurrency} job(s) in a {options["pool"]} pool.')
+        active = {}
+        try:
+            with executor:
+                while True:
+                    try:
+                        requeued = jobs.requeue_stale(options['stale_after'])
+                        jobs.heartbeat(active.values())
+                    except OperationalError as e:
+                        # SQLite: the running job holds the write lock; try
+                        # again on the next poll, well before going stale.
+                        self.stderr.write(f'Skipped heartbeat: {e}')
+                        requeued = 0
+                    if requeued:
+                        self.stdout.write(f'Requeued {requeued} stale job(s).')
+
+                    while len(active) < concurrency:
+                        job_id = jobs.claim_next(worker)
+                        if job_id is None:
+                            break
+                        if process_pool:
+                            # Forked children must not share the parent's sockets.
+                            connections.close_all()
+                        active[executor.submit(_run_job, job_id)] = job_id
+
+                    if not active:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, _ = wait(active, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job_id = active.pop(future)
+                        self._report(job_id, future)
+        except KeyboardInterrupt:
+            self.stdout.write('Interrupted; waiting for running jobs to finish.')
+            for future in list(active):
+                self._report(active.pop(future), future)
+
+    def _report(self, job_id, future):
+        try:
+            _, final_status = future.result()
+        except Exception as e:
+            # The worker itself died (e.g. a killed process); the job is
+            # requeued once its heartbeat goes stale.
+            self.stderr.write(f'Job {job_id} crashed: {e}')
+            return
+        job = Job.objects.only('kind', 'message', 'error').get(pk=job_id)
+        if final_status == Job.SUCCEEDED:
+            self.stdout.write(self.style.SUCCESS(f'Job {job_id} ({job.kind}) succeeded: {job.message}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Job {job_id} ({job.kind}) failed: {job.error}'))
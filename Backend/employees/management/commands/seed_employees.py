@@ -0,0 +1,87 @@
+"""
+Management command to seed employees and attendance history for demos and load tests.
+"""
+import random
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.models import Department, Employee, Attendance
+
+
+FIRST_NAMES = [
+    'Aarav', 'Ananya', 'Carlos', 'Chen', 'Fatima', 'Hana', 'Ivan', 'Kofi',
+    'Leila', 'Maria', 'Noah', 'Olivia', 'Priya', 'Rahul', 'Sofia', 'Yuki',
+]
+LAST_NAMES = [
+    'Ahmed', 'Brown', 'Garcia', 'Kim', 'Kumar', 'Lopez', 'Mensah', 'Nguyen',
+    'Patel', 'Rossi', 'Sato', 'Silva', 'Singh', 'Smith', 'Wang', 'Zhang',
+]
+
+
+class Command(BaseCommand):
+    help = 'Seed employees (and optionally weekday attendance history) with bulk inserts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1000, help='Number of employees to create.')
+        parser.add_argument('--days', type=int, default=0, help='Weekdays of attendance history to create per employee.')
+        parser.add_argument('--prefix', default='EMP', help='Prefix for generated employee IDs.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT.')
+
+    def handle(self, *args, **options):
+        count = options['employees']
+        prefix = options['prefix']
+        if count < 1:
+            raise CommandError('--employees must be at least 1.')
+        if Employee.objects.filter(employee_id__startswith=prefix).exists():
+            raise CommandError(f'Employees with prefix "{prefix}" already exist; choose another --prefix.')
+
+        rng = random.Random(options['seed'])
+        departments = list(Department.objects.values_list('id', flat=True))
+        width = max(5, len(str(count)))
+
+        employees = []
+        for number in range(1, count + 1):
+            employee_id = f'{prefix}{number:0{width}d}'
+            employees.append(Employee(
+                employee_id=employee_id,
+                name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                email=f'{employee_id.lower()}@example.com',
+                department_id=rng.choice(departments),
+            ))
+        Employee.objects.bulk_create(employees, batch_size=options['batch_size'])
+        self.stdout.write(f'Created {count} employee(s).')
+
+        if options['days'] > 0:
+            created = self._seed_attendance(prefix, options['days'], rng, options['batch_size'])
+            self.stdout.write(f'Created {created} attendance record(s).')
+
+    def _seed_attendance(self, prefix, days, rng, batch_size):
+        weekdays = []
+        day = date.today()
+        while len(weekdays) < days:
+            if day.weekday() < 5:
+                weekdays.append(day)
+            day -= timedelta(days=1)
+
+        pks = list(
+            Employee.objects.filter(employee_id__startswith=prefix).values_list('pk', flat=True)
+        )
+        created = 0
+        batch = []
+        for pk in pks:
+            for day in weekdays:
+                batch.append(Attendance(
+                    employee_id=pk,
+                    date=day,
+                    status='Present' if rng.random() < 0.92 else 'Absent',
+                ))
+                if len(batch) >= batch_size:
+                    Attendance.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+        if batch:
+            Attendance.objects.bulk_create(batch)
+            created += len(batch)
+        return created
@@ -0,0 +1,204 @@
+"""
+Management command that stress tests concurrent attendance marking.
+
+Many threads mark the same employees and dates at once, first through
+``update_or_create`` (the previous implementation) and then through the
+single-statement upsert, and the command reports throughput, errors and
+whether the resulting rows and counters are correct.
+
+By default it runs against a scratch SQLite database; with
+DB_ENGINE=postgresql pass --database naming an empty scratch database.
+
+Usage:
+    python manage.py stress_attendance --threads 16 --employees 50 --days 5
+"""
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from employees import counters
+from employees.models import Attendance, Department, Employee
+from employees.upsert import upsert_attendance
+
+
+def mark_with_update_or_create(employee, day, record_status):
+    Attendance.objects.update_or_create(
+        employee=employee, date=day, defaults={'status': record_status}
+    )
+
+
+def mark_with_upsert(employee, day, record_status):
+    upsert_attendance(employee, day, record_status)
+
+
+STRATEGIES = {
+    'update_or_create': mark_with_update_or_create,
+    'upsert': mark_with_upsert,
+}
+
+
+class Command(BaseCommand):
+    help = 'Mark the same attendance from many threads and compare update_or_create with the upsert.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent writer threads.')
+        parser.add_argument('--employees', type=int, default=50, help='Employees to mark.')
+        parser.add_argument('--days', type=int, default=5, help='Days to mark per employee.')
+        parser.add_argument('--rounds', type=int, default=2, help='Times each thread marks every employee and day.')
+        parser.add_argument(
+            '--strategy',
+            action='append',
+            choices=sorted(STRATEGIES),
+            help='Strategy to run (repeatable; default: all).'
+        )
+        parser.add_argument(
+            '--database',
+            default=None,
+            help='Scratch PostgreSQL database name (required when DB_ENGINE=postgresql).'
+        )
+        parser.add_argument(
+            '--in-place',
+            action='store_true',
+            help='Run against the configured database instead of a scratch one.'
+        )
+
+    def handle(self, *args, **options):
+        if options['in_place']:
+            results = self._run_in_place(options)
+            if any(row['strategy'] == 'upsert' and not row['correct'] for row in results):
+                raise CommandError('The upsert produced errors or incorrect results.')
+            return
+        self._run_in_scratch_database(options)
+
+    def _run_in_scratch_database(self, options):
+        workdir = tempfile.mkdtemp(prefix='hrm-stress-')
+        env = dict(os.environ, PYTHONUNBUFFERED='1')
+        if settings.DATABASES['default']['ENGINE'].endswith('postgresql'):
+            if not options['database']:
+                raise CommandError('--database is required with PostgreSQL; it must name an empty scratch database.')
+            env['DB_NAME'] = options['database']
+        else:
+            env['SQLITE_PATH'] = os.path.join(workdir, 'stress.sqlite3')
+
+        args = [
+            '--in-place',
+            '--threads', str(options['threads']),
+            '--employees', str(options['employees']),
+            '--days', str(options['days']),
+            '--rounds', str(options['rounds']),
+        ]
+        for strategy in options['strategy'] or []:
+            args.extend(['--strategy', strategy])
+        try:
+            self._manage(env, 'migrate', '--noinput', '-v', '0')
+            output = self._manage(env, 'stress_attendance', *args)
+            self.stdout.write(output)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _manage(self, env, *args):
+        completed = subprocess.run(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), *args],
+            env=env,
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f'manage.py {args[0]} failed:\n{completed.stdout}')
+        return completed.stdout
+
+    def _run_in_place(self, options):
+        employees = self._seed(options['employees'])
+        pks = [employee.pk for employee in employees]
+        today = date.today()
+        pairs = [
+            (employee, today - timedelta(days=offset))
+            for employee in employees
+            for offset in range(options['days'])
+        ]
+
+        results = []
+        for name in options['strategy'] or list(STRATEGIES):
+            Attendance.objects.filter(employee_id__in=pks).delete()
+            counters.rebuild(pks)
+            results.append(self._stress(name, STRATEGIES[name], pairs, pks, options))
+
+        self.stdout.write(
+            f"{'strategy':<18}{'marks':>8}{'errors':>8}{'ok/s':>10}{'rows ok':>9}{'counters ok':>13}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['strategy']:<18}{row['marks']:>8}{row['errors']:>8}{row['rate']:>10}"
+                f"{str(row['rows_ok']):>9}{str(row['counters_ok']):>13}"
+            )
+        return results
+
+    def _seed(self, count):
+        department_id = Department.objects.id_for('Engineering') or Department.objects.values_list('pk', flat=True)[0]
+        Employee.objects.bulk_create(
+            [
+                Employee(
+                    employee_id=f'ST{number:05d}',
+                    name='Stress Test',
+                    email=f'stress{number}@example.com',
+                    department_id=department_id,
+                )
+                for number in range(1, count + 1)
+            ],
+            ignore_conflicts=True,
+        )
+        return list(Employee.objects.filter(employee_id__startswith='ST').order_by('pk')[:count])
+
+    def _stress(self, name, mark, pairs, pks, options):
+        errors = [0] * options['threads']
+        barrier = threading.Barrier(options['threads'] + 1)
+
+        def worker(index):
+            rng = random.Random(index)
+            work = [pair for _ in range(options['rounds']) for pair in pairs]
+            rng.shuffle(work)
+            barrier.wait()
+            try:
+                for employee, day in work:
+                    try:
+                        mark(employee, day, rng.choice(('Present', 'Absent')))
+                    except Exception:
+                        errors[index] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        marks = len(pairs) * options['rounds'] * options['threads']
+        rows_ok = Attendance.objects.filter(employee_id__in=pks).count() == len(pairs)
+        mismatches = counters.find_mismatches()
+        counters_ok = not any(pk in mismatches for pk in pks)
+        return {
+            'strategy': name,
+            'marks': marks,
+            'errors': sum(errors),
+            # Successful marks per second
+            'rate': round((marks - sum(errors)) / elapsed, 1) if elapsed else 0.0,
+            'rows_ok': rows_ok,
+            'counters_ok': counters_ok,
+            'correct': rows_ok and counters_ok and not sum(errors),
+        }
@@ -0,0 +1,146 @@
+"""
+Attendance matrix (employees x days).
+
+A block of employees is loaded with one ordered ``values_list`` scan of the
+attendance table (plus the archive for older ranges) into a compact grid of
+status codes: a NumPy ``uint8`` array when NumPy is installed, otherwise a
+``bytearray``. Code 0 means "not marked"; other codes are
+``Attendance.STATUS_CODES``.
+"""
+from datetime import timedelta
+
+from .archive import may_be_archived
+from .models import Attendance, AttendanceArchive, Department, Employee
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+
+NOT_MARKED = 0
+
+
+class AttendanceMatrix:
+    """
+    Status codes for ``employees`` (rows) over ``days`` (columns).
+    """
+
+    def __init__(self, start, end, employees, grid):
+        self.start = start
+        self.end = end
+        self.days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        self.employees = employees
+        self.grid = grid
+
+    def __len__(self):
+        return len(self.employees)
+
+    def row(self, index):
+        """
+        Return the status codes of one employee as a list of ints.
+        """
+        width = len(self.days)
+        if np is not None and isinstance(self.grid, np.ndarray):
+            return self.grid[index].tolist()
+        return list(self.grid[index * width:(index + 1) * width])
+
+    def rows(self):
+        if np is not None and isinstance(self.grid, np.ndarray):
+            return self.grid.tolist()
+        return [self.row(index) for index in range(len(self.employees))]
+
+    def totals(self):
+        """
+        Return ``{label: [count per employee]}`` for every status.
+        """
+        if np is not None and isinstance(self.grid, np.ndarray):
+            return {
+                label: (self.grid == code).sum(axis=1).tolist()
+                for label, code in Attendance.STATUS_CODES.items()
+            }
+        rows = self.rows()
+        return {
+            label: [row.count(code) for row in rows]
+            for label, code in Attendance.STATUS_CODES.items()
+        }
+
+    def as_columns(self):
+        """
+        Return the matrix as a columnar, JSON-friendly dict.
+        """
+        return {
+            'start': self.start,
+            'end': self.end,
+            'days': self.days,
+            'codes': {str(code): label for label, code in Attendance.STATUS_CODES.items()},
+            'employee_id': [employee[1] for employee in self.employees],
+            'name': [employee[2] for employee in self.employees],
+            'department': [Department.objects.name_for(employee[3]) for employee in self.employees],
+            'cells': self.rows(),
+            'totals': self.totals(),
+        }
+
+
+def build_matrix(start, end, department_id=None, after_pk=None, limit=1000):
+    """
+    Build the matrix for up to ``limit`` employees with a primary key above
+    ``after_pk``, ordered by primary key.
+
+    Returns ``(matrix, has_more)``.
+    """
+    employees = Employee.objects.order_by('pk')
+    if department_id is not None:
+        employees = employees.filter(department_id=department_id)
+    if after_pk is not None:
+        employees = employees.filter(pk__gt=after_pk)
+    employees = list(employees.values_list('pk', 'employee_id', 'name', 'department_id')[:limit + 1])
+    has_more = len(employees) > limit
+    employees = employees[:limit]
+
+    width = (end - start).days + 1
+    if np is not None:
+        grid = np.zeros((len(employees), width), dtype=np.uint8)
+    else:
+        grid = bytearray(len(employees) * width)
+    matrix = AttendanceMatrix(start, end, employees, grid)
+    if not employees:
+        return matrix, has_more
+
+    rows = {employee[0]: index for index, employee in enumerate(employees)}
+    # Archived records first so hot records win for the same day.
+    models = [AttendanceArchive, Attendance] if may_be_archived(start) else [Attendance]
+    for model in models:
+        _fill(matrix, model, rows, width)
+    return matrix, has_more
+
+
+def _fill(matrix, model, rows, width):
+    codes = Attendance.STATUS_CODES
+    start_ordinal = matrix.start.toordinal()
+    # Scan the block's primary-key range on the (employee, date) index; rows
+    # for employees outside the block (e.g. other departments) are skipped.
+    records = model.objects.filter(
+        employee_id__gte=matrix.employees[0][0],
+        employee_id__lte=matrix.employees[-1][0],
+        date__gte=matrix.start,
+        date__lte=matrix.end,
+    ).order_by('employee_id', 'date').values_list('employee_id', 'date', 'status')
+
+    if np is not None:
+        row_index, column_index, values = [], [], []
+        for employee_pk, day, record_status in records.iterator(chunk_size=5000):
+            row = rows.get(employee_pk)
+            if row is not None:
+                row_index.append(row)
+                column_index.append(day.toordinal() - start_ordinal)
+                values.append(codes[record_status])
+        if values:
+            matrix.grid[row_index, column_index] = values
+        return
+
+    grid = matrix.grid
+    for employee_pk, day, record_status in records.iterator(chunk_size=5000):
+        row = rows.get(employee_pk)
+        if row is not None:
+            grid[row * width + day.toordinal() - start_ordinal] = codes[record_status]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Date of attendance')),
+                ('status', models.CharField(choices=[('Present', 'Present'), ('Absent', 'Absent')], help_text='Attendance status (Present/Absent)', max_length=10)),
+                ('employee', models.ForeignKey(db_index=False, help_text='The employee this attendance record belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance_records', to='employees.employee')),
+            ],
+            options={
+                'verbose_name': 'Archived Attendance',
+                'verbose_name_plural': 'Archived Attendance Records',
+                'indexes': [models.Index(fields=['date'], name='employees_a_date_ad5110_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='attendancearchive',
+            constraint=models.UniqueConstraint(fields=('employee', 'date'), name='unique_archived_attendance'),
+        ),
+    ]
@@ -0,0 +1,138 @@
+# Normalizes Employee.department into a Department lookup table and stores
+# attendance status as a small integer code.
+
+import django.db.models.deletion
+import employees.fields
+from django.db import migrations, models
+
+
+DEFAULT_DEPARTMENTS = [
+    'Engineering',
+    'Marketing',
+    'Human Resources',
+    'Sales',
+    'Finance',
+    'Operations',
+]
+
+STATUS_CODES = {'Present': 1, 'Absent': 2}
+
+
+def seed_departments(apps, schema_editor):
+    Department = apps.get_model('employees', 'Department')
+    Employee = apps.get_model('employees', 'Employee')
+    existing = set(Employee.objects.values_list('department', flat=True).distinct())
+    for name in DEFAULT_DEPARTMENTS + sorted(existing - set(DEFAULT_DEPARTMENTS)):
+        Department.objects.get_or_create(name=name)
+
+
+def link_departments(apps, schema_editor):
+    Department = apps.get_model('employees', 'Department')
+    Employee = apps.get_model('employees', 'Employee')
+    for department in Department.objects.all():
+        Employee.objects.filter(department=department.name).update(department_ref=department)
+
+
+def encode_statuses(apps, schema_editor):
+    for model_name in ('Attendance', 'AttendanceArchive'):
+        model = apps.get_model('employees', model_name)
+        for label, code in STATUS_CODES.items():
+            model.objects.filter(status=label).update(status_code=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_attendancearchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Department name', max_length=50, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Department',
+                'verbose_name_plural': 'Departments',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(seed_departments, migrations.RunPython.noop),
+
+        # Employee.department: varchar -> smallint foreign key
+        migrations.AddField(
+            model_name='employee',
+            name='department_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='employees.department'),
+        ),
+        migrations.RunPython(link_departments, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='employees_e_departm_e28f46_idx',
+        ),
+        migrations.RemoveField(
+            model_name='employee',
+            name='department',
+        ),
+        migrations.RenameField(
+            model_name='employee',
+            old_name='department_ref',
+            new_name='department',
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='department',
+            field=models.ForeignKey(help_text='Department where the employee works', on_delete=django.db.models.deletion.PROTECT, related_name='employees', to='employees.department'),
+        ),
+
+        # Attendance.status / AttendanceArchive.status: varchar -> smallint code
+        migrations.AddField(
+            model_name='attendance',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancearchive',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(encode_statuses, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='attendance',
+            name='employees_a_status_8f0e4b_idx',
+        ),
+        migrations.RemoveField(
+            model_name='attendance',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='attendancearchive',
+            name='status',
+        ),
+        migrations.RenameField(
+            model_name='attendance',
+            old_name='status_code',
+            new_name='status',
+        ),
+        migrations.RenameField(
+            model_name='attendancearchive',
+            old_name='status_code',
+            new_name='status',
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='status',
+            field=employees.fields.CodedChoiceField(choices=[('Present', 'Present'), ('Absent', 'Absent')], codes={'Present': 1, 'Absent': 2}, help_text='Attendance status (Present/Absent)'),
+        ),
+        migrations.AlterField(
+            model_name='attendancearchive',
+            name='status',
+            field=employees.fields.CodedChoiceField(choices=[('Present', 'Present'), ('Absent', 'Absent')], codes={'Present': 1, 'Absent': 2}, help_text='Attendance status (Present/Absent)'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['status'], name='employees_a_status_8f0e4b_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    AttendanceCounter = apps.get_model('employees', 'AttendanceCounter')
+    totals = {pk: {'total': 0, 'present': 0, 'absent': 0} for pk in Employee.objects.values_list('id', flat=True)}
+    for model_name in ('Attendance', 'AttendanceArchive'):
+        model = apps.get_model('employees', model_name)
+        rows = model.objects.order_by().values('employee_id', 'status').annotate(n=Count('id'))
+        for row in rows:
+            counts = totals[row['employee_id']]
+            counts['total'] += row['n']
+            counts[row['status'].lower()] += row['n']
+    AttendanceCounter.objects.bulk_create(
+        [AttendanceCounter(employee_id=pk, **counts) for pk, counts in totals.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_department_status_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceCounter',
+            fields=[
+                ('employee', models.OneToOneField(help_text='The employee these totals belong to', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='attendance_counter', serialize=False, to='employees.employee')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Attendance Counter',
+                'verbose_name_plural': 'Attendance Counters',
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
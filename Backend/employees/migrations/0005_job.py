@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_attendancecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='Registered job handler to run', max_length=50)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Handler parameters')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Completion percentage reported by the handler')),
+                ('message', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('input_file', models.CharField(blank=True, help_text='Uploaded input, relative to JOB_RESULTS_DIR', max_length=255)),
+                ('result_file', models.CharField(blank=True, help_text='Result file, relative to JOB_RESULTS_DIR', max_length=255)),
+                ('result_content_type', models.CharField(blank=True, max_length=100)),
+                ('worker', models.CharField(blank=True, help_text='Worker that claimed the job', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='employees_j_status_0330d8_idx')],
+            },
+        ),
+    ]
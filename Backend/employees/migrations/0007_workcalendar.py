@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0006_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('is_working', models.BooleanField(default=False, help_text='Whether this date is a working day')),
+                ('name', models.CharField(blank=True, help_text='Holiday or event name', max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Work Calendar Day',
+                'verbose_name_plural': 'Work Calendar',
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_workcalendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('trigger', models.CharField(choices=[('staff', 'Staff request'), ('sampled', 'Sampled')], max_length=10)),
+                ('user', models.CharField(blank=True, max_length=150)),
+                ('duration_ms', models.FloatField(help_text='Wall time of the profiled request')),
+                ('sql_count', models.PositiveIntegerField(default=0)),
+                ('sql_ms', models.FloatField(default=0, help_text='Total time spent in SQL')),
+                ('queries', models.JSONField(blank=True, default=list, help_text='SQL, duration and originating project frames of each query')),
+                ('summary', models.TextField(blank=True, help_text='Top functions by cumulative time')),
+                ('stats_file', models.CharField(blank=True, help_text='pstats dump, relative to PROFILE_REPORTS_DIR', max_length=255)),
+                ('collapsed_file', models.CharField(blank=True, help_text='Collapsed stacks for flame graphs, relative to PROFILE_REPORTS_DIR', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Profile Report',
+                'verbose_name_plural': 'Profile Reports',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
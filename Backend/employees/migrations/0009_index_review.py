@@ -0,0 +1,61 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_profilereport'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendance',
+            name='employees_a_date_b8bb7b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='attendance',
+            name='employees_a_employe_030d17_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='attendance',
+            name='employees_a_status_8f0e4b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='employees_e_employe_514cc5_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='employees_e_email_8f5bbc_idx',
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='date',
+            field=models.DateField(help_text='Date of attendance'),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='employee',
+            field=models.ForeignKey(db_index=False, help_text='The employee this attendance record belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records', to='employees.employee'),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='department',
+            field=models.ForeignKey(db_index=False, help_text='Department where the employee works', on_delete=django.db.models.deletion.PROTECT, related_name='employees', to='employees.department'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'status'], name='employees_a_date_6df729_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['-created_at'], name='employees_e_created_9cbbc2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['department', '-created_at'], name='employees_e_departm_55a2c4_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Stores employee IDs upper case and emails lower case, and replaces their
+# case-sensitive unique indexes with unique functional indexes on UPPER() /
+# LOWER(). Existing rows that only differ by case (or surrounding spaces)
+# cannot be merged automatically, so the migration stops and lists them.
+
+import django.core.validators
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+# Collisions listed in the error before it is cut short
+MAX_REPORTED = 20
+
+
+def normalize_keys(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    rows = list(Employee.objects.order_by('pk').values_list('pk', 'employee_id', 'email').iterator())
+
+    collisions = []
+    for label, position, normalize in (
+        ('employee_id', 1, lambda value: value.strip().upper()),
+        ('email', 2, lambda value: value.strip().lower()),
+    ):
+        owners = {}
+        for row in rows:
+            owners.setdefault(normalize(row[position]), []).append(row)
+        for normalized, owned in sorted(owners.items()):
+            if len(owned) > 1:
+                values = ', '.join(f'{row[position]!r} (pk {row[0]})' for row in owned)
+                collisions.append(f'{label} {normalized!r}: {values}')
+    if collisions:
+        shown = collisions[:MAX_REPORTED]
+        if len(collisions) > MAX_REPORTED:
+            shown.append(f'... and {len(collisions) - MAX_REPORTED} more')
+        raise RuntimeError(
+            'Employees differ only by the case of their employee_id or email; rename or '
+            'merge them before migrating:\n' + '\n'.join(f'  {line}' for line in shown)
+        )
+
+    changed = [
+        Employee(pk=pk, employee_id=employee_id.strip().upper(), email=email.strip().lower())
+        for pk, employee_id, email in rows
+        if employee_id != employee_id.strip().upper() or email != email.strip().lower()
+    ]
+    Employee.objects.bulk_update(changed, ['employee_id', 'email'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0009_index_review'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='employee',
+            name='email',
+            field=models.EmailField(help_text='Email address of the employee', max_length=254, validators=[django.core.validators.EmailValidator()]),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='employee_id',
+            field=models.CharField(help_text='Unique employee identifier (e.g., EMP001)', max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('employee_id'), name='unique_employee_id_ci', violation_error_message='Employee with this ID already exists.'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='unique_employee_email_ci', violation_error_message='Employee with this email already exists.'),
+        ),
+    ]
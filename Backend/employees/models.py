@@ -1,15 +1,85 @@
 """
 Models for Employee and Attendance management.
 """
+from array import array
+from datetime import date, timedelta
+
 from django.db import models
+from django.db.models.functions import Lower, Upper
 from django.core.validators import EmailValidator
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from .fields import CodedChoiceField
+
+
+class DepartmentManager(models.Manager):
+    """
+    Manager with an in-process name <-> id map of the (small, rarely changing)
+    department lookup table. The map is reset by signals on ``Department``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._maps = None
+
+    def _load(self):
+        maps = self._maps
+        if maps is None:
+            ids_by_name = dict(self.get_queryset().values_list('name', 'id'))
+            names_by_id = {pk: name for name, pk in ids_by_name.items()}
+            maps = self._maps = (ids_by_name, names_by_id)
+        return maps
+
+    def id_for(self, name):
+        """
+        Return the id of the department called ``name``, or None.
+        """
+        return self._load()[0].get(name)
+
+    def name_for(self, pk):
+        """
+        Return the name of the department with id ``pk``, or None.
+        """
+        return self._load()[1].get(pk)
+
+    def names(self):
+        """
+        Return all department names.
+        """
+        return list(self._load()[0])
+
+    def clear_cache(self):
+        self._maps = None
+
+
+class Department(models.Model):
+    """
+    Lookup table of departments, referenced by a small-integer foreign key
+    from Employee.
+    """
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        help_text="Department name"
+    )
+
+    objects = DepartmentManager()
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Department'
+        verbose_name_plural = 'Departments'
+
+    def __str__(self):
+        return self.name
 
 
 class Employee(models.Model):
     """
     Employee model representing employees in the HRM system.
     """
+    # Default departments seeded into the Department table
     DEPARTMENT_CHOICES = [
         ('Engineering', 'Engineering'),
         ('Marketing', 'Marketing'),
@@ -22,8 +92,6 @@ class Employee(models.Model):
     # employee_id is the custom ID (e.g., EMP001)
     employee_id = models.CharField(
         max_length=20,
-        unique=True,
-        db_index=True,
         help_text="Unique employee identifier (e.g., EMP001)"
     )
     name = models.CharField(
@@ -31,13 +99,14 @@ class Employee(models.Model):
         help_text="Full name of the employee"
     )
     email = models.EmailField(
-        unique=True,
         validators=[EmailValidator()],
         help_text="Email address of the employee"
     )
-    department = models.CharField(
-        max_length=50,
-        choices=DEPARTMENT_CHOICES,
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.PROTECT,
+        related_name='employees',
+        db_index=False,
         help_text="Department where the employee works"
     )
     created_at = models.DateTimeField(auto_now_add=True)
@@ -47,15 +116,49 @@ class Employee(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Employee'
         verbose_name_plural = 'Employees'
+        # employee_id and email are unique case-insensitively, through
+        # functional indexes that lookups reach with ``employee_id__upper``
+        # and ``email__lower``; the department index also serves department
+        # lookups on its own.
+        constraints = [
+            models.UniqueConstraint(
+                Upper('employee_id'),
+                name='unique_employee_id_ci',
+                violation_error_message='Employee with this ID already exists.'
+            ),
+            models.UniqueConstraint(
+                Lower('email'),
+                name='unique_employee_email_ci',
+                violation_error_message='Employee with this email already exists.'
+            ),
+        ]
         indexes = [
-            models.Index(fields=['employee_id']),
-            models.Index(fields=['email']),
-            models.Index(fields=['department']),
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['department', '-created_at']),
         ]
 
     def __str__(self):
         return f"{self.name} ({self.employee_id})"
 
+    @staticmethod
+    def normalize_employee_id(value):
+        """
+        Return the stored form of an employee ID (trimmed, upper case).
+        """
+        return (value or '').strip().upper()
+
+    @staticmethod
+    def normalize_email(value):
+        """
+        Return the stored form of an email address (trimmed, lower case).
+        """
+        return (value or '').strip().lower()
+
+    def save(self, *args, **kwargs):
+        self.employee_id = self.normalize_employee_id(self.employee_id)
+        self.email = self.normalize_email(self.email)
+        super().save(*args, **kwargs)
+
     def clean(self):
         """
         Validate model fields.
@@ -73,23 +176,30 @@ class Employee(models.Model):
             raise ValidationError({'email': 'Email is required.'})
 
         # Validate department
-        if not self.department:
+        if not self.department_id:
             raise ValidationError({'department': 'Department is required.'})
 
         # Check for duplicate employee_id
         if self.pk is None:  # Only check on creation
-            if Employee.objects.filter(employee_id=self.employee_id).exists():
+            if Employee.objects.filter(
+                employee_id__upper=self.normalize_employee_id(self.employee_id)
+            ).exists():
                 raise ValidationError({
                     'employee_id': f'Employee with ID {self.employee_id} already exists.'
                 })
 
             # Check for duplicate email
-            if Employee.objects.filter(email=self.email).exists():
+            if Employee.objects.filter(email__lower=self.normalize_email(self.email)).exists():
                 raise ValidationError({
                     'email': f'Employee with email {self.email} already exists.'
                 })
 
 
+# Case-insensitive lookups matching the functional unique indexes above
+Employee._meta.get_field('employee_id').register_lookup(Upper)
+Employee._meta.get_field('email').register_lookup(Lower)
+
+
 class Attendance(models.Model):
     """
     Attendance model for tracking employee attendance.
@@ -98,20 +208,22 @@ class Attendance(models.Model):
         ('Present', 'Present'),
         ('Absent', 'Absent'),
     ]
+    # Small-integer codes stored in the status column
+    STATUS_CODES = {
+        'Present': 1,
+        'Absent': 2,
+    }
 
     employee = models.ForeignKey(
         Employee,
         on_delete=models.CASCADE,
         related_name='attendance_records',
+        db_index=False,
         help_text="The employee this attendance record belongs to"
     )
-    date = models.DateField(
-        db_index=True,
-        help_text="Date of attendance"
-    )
-    status = models.CharField(
-        max_length=10,
-        choices=STATUS_CHOICES,
+    date = models.DateField(help_text="Date of attendance")
+    status = CodedChoiceField(
+        codes=STATUS_CODES,
         help_text="Attendance status (Present/Absent)"
     )
     created_at = models.DateTimeField(auto_now_add=True)
@@ -121,16 +233,26 @@ class Attendance(models.Model):
         ordering = ['-date']
         verbose_name = 'Attendance'
         verbose_name_plural = 'Attendance Records'
+        # The unique (employee, date) index serves per-employee lookups;
+        # (date, status) serves date lookups and the dashboard counts.
         unique_together = ['employee', 'date']
         indexes = [
-            models.Index(fields=['date']),
-            models.Index(fields=['employee', 'date']),
-            models.Index(fields=['status']),
+            models.Index(fields=['date', 'status']),
         ]
 
     def __str__(self):
         return f"{self.employee.name} - {self.date} - {self.status}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what is stored so counter updates know what a save changed
+        instance._stored_state = (
+            instance.__dict__.get('employee_id'),
+            instance.__dict__.get('status'),
+        )
+        return instance
+
     def clean(self):
         """
         Validate model fields.
@@ -147,3 +269,313 @@ class Attendance(models.Model):
         from datetime import date as dt_date
         if self.date > dt_date.today():
             raise ValidationError({'date': 'Cannot mark attendance for future dates.'})
+
+
+class AttendanceArchive(models.Model):
+    """
+    Compact cold storage for attendance records older than the archive horizon.
+
+    Rows are moved here by the ``archive_attendance`` management command so the
+    hot ``Attendance`` table and its indexes only hold recent months.
+    """
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='archived_attendance_records',
+        db_index=False,
+        help_text="The employee this attendance record belongs to"
+    )
+    date = models.DateField(help_text="Date of attendance")
+    status = CodedChoiceField(
+        codes=Attendance.STATUS_CODES,
+        help_text="Attendance status (Present/Absent)"
+    )
+
+    class Meta:
+        verbose_name = 'Archived Attendance'
+        verbose_name_plural = 'Archived Attendance Records'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['employee', 'date'],
+                name='unique_archived_attendance'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.date} - {self.status} (archived)"
+
+
+class AttendanceCounter(models.Model):
+    """
+    Denormalized per-employee attendance totals (hot and archived records).
+
+    Kept in step with attendance writes using F() expressions so history
+    headers never have to count an employee's full history. Rebuild with
+    ``python manage.py reconcile_attendance_counters``.
+    """
+    employee = models.OneToOneField(
+        Employee,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='attendance_counter',
+        help_text="The employee these totals belong to"
+    )
+    total = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Attendance Counter'
+        verbose_name_plural = 'Attendance Counters'
+
+    def __str__(self):
+        return f"{self.employee_id}: {self.present}/{self.total} present"
+
+
+class Job(models.Model):
+    """
+    A unit of background work (export, import, rebuild) queued through the API
+    and executed by the ``run_jobs`` worker command, outside the request cycle.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(
+        max_length=50,
+        help_text="Registered job handler to run"
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Handler parameters"
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED
+    )
+    progress = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Completion percentage reported by the handler"
+    )
+    message = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    input_file = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Uploaded input, relative to JOB_RESULTS_DIR"
+    )
+    result_file = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Result file, relative to JOB_RESULTS_DIR"
+    )
+    result_content_type = models.CharField(max_length=100, blank=True)
+    worker = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Worker that claimed the job"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response for a write sent with an ``Idempotency-Key`` header.
+
+    A retry with the same key and scope replays the stored response instead
+    of running the write again. Rows expire after ``IDEMPOTENCY_KEY_TTL``
+    seconds and are removed by ``python manage.py purge_idempotency_keys``.
+    """
+    key = models.CharField(max_length=255)
+    scope = models.CharField(
+        max_length=100,
+        help_text="HTTP method and path the key was used for"
+    )
+    request_hash = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the request body"
+    )
+    status_code = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Empty while the original request is still running"
+    )
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key', 'scope'],
+                name='unique_idempotency_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key}"
+
+
+class WorkCalendarManager(models.Manager):
+    """
+    Manager with an in-process prefix-count array of working days per year,
+    so the working days in any range are a couple of array lookups. Arrays
+    are built on first use of a year and reset by signals on ``WorkCalendar``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._years = {}
+
+    def _prefix(self, year):
+        """
+        Return ``prefix`` where ``prefix[n]`` is the number of working days
+        among the first ``n`` days of ``year``.
+        """
+        prefix = self._years.get(year)
+        if prefix is None:
+            first = date(year, 1, 1)
+            length = (date(year + 1, 1, 1) - first).days
+            working = bytearray(
+                (first + timedelta(days=offset)).weekday() not in WorkCalendar.WEEKEND
+                for offset in range(length)
+            )
+            exceptions = self.get_queryset().filter(
+                date__gte=first, date__lt=date(year + 1, 1, 1)
+            ).values_list('date', 'is_working')
+            for day, is_working in exceptions:
+                working[(day - first).days] = is_working
+
+            prefix = array('H', [0])
+            running = 0
+            for flag in working:
+                running += flag
+                prefix.append(running)
+            self._years[year] = prefix
+        return prefix
+
+    def working_days(self, start, end):
+        """
+        Return the number of working days in ``[start, end]``.
+        """
+        if end < start:
+            return 0
+        first_day = start.timetuple().tm_yday - 1
+        last_day = end.timetuple().tm_yday
+        if start.year == end.year:
+            prefix = self._prefix(start.year)
+            return prefix[last_day] - prefix[first_day]
+        first = self._prefix(start.year)
+        total = first[-1] - first[first_day] + self._prefix(end.year)[last_day]
+        for year in range(start.year + 1, end.year):
+            total += self._prefix(year)[-1]
+        return total
+
+    def is_working_day(self, day):
+        return self.working_days(day, day) == 1
+
+    def clear_cache(self):
+        self._years = {}
+
+
+class WorkCalendar(models.Model):
+    """
+    Exception to the default Monday-Friday working week: a holiday on a
+    weekday (``is_working=False``) or a working weekend day.
+    """
+    # Weekdays (Monday = 0) that are not working days unless listed here
+    WEEKEND = (5, 6)
+
+    date = models.DateField(unique=True)
+    is_working = models.BooleanField(
+        default=False,
+        help_text="Whether this date is a working day"
+    )
+    name = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Holiday or event name"
+    )
+
+    objects = WorkCalendarManager()
+
+    class Meta:
+        ordering = ['date']
+        verbose_name = 'Work Calendar Day'
+        verbose_name_plural = 'Work Calendar'
+
+    def __str__(self):
+        kind = 'working day' if self.is_working else 'holiday'
+        return f"{self.date} ({self.name or kind})"
+
+
+class ProfileReport(models.Model):
+    """
+    cProfile and SQL report for one request, captured by
+    ``ProfilingMiddleware`` on demand (staff) or by sampling.
+    """
+    TRIGGER_CHOICES = [
+        ('staff', 'Staff request'),
+        ('sampled', 'Sampled'),
+    ]
+
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField()
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    user = models.CharField(max_length=150, blank=True)
+    duration_ms = models.FloatField(help_text="Wall time of the profiled request")
+    sql_count = models.PositiveIntegerField(default=0)
+    sql_ms = models.FloatField(default=0, help_text="Total time spent in SQL")
+    queries = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="SQL, duration and originating project frames of each query"
+    )
+    summary = models.TextField(blank=True, help_text="Top functions by cumulative time")
+    stats_file = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="pstats dump, relative to PROFILE_REPORTS_DIR"
+    )
+    collapsed_file = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Collapsed stacks for flame graphs, relative to PROFILE_REPORTS_DIR"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Profile Report'
+        verbose_name_plural = 'Profile Reports'
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,96 @@
+"""
+Pagination helpers for large tables.
+"""
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """
+    Return a cheap estimate of the number of rows in ``model``'s table, or
+    None if the database cannot provide one.
+
+    PostgreSQL uses the planner statistics in ``pg_class``; SQLite uses the
+    largest primary key, which is an index lookup rather than a table scan.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [table]
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                f'SELECT MAX({connection.ops.quote_name(model._meta.pk.column)}) '
+                f'FROM {connection.ops.quote_name(table)}'
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids ``COUNT(*)`` over whole tables.
+
+    Unfiltered querysets on tables estimated to hold at least
+    ``estimate_threshold`` rows report the estimate as their count; filtered
+    querysets and small tables still get an exact count.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+def encode_date_cursor(value):
+    """
+    Encode the last date of a page as an opaque cursor string.
+    """
+    return urlsafe_b64encode(value.isoformat().encode()).decode().rstrip('=')
+
+
+def decode_date_cursor(cursor):
+    """
+    Decode a cursor produced by ``encode_date_cursor``; raises ValueError.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return date.fromisoformat(urlsafe_b64decode(padded.encode()).decode())
+    except (TypeError, ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError('Invalid cursor.')
+
+
+def encode_pk_cursor(value):
+    """
+    Encode the last primary key of a page as an opaque cursor string.
+    """
+    return urlsafe_b64encode(str(int(value)).encode()).decode().rstrip('=')
+
+
+def decode_pk_cursor(cursor):
+    """
+    Decode a cursor produced by ``encode_pk_cursor``; raises ValueError.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(urlsafe_b64decode(padded.encode()).decode())
+    except (TypeError, ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError('Invalid cursor.')
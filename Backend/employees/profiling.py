@@ -0,0 +1,238 @@
+"""
+On-demand per-request profiling.
+
+``ProfilingMiddleware`` profiles a request when a staff user asks for it (an
+``X-Profile: 1`` header or ``?profile=1``) or when it is picked by
+``PROFILE_SAMPLE_RATE``. A profiled request runs under cProfile with every
+SQL query timed and traced back to the project code that issued it; the
+result is stored as a ``ProfileReport`` with a pstats dump and a
+collapsed-stack file (flamegraph.pl / speedscope format) built from stack
+samples taken alongside, both downloadable from the admin. Requests that are
+not picked only pay for the trigger check.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import random
+import sys
+import threading
+import time
+import traceback
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from .models import ProfileReport
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+
+# Project frames kept per query origin, and lines kept in the text summary
+ORIGIN_FRAMES = 3
+SUMMARY_LINES = 40
+
+# Seconds between stack samples taken for the collapsed-stack file
+STACK_SAMPLE_INTERVAL = 0.001
+
+# Only one cProfile profiler can be active per process (and on Python 3.12+
+# it sees every thread), so concurrent triggered requests run unprofiled.
+_profiler_lock = threading.Lock()
+
+
+def reports_dir():
+    """
+    Return the directory holding profile files, creating it if needed.
+    """
+    path = Path(settings.PROFILE_REPORTS_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def report_path(filename):
+    return reports_dir() / filename
+
+
+def delete_files(report):
+    """
+    Remove a report's pstats and collapsed-stack files.
+    """
+    for filename in (report.stats_file, report.collapsed_file):
+        if filename:
+            report_path(filename).unlink(missing_ok=True)
+
+
+def trigger_for(request):
+    """
+    Return why ``request`` should be profiled ('staff' or 'sampled'), or None.
+    """
+    if request.META.get(PROFILE_HEADER) == '1' or request.GET.get(PROFILE_PARAM) == '1':
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and user.is_staff:
+            return 'staff'
+    rate = settings.PROFILE_SAMPLE_RATE
+    if rate > 0 and random.random() < rate:
+        return 'sampled'
+    return None
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording SQL, duration and the project frames
+    that issued each query.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._root = str(settings.BASE_DIR)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000.0
+            self.queries.append({
+                'sql': sql,
+                'ms': round(duration, 3),
+                'many': many,
+                'origin': self._origin(),
+            })
+
+    def _origin(self):
+        frames = [
+            f'{Path(frame.filename).name}:{frame.lineno} in {frame.name}'
+            for frame in traceback.extract_stack()
+            if frame.filename.startswith(self._root)
+            and 'site-packages' not in frame.filename
+            and frame.filename != __file__
+        ]
+        return frames[-ORIGIN_FRAMES:]
+
+
+class StackSampler(threading.Thread):
+    """
+    Background thread sampling the stack of one thread while it is profiled.
+
+    ``stacks`` maps collapsed stacks (outermost first, ``;``-separated, above
+    ``base_frame``) to the microseconds attributed to them.
+    """
+
+    def __init__(self, thread_id, base_frame):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.base_code = base_frame.f_code
+        self.stacks = {}
+        self._done = threading.Event()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self._done.wait(STACK_SAMPLE_INTERVAL):
+            now = time.perf_counter()
+            self.sample(int((now - last) * 1_000_000))
+            last = now
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def sample(self, microseconds):
+        frame = sys._current_frames().get(self.thread_id)
+        labels = []
+        while frame is not None and frame.f_code is not self.base_code:
+            code = frame.f_code
+            labels.append(f'{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})')
+            frame = frame.f_back
+        if labels and microseconds > 0:
+            stack = ';'.join(reversed(labels))
+            self.stacks[stack] = self.stacks.get(stack, 0) + microseconds
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests selected by ``trigger_for`` and store a ``ProfileReport``.
+
+    Must come after ``AuthenticationMiddleware`` so staff can be recognised.
+    The report id is returned in the ``X-Profile-Id`` response header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = trigger_for(request)
+        if trigger is None or not _profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self._profile(request, trigger)
+        finally:
+            _profiler_lock.release()
+
+    def _profile(self, request, trigger):
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), sys._getframe())
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiling tool is active in this process.
+                return self.get_response(request)
+            sampler.start()
+            started = time.perf_counter()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+                sampler.stop()
+            duration = (time.perf_counter() - started) * 1000.0
+
+        try:
+            report = save_report(
+                request, response, trigger, profiler, sampler.stacks, recorder.queries, duration
+            )
+        except Exception:
+            logger.exception('Could not store profile for %s %s', request.method, request.path)
+        else:
+            response['X-Profile-Id'] = str(report.pk)
+        return response
+
+
+def save_report(request, response, trigger, profiler, stacks, queries, duration):
+    """
+    Write the profile files and create the ``ProfileReport`` row.
+    """
+    user = getattr(request, 'user', None)
+    report = ProfileReport.objects.create(
+        method=request.method,
+        path=request.get_full_path()[:500],
+        status_code=response.status_code,
+        trigger=trigger,
+        user=user.get_username() if user is not None and user.is_authenticated else '',
+        duration_ms=round(duration, 3),
+        sql_count=len(queries),
+        sql_ms=round(sum(query['ms'] for query in queries), 3),
+        queries=queries,
+    )
+
+    stats = pstats.Stats(profiler)
+    report.stats_file = f'{report.pk}.pstats'
+    stats.dump_stats(str(report_path(report.stats_file)))
+    report.collapsed_file = f'{report.pk}.collapsed.txt'
+    with open(report_path(report.collapsed_file), 'w', encoding='utf-8') as output:
+        for stack, microseconds in sorted(stacks.items()):
+            output.write(f'{stack} {microseconds}\n')
+
+    summary = io.StringIO()
+    stats.stream = summary
+    stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+    report.summary = summary.getvalue()
+    report.save(update_fields=['stats_file', 'collapsed_file', 'summary'])
+    return report
@@ -0,0 +1,363 @@
+"""
+Query plans of the API's representative queries, for the index advisor.
+
+Each endpoint's typical query is registered with ``@representative`` as a
+function returning an unevaluated QuerySet. ``explain`` runs ``EXPLAIN QUERY
+PLAN`` (SQLite) or ``EXPLAIN`` (PostgreSQL) through ``QuerySet.explain()`` and
+normalizes the output so plans can be compared with a stored snapshot;
+``flags`` points out full table scans and sorts without a supporting index,
+and ``index_report`` lists indexes that no representative query uses or that
+are covered by another index.
+"""
+import json
+import re
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from django.apps import apps
+from django.db import connections, transaction
+
+from .models import (
+    Attendance, AttendanceArchive, AttendanceCounter, Employee, IdempotencyKey, Job, ProfileReport,
+    WorkCalendar
+)
+
+
+Representative = namedtuple('Representative', ['endpoint', 'build', 'allow_scan'])
+
+REPRESENTATIVE_QUERIES = {}
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent / 'query_plans'
+
+# Fixed sample values so plans do not depend on the data or the day
+SAMPLE_DAY = date(2024, 1, 15)
+SAMPLE_PK = 1
+
+
+def representative(name, endpoint, allow_scan=False):
+    """
+    Register a function returning the QuerySet behind ``endpoint``.
+
+    ``allow_scan`` marks queries that read a whole table by design, so their
+    full scans are not flagged.
+    """
+    def register(func):
+        REPRESENTATIVE_QUERIES[name] = Representative(endpoint, func, allow_scan)
+        return func
+    return register
+
+
+@representative('employee_list', 'GET /api/employees/', allow_scan=True)
+def employee_list():
+    return Employee.objects.order_by('-created_at')
+
+
+@representative('employee_list_department', 'GET /api/employees/?department=')
+def employee_list_department():
+    return Employee.objects.filter(department_id=SAMPLE_PK).order_by('-created_at')
+
+
+@representative('employee_by_employee_id', 'GET /api/employees/{employee_id}/')
+def employee_by_employee_id():
+    return Employee.objects.filter(employee_id__upper='EMP001')
+
+
+@representative('employee_by_email', 'POST /api/employees/ (duplicate check)')
+def employee_by_email():
+    return Employee.objects.filter(email__lower='john@example.com')
+
+
+@representative('attendance_list', 'GET /api/attendance/', allow_scan=True)
+def attendance_list():
+    return Attendance.objects.order_by('-date')
+
+
+@representative('attendance_by_date', 'GET /api/attendance/by_date/')
+def attendance_by_date():
+    return Attendance.objects.filter(date=SAMPLE_DAY).order_by('-date')
+
+
+@representative('attendance_history', 'GET /api/attendance/by_employee/')
+def attendance_history():
+    return Attendance.objects.filter(
+        employee_id=SAMPLE_PK, date__gte=SAMPLE_DAY - timedelta(days=90), date__lte=SAMPLE_DAY
+    ).order_by('-date')[:51]
+
+
+@representative('archive_history', 'GET /api/attendance/by_employee/ (archived)')
+def archive_history():
+    return AttendanceArchive.objects.filter(
+        employee_id=SAMPLE_PK, date__lt=SAMPLE_DAY
+    ).order_by('-date')[:51]
+
+
+@representative('statistics_today', 'GET /api/attendance/statistics/')
+def statistics_today():
+    return Attendance.objects.filter(date=SAMPLE_DAY, status='Present').order_by().values('pk')
+
+
+@representative('statistics_month', 'GET /api/attendance/statistics/')
+def statistics_month():
+    return Attendance.objects.filter(
+        date__gte=SAMPLE_DAY.replace(day=1), status='Present'
+    ).order_by().values('pk')
+
+
+@representative('attendance_matrix', 'GET /api/attendance/matrix/')
+def attendance_matrix():
+    return Attendance.objects.filter(
+        employee_id__gte=SAMPLE_PK, employee_id__lte=SAMPLE_PK + 5000,
+        date__gte=SAMPLE_DAY.replace(day=1), date__lte=SAMPLE_DAY
+    ).order_by('employee_id', 'date').values_list('employee_id', 'date', 'status')
+
+
+@representative('attendance_analytics', 'GET /api/attendance/analytics/{metric}/')
+def attendance_analytics():
+    return Attendance.objects.filter(
+        date__gte=SAMPLE_DAY - timedelta(days=90), date__lte=SAMPLE_DAY
+    ).order_by('employee_id', 'date').values_list('employee_id', 'date', 'status')
+
+
+@representative('archive_analytics', 'GET /api/attendance/analytics/{metric}/ (archived)')
+def archive_analytics():
+    return AttendanceArchive.objects.filter(
+        date__gte=SAMPLE_DAY - timedelta(days=90), date__lte=SAMPLE_DAY
+    ).order_by('employee_id', 'date').values_list('employee_id', 'date', 'status')
+
+
+@representative('archive_window', 'python manage.py archive_attendance')
+def archive_window():
+    return Attendance.objects.filter(
+        date__gte=SAMPLE_DAY, date__lt=SAMPLE_DAY + timedelta(days=31)
+    ).order_by()
+
+
+@representative('attendance_counter', 'GET /api/attendance/by_employee/ (totals)')
+def attendance_counter():
+    return AttendanceCounter.objects.filter(employee_id=SAMPLE_PK)
+
+
+@representative('job_claim', 'python manage.py run_jobs')
+def job_claim():
+    return Job.objects.filter(status=Job.QUEUED).order_by('created_at', 'pk')[:1]
+
+
+@representative('idempotency_lookup', 'POST with Idempotency-Key')
+def idempotency_lookup():
+    return IdempotencyKey.objects.filter(key='key', scope='POST /api/attendance/')
+
+
+@representative('idempotency_purge', 'python manage.py purge_idempotency_keys')
+def idempotency_purge():
+    return IdempotencyKey.objects.filter(
+        created_at__lt=datetime.combine(SAMPLE_DAY, datetime.min.time(), tzinfo=timezone.utc)
+    )
+
+
+@representative('profile_reports', 'Admin: Profile Reports', allow_scan=True)
+def profile_reports():
+    return ProfileReport.objects.order_by('-created_at')[:100]
+
+
+@representative('work_calendar_year', 'WorkCalendar.objects.working_days()')
+def work_calendar_year():
+    return WorkCalendar.objects.filter(
+        date__gte=date(SAMPLE_DAY.year, 1, 1), date__lt=date(SAMPLE_DAY.year + 1, 1, 1)
+    )
+
+
+_COST = re.compile(r'\s+\((?:cost|actual|rows)=.*?\)')
+
+
+def explain(queryset, using='default', real_costs=False):
+    """
+    Return the normalized plan of ``queryset`` as a list of lines.
+
+    On PostgreSQL sequential scans are disabled for the EXPLAIN unless
+    ``real_costs`` is set, so small or empty tables still show which indexes
+    a query can use.
+    """
+    connection = connections[using]
+    queryset = queryset.using(using)
+    if connection.vendor == 'postgresql':
+        with transaction.atomic(using=using):
+            if not real_costs:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            output = queryset.explain()
+    else:
+        output = queryset.explain()
+    return normalize(output, connection.vendor)
+
+
+def normalize(output, vendor):
+    """
+    Strip costs, ids and tree drawing from EXPLAIN output.
+    """
+    lines = []
+    for line in output.splitlines():
+        depth = (len(line) - len(line.lstrip(' |-`'))) // 3
+        line = line.strip(' |-`>').strip()
+        if vendor == 'postgresql':
+            line = _COST.sub('', line)
+        else:
+            # Raw SQLite rows start with "id parent notused".
+            line = re.sub(r'^\d+ \d+ \d+ ', '', line)
+        if line and line != 'QUERY PLAN':
+            lines.append('  ' * depth + line)
+    return lines
+
+
+def flags(plan, vendor):
+    """
+    Return the full table scans and index-less sorts in ``plan``.
+    """
+    found = []
+    for line in plan:
+        line = line.strip()
+        if vendor == 'postgresql':
+            match = re.match(r'(?:Parallel )?Seq Scan on (\w+)', line)
+            if match:
+                found.append(f'full scan of {match.group(1)}')
+            elif re.match(r'(?:Incremental )?Sort\b', line):
+                found.append('sort without index')
+        else:
+            match = re.match(r'SCAN (\w+)', line)
+            if match:
+                found.append(f'full scan of {match.group(1)}')
+            elif line.startswith('USE TEMP B-TREE'):
+                found.append('sort without index')
+    return found
+
+
+def indexes_used(plan):
+    """
+    Return the names of the indexes a plan reads.
+    """
+    used = set()
+    for line in plan:
+        used.update(re.findall(r'USING (?:COVERING )?INDEX (\w+)', line))
+        used.update(re.findall(r'Index (?:Only )?Scan (?:Backward )?using (\w+)', line))
+        used.update(re.findall(r'Bitmap Index Scan on (\w+)', line))
+    return used
+
+
+def analyze(using='default', real_costs=False):
+    """
+    Explain every representative query; return ``{name: {...}}``.
+    """
+    vendor = connections[using].vendor
+    results = {}
+    for name, query in REPRESENTATIVE_QUERIES.items():
+        plan = explain(query.build(), using=using, real_costs=real_costs)
+        found = flags(plan, vendor)
+        if query.allow_scan:
+            found = [flag for flag in found if not flag.startswith('full scan')]
+        results[name] = {
+            'endpoint': query.endpoint,
+            'plan': plan,
+            'flags': found,
+            'indexes': sorted(indexes_used(plan)),
+        }
+    return results
+
+
+def table_indexes(using='default'):
+    """
+    Return ``{table: {index name: (columns, unique)}}`` for the app's tables,
+    primary keys excluded.
+    """
+    connection = connections[using]
+    tables = {}
+    with connection.cursor() as cursor:
+        for model in apps.get_app_config('employees').get_models():
+            table = model._meta.db_table
+            constraints = connection.introspection.get_constraints(cursor, table)
+            tables[table] = {
+                name: (tuple(info['columns']), bool(info['unique']))
+                for name, info in constraints.items()
+                if (info['index'] or info['unique']) and not info['primary_key'] and info['columns']
+            }
+    return tables
+
+
+def index_report(results, using='default'):
+    """
+    Return ``(unused, redundant)`` lists of ``(table, index, reason)``.
+
+    Unique indexes back constraints and are never reported.
+    """
+    used = set()
+    for result in results.values():
+        used.update(result['indexes'])
+
+    unused, redundant = [], []
+    for table, indexes in sorted(table_indexes(using).items()):
+        for name, (columns, unique) in sorted(indexes.items()):
+            if unique:
+                continue
+            covering = sorted(
+                other for other, (other_columns, other_unique) in indexes.items()
+                if other != name
+                and other_columns[:len(columns)] == columns
+                and (len(other_columns) > len(columns) or other_unique or other < name)
+            )
+            if covering:
+                # SQLite reports inline UNIQUE constraints without a name.
+                other = 'a unique constraint' if covering[0].startswith('__unnamed') else covering[0]
+                redundant.append((table, name, f'columns {", ".join(columns)} are covered by {other}'))
+            elif name not in used:
+                unused.append((table, name, f'on {", ".join(columns)}; not used by any representative query'))
+    return unused, redundant
+
+
+def snapshot_path(vendor):
+    return SNAPSHOT_DIR / f'{vendor}.json'
+
+
+def write_snapshot(results, vendor):
+    """
+    Store the plans and flags of ``results`` as the snapshot for ``vendor``.
+    """
+    SNAPSHOT_DIR.mkdir(exist_ok=True)
+    snapshot = {
+        name: {'plan': result['plan'], 'flags': result['flags'], 'indexes': result['indexes']}
+        for name, result in results.items()
+    }
+    with open(snapshot_path(vendor), 'w', encoding='utf-8') as output:
+        json.dump(snapshot, output, indent=2, sort_keys=True)
+        output.write('\n')
+    return snapshot_path(vendor)
+
+
+def compare(results, vendor):
+    """
+    Compare ``results`` with the stored snapshot.
+
+    Returns ``(regressions, changes)``: a regression is a new full scan or
+    index-less sort, or an index the snapshot used that is no longer used;
+    other plan differences are changes. Raises ``FileNotFoundError`` when
+    there is no snapshot for ``vendor``.
+    """
+    with open(snapshot_path(vendor), encoding='utf-8') as stored:
+        snapshot = json.load(stored)
+
+    regressions, changes = [], []
+    for name, result in results.items():
+        expected = snapshot.get(name)
+        if expected is None:
+            changes.append(f'{name}: not in the snapshot')
+            continue
+        for flag in result['flags']:
+            if flag not in expected['flags']:
+                regressions.append(f'{name}: {flag}')
+        for index in expected['indexes']:
+            if index not in result['indexes']:
+                regressions.append(f'{name}: no longer uses {index}')
+        if result['plan'] != expected['plan']:
+            changes.append(f'{name}: plan changed')
+    for name in snapshot:
+        if name not in results:
+            changes.append(f'{name}: no longer a representative query')
+    return regressions, changes
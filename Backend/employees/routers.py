@@ -0,0 +1,116 @@
+"""
+Database routing for optional read replicas.
+
+Reads are only sent to a replica inside ``replica_reads()``, which the
+``ReplicaReadMixin`` enters for safe requests to selected viewset actions.
+Clients that recently wrote are pinned to the primary by
+``ReplicaStickinessMiddleware`` so they always read their own writes.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+
+STICKY_COOKIE = 'hrm_primary_pin'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Route reads made inside the block to a replica (when any are configured).
+    """
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def choose_replica():
+    """
+    Return a replica alias, or None when no replicas are configured.
+    """
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    if not replicas:
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random replica while replica reads are enabled and all
+    writes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin clients to the primary for ``DB_REPLICA_STICKY_SECONDS`` after a write.
+
+    Unsafe requests set a short-lived cookie; while it is present, requests
+    from the same client are marked with ``replica_pinned`` and read from the
+    primary, giving read-your-writes consistency despite replication lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.replica_pinned = STICKY_COOKIE in request.COOKIES
+        response = self.get_response(request)
+
+        if request.method not in SAFE_METHODS and getattr(settings, 'DATABASE_REPLICAS', []):
+            response.set_cookie(
+                STICKY_COOKIE,
+                '1',
+                max_age=settings.DB_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin that serves safe requests for ``replica_actions`` from a
+    replica unless the client is pinned to the primary.
+    """
+    replica_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        use_replica = (
+            request.method in SAFE_METHODS and
+            self.action in self.replica_actions and
+            not getattr(request, 'replica_pinned', False)
+        )
+        self._replica_token = _replica_reads.set(use_replica)
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
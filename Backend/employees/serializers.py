@@ -2,13 +2,142 @@
 Serializers for Employee and Attendance models.
 """
 from rest_framework import serializers
-from .models import Employee, Attendance
+from django.conf import settings
+from .models import Department, Employee, Attendance, AttendanceArchive, AttendanceCounter, Job
+from . import counters
+from .directory import employee_directory
+from .sparse import FieldSelection
+from .upsert import upsert_attendance
 from django.core.validators import EmailValidator
 from django.core.exceptions import ValidationError as DjangoValidationError
+import json
 import re
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class DepartmentField(serializers.Field):
+    """
+    Department exposed by name in the API and stored as the small-integer
+    ``department_id``, resolved through the cached Department lookup table.
+    """
+    default_error_messages = {
+        'required': 'Department is required.',
+        'invalid_choice': 'Select a valid department.',
+    }
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'department_id')
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if data in ('', None):
+            self.fail('required')
+        department_id = Department.objects.id_for(str(data))
+        if department_id is None:
+            self.fail('invalid_choice')
+        return department_id
+
+    def to_representation(self, value):
+        return Department.objects.name_for(value)
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Serializer mixin for sparse fieldsets (see ``employees.sparse``).
+
+    ``selection`` keeps only the selected fields; ``expandable_fields`` are
+    dropped unless expanded. ``field_columns`` maps fields that are not model
+    fields to the columns they read, for ``select_columns``.
+    """
+    expandable_fields = ()
+    field_columns = {}
+
+    def __init__(self, *args, selection=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selection = selection
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.selection
+        for name in list(fields):
+            field = fields[name]
+            if field.write_only:
+                continue
+            if name in self.expandable_fields:
+                keep = selection is not None and selection.expands(name)
+            else:
+                keep = selection is None or selection.includes(name)
+            if not keep:
+                del fields[name]
+            elif isinstance(field, SparseFieldsSerializerMixin) and selection is not None:
+                field.selection = selection.nested(name)
+        return fields
+
+    def unknown_fields(self, selection, prefix=''):
+        """
+        Return the dotted names in ``selection`` this serializer lacks.
+        """
+        fields = super().get_fields()
+        nested_names = {
+            name for name, field in fields.items() if isinstance(field, SparseFieldsSerializerMixin)
+        }
+        unknown = []
+        for names, allowed, as_expand in (
+            (selection.fields or {}, set(fields) - set(self.expandable_fields), False),
+            (selection.expand, set(self.expandable_fields) | nested_names, True),
+        ):
+            for name, nested in names.items():
+                if name not in allowed or fields[name].write_only:
+                    unknown.append(prefix + name)
+                elif nested is None:
+                    continue
+                elif name not in nested_names:
+                    unknown += [f'{prefix}{name}.{child}' for child in nested.fields or {}]
+                else:
+                    if as_expand:
+                        nested = FieldSelection(expand=nested.fields)
+                    unknown += fields[name].unknown_fields(nested, f'{prefix}{name}.')
+        return unknown
+
+    def select_columns(self, queryset, *extra, follow_related=True):
+        """
+        Narrow ``queryset`` to the columns the selected fields read, plus
+        ``extra`` columns the caller needs.
+
+        Nested serializers are joined with ``select_related``; pass
+        ``follow_related=False`` when the caller attaches related objects
+        itself, so only the foreign key column is read.
+        """
+        columns, related = self._columns('', follow_related)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns, *extra)
+
+    def _columns(self, prefix, follow_related=True):
+        opts = self.Meta.model._meta
+        model_fields = {field.name for field in opts.concrete_fields}
+        columns, related = [prefix + opts.pk.name], []
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, SparseFieldsSerializerMixin):
+                columns.append(prefix + field.source)
+                if not follow_related:
+                    continue
+                related.append(prefix + field.source)
+                nested_columns, nested_related = field._columns(f'{prefix}{field.source}__')
+                columns += nested_columns
+                related += nested_related
+            elif name in self.field_columns:
+                for column in self.field_columns[name]:
+                    columns.append(prefix + column)
+                    if '__' in column:
+                        related.append(prefix + column.rsplit('__', 1)[0])
+            elif field.source in model_fields:
+                columns.append(prefix + field.source)
+        return columns, list(dict.fromkeys(related))
+
+
+class EmployeeSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Employee model with comprehensive validation.
     """
@@ -37,16 +166,20 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'invalid': 'Enter a valid email address.',
         }
     )
-    department = serializers.ChoiceField(
-        choices=Employee.DEPARTMENT_CHOICES,
-        required=True,
-        error_messages={
-            'required': 'Department is required.',
-            'invalid_choice': 'Select a valid department.',
-        }
-    )
+    department = DepartmentField(required=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
+    attendance_summary = serializers.SerializerMethodField()
+
+    expandable_fields = ('attendance_summary',)
+    field_columns = {
+        'department': ['department'],
+        'attendance_summary': [
+            'attendance_counter__total',
+            'attendance_counter__present',
+            'attendance_counter__absent',
+        ],
+    }
 
     class Meta:
         model = Employee
@@ -57,9 +190,21 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'email',
             'department',
             'created_at',
-            'updated_at'
+            'updated_at',
+            'attendance_summary'
         ]
 
+    def get_attendance_summary(self, obj):
+        """
+        Return the employee's attendance totals (``?expand=attendance_summary``).
+        """
+        try:
+            counter = obj.attendance_counter
+            total, present, absent = counter.total, counter.present, counter.absent
+        except AttendanceCounter.DoesNotExist:
+            total, present, absent = counters.get_counts(obj.pk)
+        return {'total': total, 'present': present, 'absent': absent}
+
     def validate_employee_id(self, value):
         """
         Validate employee_id field.
@@ -67,14 +212,15 @@ class EmployeeSerializer(serializers.ModelSerializer):
         if not value or not value.strip():
             raise serializers.ValidationError('Employee ID is required.')
 
-        # Check if employee_id already exists (only on creation)
+        # Check if employee_id already exists (only on creation). Asked of
+        # the database, not the per-process directory, which may be stale.
         if self.instance is None:
-            if Employee.objects.filter(employee_id=value).exists():
+            if Employee.objects.filter(employee_id__upper=Employee.normalize_employee_id(value)).exists():
                 raise serializers.ValidationError(
                     f'Employee with ID {value} already exists.'
                 )
 
-        return value.strip()
+        return Employee.normalize_employee_id(value)
 
     def validate_name(self, value):
         """
@@ -106,29 +252,76 @@ class EmployeeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Enter a valid email address.')
 
         # Check if email already exists (only on creation)
+        email = Employee.normalize_email(value)
         if self.instance is None:
-            if Employee.objects.filter(email__iexact=value).exists():
+            if Employee.objects.filter(email__lower=email).exists():
                 raise serializers.ValidationError(
                     f'Employee with email {value} already exists.'
                 )
 
-        return value.strip().lower()
+        return email
+
 
-    def validate_department(self, value):
+class BulkEmployeeDeleteSerializer(serializers.Serializer):
+    """
+    Serializer for bulk employee deletion requests.
+    """
+    employee_ids = serializers.ListField(
+        child=serializers.CharField(max_length=20),
+        allow_empty=False,
+        max_length=settings.EMPLOYEE_BULK_MAX_IDS,
+        error_messages={
+            'required': 'employee_ids is required.',
+            'empty': 'employee_ids cannot be empty.',
+            'max_length': f'At most {settings.EMPLOYEE_BULK_MAX_IDS} employees can be processed at once.',
+        }
+    )
+
+    def validate_employee_ids(self, value):
         """
-        Validate department field.
+        Normalize IDs and drop duplicates while keeping request order.
         """
-        if not value:
-            raise serializers.ValidationError('Department is required.')
+        cleaned = [Employee.normalize_employee_id(item) for item in value if item and item.strip()]
+        if not cleaned:
+            raise serializers.ValidationError('employee_ids cannot be empty.')
+        return list(dict.fromkeys(cleaned))
 
-        valid_departments = [choice[0] for choice in Employee.DEPARTMENT_CHOICES]
-        if value not in valid_departments:
-            raise serializers.ValidationError('Select a valid department.')
 
-        return value
+class BulkEmployeeUpdateSerializer(BulkEmployeeDeleteSerializer):
+    """
+    Serializer for bulk employee updates (e.g. moving employees to another department).
+    """
+    department = DepartmentField(required=True)
 
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceRangeSerializer(BulkEmployeeDeleteSerializer):
+    """
+    Serializer for marking a set of employees over a date range.
+    """
+    start = serializers.DateField()
+    end = serializers.DateField()
+    status = serializers.ChoiceField(
+        choices=Attendance.STATUS_CHOICES,
+        error_messages={'invalid_choice': 'Status must be either Present or Absent.'}
+    )
+    working_days_only = serializers.BooleanField(default=True)
+    overwrite = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        from datetime import date as dt_date
+        start, end = attrs['start'], attrs['end']
+        if end < start:
+            raise serializers.ValidationError({'end': 'end must not be before start.'})
+        if end > dt_date.today():
+            raise serializers.ValidationError({'end': 'Cannot mark attendance for future dates.'})
+        if (end - start).days >= settings.ATTENDANCE_RANGE_MAX_DAYS:
+            raise serializers.ValidationError(
+                {'end': f'The range may span at most {settings.ATTENDANCE_RANGE_MAX_DAYS} days.'}
+            )
+        return attrs
+
+
+class AttendanceSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Attendance model with validation.
     """
@@ -179,9 +372,7 @@ class AttendanceSerializer(serializers.ModelSerializer):
         if not value or not value.strip():
             raise serializers.ValidationError('Employee ID is required.')
 
-        try:
-            Employee.objects.get(employee_id=value)
-        except Employee.DoesNotExist:
+        if employee_directory.get(value.strip()) is None:
             raise serializers.ValidationError(
                 f'Employee with ID {value} does not exist.'
             )
@@ -224,17 +415,50 @@ class AttendanceSerializer(serializers.ModelSerializer):
         Create or update attendance record.
         """
         employee_id = validated_data.pop('employee_id')
-        employee = Employee.objects.get(employee_id=employee_id)
-
-        # Check if attendance already exists for this employee and date
-        attendance, created = Attendance.objects.update_or_create(
-            employee=employee,
-            date=validated_data['date'],
-            defaults={'status': validated_data['status']}
+        entry = employee_directory.get(employee_id)
+        if entry is None:
+            raise serializers.ValidationError({
+                'employee_id': f'Employee with ID {employee_id} does not exist.'
+            })
+        employee = entry.as_employee()
+
+        # Insert or update in one statement; safe under concurrent marks
+        attendance, created = upsert_attendance(
+            employee,
+            validated_data['date'],
+            validated_data['status']
         )
 
         return attendance
 
+    def to_representation(self, instance):
+        # Marking an archived day updates the archived record
+        if isinstance(instance, AttendanceArchive):
+            return ArchivedAttendanceSerializer(instance, context=self.context).data
+        return super().to_representation(instance)
+
+
+class ArchivedAttendanceSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """
+    Read-only serializer for archived attendance records.
+    """
+    employee = EmployeeSerializer(read_only=True)
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AttendanceArchive
+        fields = [
+            'id',
+            'employee',
+            'date',
+            'status',
+            'archived'
+        ]
+        read_only_fields = fields
+
+    def get_archived(self, obj):
+        return True
+
 
 class AttendanceHistorySerializer(serializers.Serializer):
     """
@@ -243,6 +467,7 @@ class AttendanceHistorySerializer(serializers.Serializer):
     employee_id = serializers.CharField()
     employee_name = serializers.CharField()
     total_days = serializers.IntegerField()
+    working_days = serializers.IntegerField()
     present_count = serializers.IntegerField()
     absent_count = serializers.IntegerField()
     attendance_rate = serializers.FloatField()
@@ -257,5 +482,59 @@ class DashboardStatsSerializer(serializers.Serializer):
     present_today = serializers.IntegerField()
     absent_today = serializers.IntegerField()
     not_marked_today = serializers.IntegerField()
+    is_working_day = serializers.BooleanField()
+    working_days = serializers.IntegerField()
     attendance_rate = serializers.FloatField()
     department_breakdown = serializers.ListField()
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for background job status.
+    """
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'kind',
+            'params',
+            'status',
+            'progress',
+            'message',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+            'download_url'
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != Job.SUCCEEDED or not obj.result_file:
+            return None
+        return f'/api/jobs/{obj.pk}/download/'
+
+
+class JobSubmitSerializer(serializers.Serializer):
+    """
+    Serializer for queuing a background job.
+    """
+    kind = serializers.CharField(
+        max_length=50,
+        error_messages={'required': 'Job kind is required.'}
+    )
+    params = serializers.JSONField(required=False, default=dict)
+    file = serializers.FileField(required=False)
+
+    def validate_params(self, value):
+        # Multipart submissions (with a file) send params as a JSON string.
+        if isinstance(value, str):
+            try:
+                value = json.loads(value or '{}')
+            except ValueError:
+                raise serializers.ValidationError('params must be valid JSON.')
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('params must be an object.')
+        return value
@@ -0,0 +1,77 @@
+"""
+Signal handlers for the employees app.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import counters
+from .directory import employee_directory
+from .models import Attendance, Department, Employee, WorkCalendar
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_employee_directory(sender, instance, **kwargs):
+    """
+    Drop the employee from the directory cache now and again on commit, so a
+    concurrent read cannot re-cache the pre-commit row.
+    """
+    employee_id, pk = instance.employee_id, instance.pk
+
+    def invalidate():
+        employee_directory.invalidate(employee_id=employee_id, pk=pk)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def reset_department_cache(sender, **kwargs):
+    """
+    Reload the department name <-> id map on next use.
+    """
+    Department.objects.clear_cache()
+    transaction.on_commit(Department.objects.clear_cache)
+
+
+@receiver(post_save, sender=WorkCalendar)
+@receiver(post_delete, sender=WorkCalendar)
+def reset_work_calendar_cache(sender, **kwargs):
+    """
+    Rebuild the working-day prefix counts on next use.
+    """
+    WorkCalendar.objects.clear_cache()
+    transaction.on_commit(WorkCalendar.objects.clear_cache)
+
+
+@receiver(post_save, sender=Attendance)
+def update_attendance_counters(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep the employee's AttendanceCounter in step with a saved record.
+
+    There is deliberately no post_delete receiver: it would stop Django from
+    fast-deleting attendance when an employee is deleted. Code that deletes
+    individual records calls ``counters.record_change`` itself.
+    """
+    if raw:
+        return
+
+    if created:
+        counters.record_change(instance.employee_id, added=instance.status)
+    elif hasattr(instance, '_stored_state'):
+        stored_employee_id, stored_status = instance._stored_state
+        if stored_employee_id != instance.employee_id:
+            counters.record_change(stored_employee_id, removed=stored_status)
+            counters.record_change(instance.employee_id, added=instance.status)
+        elif stored_status != instance.status:
+            counters.record_change(
+                instance.employee_id, added=instance.status, removed=stored_status
+            )
+    else:
+        # Saved from an instance that was not loaded from the database, so
+        # the previous state is unknown.
+        counters.rebuild([instance.employee_id])
+
+    instance._stored_state = (instance.employee_id, instance.status)
@@ -0,0 +1,107 @@
+"""
+Sparse fieldsets and field expansion for read endpoints.
+
+``?fields=employee_id,name`` keeps only the listed fields; nested serializers
+are narrowed with dotted names (``?fields=date,status,employee.name``).
+``?expand=attendance_summary`` adds fields that are left out by default
+(``expandable_fields`` on the serializer), also dotted for nested ones.
+
+``SparseFieldsMixin`` parses both parameters for safe requests, rejects
+unknown names with a 400, hands the selection to every serializer it builds
+and narrows ``get_queryset()`` with ``only()`` / ``select_related()`` so
+columns that are not rendered are never fetched.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+class FieldSelection:
+    """
+    Requested fields and expansions for one serializer.
+
+    ``fields`` is None (the serializer's default fields) or a dict mapping
+    each field name to the selection for that nested field (None for all of
+    its default fields). ``expand`` maps expanded names the same way.
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand or {}
+
+    @classmethod
+    def parse(cls, fields=None, expand=None):
+        """
+        Build a selection from comma-separated ``fields`` and ``expand``
+        parameter values; empty or missing values select the defaults.
+        """
+        return cls(
+            fields=cls._tree(fields) if fields else None,
+            expand=cls._tree(expand) if expand else None,
+        )
+
+    @staticmethod
+    def _tree(value):
+        paths = {}
+        for item in value.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            name, _, rest = item.partition('.')
+            # None marks a bare name, which selects every nested field.
+            if rest and paths.get(name, []) is not None:
+                paths.setdefault(name, []).append(rest)
+            else:
+                paths[name] = None
+        return {
+            name: FieldSelection.parse(','.join(rest)) if rest else None
+            for name, rest in paths.items()
+        } or None
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return name in self.expand
+
+    def nested(self, name):
+        """
+        Return the selection for the nested serializer ``name``.
+        """
+        fields = self.fields.get(name) if self.fields is not None else None
+        expand = self.expand.get(name)
+        return FieldSelection(
+            fields=fields.fields if fields is not None else None,
+            expand=expand.fields if expand is not None else None,
+        )
+
+
+class SparseFieldsMixin:
+    """
+    ViewSet mixin applying ``?fields=`` / ``?expand=`` to reads.
+    """
+    field_selection = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.field_selection = None
+        if request.method not in SAFE_METHODS:
+            return
+        selection = FieldSelection.parse(
+            request.query_params.get('fields', None),
+            request.query_params.get('expand', None),
+        )
+        unknown = self.get_serializer_class()().unknown_fields(selection)
+        if unknown:
+            raise ValidationError(f'Unknown field(s): {", ".join(unknown)}.')
+        self.field_selection = selection
+
+    def get_serializer(self, *args, **kwargs):
+        if self.field_selection is not None:
+            kwargs.setdefault('selection', self.field_selection)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.field_selection is None:
+            return queryset
+        return self.get_serializer().select_columns(queryset)
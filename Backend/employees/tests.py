@@ -1,11 +1,45 @@
 """
 Tests for Employee and Attendance APIs.
 """
-from django.test import TestCase
+from django.test import LiveServerTestCase, TestCase, TransactionTestCase
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Employee, Attendance
-from datetime import date
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from .models import (
+    Department, Employee, Attendance, AttendanceArchive, AttendanceCounter, IdempotencyKey, Job,
+    ProfileReport, WorkCalendar
+)
+from . import (
+    admission, analytics, columnar, counters, ingest, jobs, matrix, profiling, queryplans, upsert
+)
+from .directory import EmployeeDirectory, employee_directory
+from .serializers import AttendanceSerializer
+from .views import AttendanceViewSet
+from .loadtest import LoadDriver, parse_mix, percentile
+from .pagination import EstimatedCountPaginator
+from django.contrib.auth.models import User
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import IntegrityError, connection, transaction
+from unittest import mock
+from .routers import ReplicaRouter, STICKY_COOKIE, replica_reads
+from datetime import date, timedelta
+from django.utils import timezone
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+
+def department(name):
+    """Return the seeded Department called ``name``."""
+    return Department.objects.get(name=name)
 
 
 class EmployeeAPITestCase(TestCase):
@@ -14,6 +48,7 @@ class EmployeeAPITestCase(TestCase):
     """
     
     def setUp(self):
+        employee_directory.clear()
         self.client = APIClient()
         self.employee_data = {
             'employee_id': 'EMP001',
@@ -21,7 +56,9 @@ class EmployeeAPITestCase(TestCase):
             'email': 'john.doe@example.com',
             'department': 'Engineering'
         }
-        self.employee = Employee.objects.create(**self.employee_data)
+        self.employee = Employee.objects.create(
+            **dict(self.employee_data, department=department('Engineering'))
+        )
 
     def test_create_employee(self):
         """Test creating a new employee."""
@@ -78,6 +115,72 @@ class EmployeeAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data['success'])
 
+    def test_retrieve_many_employees(self):
+        """Test resolving several pks and employee_ids in one call."""
+        other = Employee.objects.create(
+            employee_id='EMP002',
+            name='Jane Smith',
+            email='jane.smith@example.com',
+            department=department('Marketing')
+        )
+        response = self.client.get(
+            f'/api/employees/?ids=EMP001,{other.id},EMP404'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        employees = response.data['data']['employees']
+        self.assertEqual(employees['EMP001']['name'], 'John Doe')
+        self.assertEqual(employees[str(other.id)]['employee_id'], 'EMP002')
+        self.assertEqual(response.data['data']['not_found'], ['EMP404'])
+
+    def test_bulk_update_department(self):
+        """Test moving several employees to another department at once."""
+        Employee.objects.create(
+            employee_id='EMP002',
+            name='Jane Smith',
+            email='jane.smith@example.com',
+            department=department('Marketing')
+        )
+        response = self.client.patch(
+            '/api/employees/bulk/',
+            {'employee_ids': ['EMP001', 'EMP002', 'EMP404'], 'department': 'Sales'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['updated'], 2)
+        self.assertEqual(response.data['data']['not_found'], ['EMP404'])
+        self.assertEqual(
+            Employee.objects.filter(department=department('Sales')).count(), 2
+        )
+
+    def test_bulk_update_invalid_department(self):
+        """Test bulk update rejects an unknown department."""
+        response = self.client.patch(
+            '/api/employees/bulk/',
+            {'employee_ids': ['EMP001'], 'department': 'Nowhere'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.data['success'])
+
+    def test_bulk_delete_employees(self):
+        """Test deleting several employees and their attendance at once."""
+        Attendance.objects.create(
+            employee=self.employee,
+            date=date.today(),
+            status='Present'
+        )
+        response = self.client.delete(
+            '/api/employees/bulk/',
+            {'employee_ids': ['EMP001', 'EMP404']},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['deleted_employees'], 1)
+        self.assertEqual(response.data['data']['deleted_attendance'], 1)
+        self.assertEqual(response.data['data']['not_found'], ['EMP404'])
+        self.assertFalse(Employee.objects.exists())
+        self.assertFalse(Attendance.objects.exists())
+
 
 class AttendanceAPITestCase(TestCase):
     """
@@ -85,12 +188,13 @@ class AttendanceAPITestCase(TestCase):
     """
     
     def setUp(self):
+        employee_directory.clear()
         self.client = APIClient()
         self.employee = Employee.objects.create(
             employee_id='EMP001',
             name='John Doe',
             email='john.doe@example.com',
-            department='Engineering'
+            department=department('Engineering')
         )
         self.attendance_data = {
             'employee_id': 'EMP001',
@@ -150,3 +254,1772 @@ class AttendanceAPITestCase(TestCase):
         response = self.client.get('/api/attendance/statistics/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data['success'])
+
+
+class AttendanceArchiveTestCase(TestCase):
+    """
+    Test cases for the attendance archive.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.employee = Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+        self.old_date = date.today() - timedelta(days=400)
+        Attendance.objects.create(employee=self.employee, date=self.old_date, status='Absent')
+        Attendance.objects.create(employee=self.employee, date=date.today(), status='Present')
+
+    def test_archive_command_moves_old_records(self):
+        """Test that records older than the horizon are moved to the archive."""
+        out = StringIO()
+        call_command('archive_attendance', days=365, stdout=out)
+        self.assertIn('Archived 1 record(s)', out.getvalue())
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertTrue(
+            AttendanceArchive.objects.filter(date=self.old_date, status='Absent').exists()
+        )
+
+    def test_history_includes_archived_records(self):
+        """Test that history and by_date transparently include archived records."""
+        call_command('archive_attendance', days=365, stdout=StringIO())
+
+        response = self.client.get(f'/api/attendance/by_employee/?employee_id={self.employee.employee_id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['total_days'], 2)
+        self.assertEqual(response.data['data']['absent_count'], 1)
+        self.assertEqual(len(response.data['data']['records']), 2)
+
+        response = self.client.get(f'/api/attendance/by_date/?date={self.old_date.isoformat()}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['data']), 1)
+        self.assertTrue(response.data['data'][0]['archived'])
+
+    def test_by_date_prefers_hot_record_over_archived_duplicate(self):
+        """Test that a day held by both tables is listed once, as the hot record."""
+        AttendanceArchive.objects.create(employee=self.employee, date=self.old_date, status='Present')
+        response = self.client.get(f'/api/attendance/by_date/?date={self.old_date.isoformat()}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['data']), 1)
+        self.assertEqual(response.data['data'][0]['status'], 'Absent')
+        self.assertNotIn('archived', response.data['data'][0])
+
+
+class EmployeeDirectoryTestCase(TestCase):
+    """
+    Test cases for the in-process employee directory cache.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.employee = Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+
+    def test_lookup_is_cached(self):
+        """Test that a second lookup does not hit the database."""
+        self.assertEqual(employee_directory.get('EMP001').pk, self.employee.pk)
+        with self.assertNumQueries(0):
+            entry = employee_directory.get('EMP001')
+            employee_directory.get_by_pk(self.employee.pk)
+        self.assertEqual(entry.department, 'Engineering')
+
+    def test_save_invalidates_entry(self):
+        """Test that saving an employee refreshes the cached snapshot."""
+        employee_directory.get('EMP001')
+        self.employee.name = 'John Updated'
+        self.employee.save()
+        self.assertEqual(employee_directory.get('EMP001').name, 'John Updated')
+
+    def test_bulk_update_invalidates_directory(self):
+        """Test that set-based updates invalidate the whole directory."""
+        employee_directory.get('EMP001')
+        self.client.patch(
+            '/api/employees/bulk/',
+            {'employee_ids': ['EMP001'], 'department': 'Sales'},
+            format='json'
+        )
+        self.assertEqual(employee_directory.get('EMP001').department, 'Sales')
+
+    def test_duplicate_check_ignores_a_stale_directory(self):
+        """Test that the employee_id uniqueness check asks the database."""
+        with mock.patch.object(employee_directory, 'get', return_value=None):
+            response = self.client.post('/api/employees/', {
+                'employee_id': 'emp001', 'name': 'Jane Doe',
+                'email': 'jane.doe@example.com', 'department': 'Engineering'
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('employee_id', response.data['error'])
+
+    def test_attendance_validation_uses_directory(self):
+        """Test that resolving the employee on the attendance write path is free."""
+        employee_directory.get('EMP001')
+        serializer = AttendanceSerializer(data={
+            'employee_id': 'EMP001',
+            'date': date.today().isoformat(),
+            'status': 'Present'
+        })
+        with self.assertNumQueries(0):
+            self.assertTrue(serializer.is_valid())
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        directory = EmployeeDirectory(max_size=1)
+        Employee.objects.create(
+            employee_id='EMP002',
+            name='Jane Smith',
+            email='jane.smith@example.com',
+            department=department('Marketing')
+        )
+        directory.get('EMP001')
+        directory.get('EMP002')
+        self.assertEqual(len(directory), 1)
+        with self.assertNumQueries(1):
+            directory.get('EMP001')
+
+
+class LoadTestDriverTestCase(LiveServerTestCase):
+    """
+    Test cases for the load-testing driver.
+    """
+    # Keep the departments seeded by migrations across the table flushes.
+    serialized_rollback = True
+
+    def setUp(self):
+        employee_directory.clear()
+        Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_parse_mix_rejects_unknown_scenario(self):
+        """Test that unknown scenarios are rejected."""
+        with self.assertRaises(ValueError):
+            parse_mix('checkin=1,teleport=2')
+
+    def test_driver_reports_every_scenario(self):
+        """Test a short run against the live test server."""
+        driver = LoadDriver(
+            self.live_server_url,
+            ['EMP001'],
+            mix=parse_mix('checkin=1,dashboard=1,search=1,history=1'),
+            concurrency=1,
+            duration=0.5,
+        )
+        rows = {row['scenario']: row for row in driver.run().summary()}
+        self.assertGreater(rows['total']['requests'], 0)
+        self.assertEqual(rows['total']['errors'], 0)
+
+
+class AdminScalabilityTestCase(TestCase):
+    """
+    Test cases for the admin changelists and estimated-count paginator.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.employee = Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+        Attendance.objects.create(employee=self.employee, date=date.today(), status='Present')
+        Attendance.objects.create(
+            employee=self.employee,
+            date=date.today() - timedelta(days=1),
+            status='Absent'
+        )
+
+    def test_paginator_uses_estimate_for_unfiltered_queryset(self):
+        """Test that unfiltered querysets above the threshold use the estimate."""
+        paginator = EstimatedCountPaginator(Attendance.objects.order_by('-date'), 50)
+        paginator.estimate_threshold = 0
+        with self.assertNumQueries(1):
+            self.assertGreaterEqual(paginator.count, 2)
+
+    def test_paginator_counts_filtered_queryset_exactly(self):
+        """Test that filtered querysets still get an exact count."""
+        paginator = EstimatedCountPaginator(
+            Attendance.objects.filter(status='Absent').order_by('-date'), 50
+        )
+        paginator.estimate_threshold = 0
+        self.assertEqual(paginator.count, 1)
+
+    def test_attendance_changelist(self):
+        """Test that the attendance changelist renders."""
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+        response = self.client.get('/admin/employees/attendance/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'John Doe')
+
+
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRouterTestCase(TestCase):
+    """
+    Test cases for read-replica routing and read-your-writes stickiness.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+
+    def test_router_only_uses_replica_when_enabled(self):
+        """Test that reads go to a replica only inside replica_reads()."""
+        router = ReplicaRouter()
+        with override_settings(DATABASE_REPLICAS=['replica_0']):
+            self.assertIsNone(router.db_for_read(Employee))
+            with replica_reads():
+                self.assertEqual(router.db_for_read(Employee), 'replica_0')
+            self.assertEqual(router.db_for_write(Employee), 'default')
+            self.assertFalse(router.allow_migrate('replica_0', 'employees'))
+
+    def test_list_reads_from_replica(self):
+        """Test that list requests are routed to a replica."""
+        with mock.patch('employees.routers.choose_replica', return_value='default') as choose:
+            response = self.client.get('/api/employees/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(choose.called)
+
+    def test_write_pins_client_to_primary(self):
+        """Test that a write sets the sticky cookie and later reads skip replicas."""
+        response = self.client.post('/api/attendance/', {
+            'employee_id': 'EMP001',
+            'date': date.today().isoformat(),
+            'status': 'Present'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        with mock.patch('employees.routers.choose_replica', return_value='default') as choose:
+            response = self.client.get('/api/attendance/statistics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(choose.called)
+
+
+class NormalizedColumnsTestCase(TestCase):
+    """
+    Test cases for the integer-coded department and status columns.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.employee = Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+
+    def test_status_is_stored_as_integer_code(self):
+        """Test that status is stored as a small integer but read as a label."""
+        attendance = Attendance.objects.create(
+            employee=self.employee, date=date.today(), status='Absent'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT status FROM {Attendance._meta.db_table} WHERE id = %s',
+                [attendance.pk]
+            )
+            self.assertEqual(cursor.fetchone()[0], Attendance.STATUS_CODES['Absent'])
+        self.assertEqual(Attendance.objects.get(pk=attendance.pk).status, 'Absent')
+
+    def test_api_keeps_string_representation(self):
+        """Test that the API still exposes department and status as strings."""
+        self.client.post('/api/attendance/', {
+            'employee_id': 'EMP001',
+            'date': date.today().isoformat(),
+            'status': 'Present'
+        }, format='json')
+        response = self.client.get('/api/attendance/?status=Present')
+        record = response.data['data'][0]
+        self.assertEqual(record['status'], 'Present')
+        self.assertEqual(record['employee']['department'], 'Engineering')
+
+        response = self.client.get('/api/attendance/statistics/')
+        self.assertEqual(
+            response.data['data']['department_breakdown'],
+            [{'department': 'Engineering', 'count': 1}]
+        )
+
+    def test_unknown_department_rejected(self):
+        """Test that employees cannot be created in an unknown department."""
+        response = self.client.post('/api/employees/', {
+            'employee_id': 'EMP002',
+            'name': 'Jane Smith',
+            'email': 'jane.smith@example.com',
+            'department': 'Nowhere'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error']['department'], ['Select a valid department.'])
+
+
+class AttendanceCounterTestCase(TestCase):
+    """
+    Test cases for the denormalized per-employee attendance counters.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.employee = Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+
+    def counts(self):
+        counter = AttendanceCounter.objects.get(employee=self.employee)
+        return counter.total, counter.present, counter.absent
+
+    def mark(self, day, record_status):
+        return self.client.post('/api/attendance/', {
+            'employee_id': 'EMP001',
+            'date': day.isoformat(),
+            'status': record_status
+        }, format='json')
+
+    def test_hot_record_wins_over_archived_duplicate(self):
+        """Test that a key present in both tables is counted once, as the hot record."""
+        old_day = date.today() - timedelta(days=400)
+        AttendanceArchive.objects.create(employee=self.employee, date=old_day, status='Present')
+        Attendance.objects.create(employee=self.employee, date=old_day, status='Absent')
+        counters.rebuild()
+        self.assertEqual(self.counts(), (1, 0, 1))
+        self.assertEqual(counters.count_range(self.employee.pk, old_day, old_day), (1, 0, 1))
+        self.assertEqual(counters.find_mismatches(), {})
+
+    def test_counters_follow_writes(self):
+        """Test that creating, changing and deleting records adjusts counters."""
+        today = date.today()
+        self.mark(today, 'Present')
+        self.mark(today - timedelta(days=1), 'Absent')
+        self.assertEqual(self.counts(), (2, 1, 1))
+
+        self.mark(today - timedelta(days=1), 'Present')
+        self.assertEqual(self.counts(), (2, 2, 0))
+
+        record = Attendance.objects.get(employee=self.employee, date=today)
+        self.client.delete(f'/api/attendance/{record.pk}/')
+        self.assertEqual(self.counts(), (1, 1, 0))
+
+    def test_history_stats_come_from_counters(self):
+        """Test that history stats are read from the counter row."""
+        self.mark(date.today(), 'Present')
+        AttendanceCounter.objects.filter(employee=self.employee).update(total=7, present=7)
+        response = self.client.get('/api/attendance/by_employee/?employee_id=EMP001')
+        self.assertEqual(response.data['data']['total_days'], 7)
+
+    def test_reconcile_command(self):
+        """Test that the reconcile command detects and repairs drift."""
+        self.mark(date.today(), 'Absent')
+        AttendanceCounter.objects.filter(employee=self.employee).update(total=5)
+        self.assertIn(self.employee.pk, counters.find_mismatches())
+
+        out = StringIO()
+        call_command('reconcile_attendance_counters', stdout=out)
+        self.assertEqual(self.counts(), (1, 0, 1))
+        self.assertEqual(counters.find_mismatches(), {})
+
+
+class AttendanceHistoryPaginationTestCase(TestCase):
+    """
+    Test cases for the paginated, range-bounded attendance history.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.employee = Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+        self.today = date.today()
+        for offset in range(5):
+            Attendance.objects.create(
+                employee=self.employee,
+                date=self.today - timedelta(days=offset),
+                status='Present' if offset % 2 == 0 else 'Absent'
+            )
+        self.old_date = self.today - timedelta(days=400)
+        AttendanceArchive.objects.create(employee=self.employee, date=self.old_date, status='Absent')
+        counters.rebuild([self.employee.pk])
+
+    def history(self, **params):
+        params.setdefault('employee_id', 'EMP001')
+        return self.client.get('/api/attendance/by_employee/', params)
+
+    def test_cursor_walks_hot_and_archived_records(self):
+        """Test that cursor pages cover every record newest first, exactly once."""
+        seen = []
+        params = {'page_size': 2}
+        while True:
+            response = self.history(**params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.data['data']
+            self.assertLessEqual(len(data['records']), 2)
+            self.assertEqual(data['total_days'], 6)
+            seen.extend(record['date'] for record in data['records'])
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(seen[-1], self.old_date.isoformat())
+
+    def test_range_bounds_records_and_stats(self):
+        """Test that start/end limit both the records and the summary stats."""
+        response = self.history(
+            start=(self.today - timedelta(days=2)).isoformat(),
+            end=self.today.isoformat()
+        )
+        data = response.data['data']
+        self.assertEqual(len(data['records']), 3)
+        self.assertEqual(
+            (data['total_days'], data['present_count'], data['absent_count']), (3, 2, 1)
+        )
+        self.assertIsNone(data['next_cursor'])
+
+    def test_invalid_parameters_rejected(self):
+        """Test that malformed dates and cursors return 400."""
+        self.assertEqual(self.history(start='yesterday').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.history(cursor='not-a-cursor').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BackgroundJobTestCase(TestCase):
+    """
+    Test cases for the background job API and handlers.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        results = tempfile.TemporaryDirectory()
+        self.addCleanup(results.cleanup)
+        overrides = override_settings(JOB_RESULTS_DIR=results.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.employee = Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+        self.today = date.today()
+        Attendance.objects.create(employee=self.employee, date=self.today, status='Present')
+
+    def run_next(self):
+        job_id = jobs.claim_next('test-worker')
+        self.assertIsNotNone(job_id)
+        return jobs.execute(job_id)
+
+    def test_export_job_lifecycle(self):
+        """Test submitting, polling and downloading an attendance export."""
+        response = self.client.post('/api/jobs/', {
+            'kind': 'attendance_export',
+            'params': {'start': (self.today - timedelta(days=30)).isoformat(), 'end': self.today.isoformat()}
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data['data']['id']
+        self.assertEqual(response.data['data']['status'], Job.QUEUED)
+
+        response = self.client.get(f'/api/jobs/{job_id}/download/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        self.assertEqual(self.run_next(), Job.SUCCEEDED)
+        response = self.client.get(f'/api/jobs/{job_id}/')
+        self.assertEqual(response.data['data']['progress'], 100)
+        self.assertEqual(response.data['data']['download_url'], f'/api/jobs/{job_id}/download/')
+
+        response = self.client.get(f'/api/jobs/{job_id}/download/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn(f'EMP001,John Doe,Engineering,{self.today.isoformat()},Present', content)
+
+    def test_invalid_submission_rejected(self):
+        """Test that unknown kinds and bad params are rejected before queuing."""
+        response = self.client.post('/api/jobs/', {'kind': 'nope'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/jobs/', {
+            'kind': 'attendance_export', 'params': {'start': 'yesterday'}
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Job.objects.exists())
+
+    def test_employee_import_reports_rejected_rows(self):
+        """Test that an uploaded CSV creates valid employees and reports bad rows."""
+        upload = SimpleUploadedFile('employees.csv', (
+            'employee_id,name,email,department\n'
+            'EMP002,Jane Smith,jane@example.com,Sales\n'
+            'EMP001,Dup Licate,dup@example.com,Sales\n'
+            'EMP003,Bad Department,bad@example.com,Nowhere\n'
+        ).encode())
+        response = self.client.post('/api/jobs/', {'kind': 'employee_import', 'file': upload})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
+
+        self.assertEqual(self.run_next(), Job.SUCCEEDED)
+        job = Job.objects.get()
+        self.assertEqual(job.message, 'Imported 1 employee(s), rejected 2.')
+        self.assertTrue(Employee.objects.filter(employee_id='EMP002', department=department('Sales')).exists())
+        with open(jobs.result_path(job)) as errors:
+            self.assertEqual(len(errors.read().splitlines()), 3)
+
+    def test_failed_handler_marks_job_failed(self):
+        """Test that handler errors are recorded on the job."""
+        job = Job.objects.create(kind='attendance_export', params={})
+        with self.assertLogs('employees.jobs', 'ERROR'):
+            self.assertEqual(self.run_next(), Job.FAILED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertTrue(job.error)
+
+    def test_stale_jobs_are_requeued(self):
+        """Test that running jobs without a heartbeat are requeued."""
+        Job.objects.create(kind='rebuild_counters')
+        job_id = jobs.claim_next('dead-worker')
+        self.assertIsNone(jobs.claim_next('other-worker'))
+        Job.objects.filter(pk=job_id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(60), 1)
+        self.assertEqual(jobs.claim_next('other-worker'), job_id)
+
+
+class RunJobsCommandTestCase(TransactionTestCase):
+    """
+    Test cases for the run_jobs worker command.
+    """
+    # Departments are seeded by a migration
+    serialized_rollback = True
+
+    def test_worker_drains_queue(self):
+        """Test that the worker runs every queued job from its pool and exits."""
+        Job.objects.create(kind='rebuild_counters')
+        Job.objects.create(kind='archive_attendance', params={'days': 365})
+        out = StringIO()
+        call_command('run_jobs', once=True, concurrency=2, stdout=out)
+        self.assertEqual(Job.objects.filter(status=Job.SUCCEEDED).count(), 2)
+        self.assertIn('succeeded', out.getvalue())
+        # SQLite allows one writer, so the worker runs one job at a time
+        self.assertIn('one at a time', out.getvalue())
+
+    def test_long_job_keeps_its_heartbeat(self):
+        """Test that a job without progress reports is not requeued while it runs."""
+        runs = []
+
+        def slow(context):
+            time.sleep(2.5)
+            job = Job.objects.get(pk=context.job.pk)
+            runs.append(job.heartbeat_at - job.started_at)
+            return 'Slept.'
+
+        Job.objects.create(kind='slow')
+        with mock.patch.dict(jobs.JOB_TYPES, {'slow': jobs.JobType(slow, None, False)}):
+            call_command(
+                'run_jobs', once=True, poll_interval=0.1, stale_after=1, stdout=StringIO(), stderr=StringIO()
+            )
+        self.assertEqual(len(runs), 1)
+        # The worker refreshed the heartbeat while the job was running
+        self.assertGreater(runs[0], timedelta(seconds=1))
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
+
+
+class WriteBehindIngestTestCase(TestCase):
+    """
+    Test cases for write-behind check-in batching.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        logs = tempfile.TemporaryDirectory()
+        self.addCleanup(logs.cleanup)
+        self.log_dir = logs.name
+        self.queue = ingest.CheckinQueue(self.log_dir, autostart=False)
+        patcher = mock.patch.object(ingest, 'checkin_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP00{index}',
+                name='John Doe',
+                email=f'john{index}@example.com',
+                department=department('Engineering')
+            )
+            for index in range(1, 4)
+        ]
+        self.today = date.today()
+
+    @override_settings(ATTENDANCE_WRITE_BEHIND=True)
+    def test_marks_are_queued_then_flushed_in_one_batch(self):
+        """Test that check-ins answer 202 and are written by the next flush."""
+        for employee in self.employees:
+            response = self.client.post('/api/attendance/', {
+                'employee_id': employee.employee_id,
+                'date': self.today.isoformat(),
+                'status': 'Present'
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        # A later mark for the same employee and day wins within the batch
+        self.client.post('/api/attendance/', {
+            'employee_id': 'EMP001', 'date': self.today.isoformat(), 'status': 'Absent'
+        }, format='json')
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(self.queue.pending(), 3)
+
+        self.assertEqual(self.queue.flush(), 3)
+        self.assertEqual(Attendance.objects.filter(date=self.today).count(), 3)
+        self.assertEqual(Attendance.objects.get(employee=self.employees[0]).status, 'Absent')
+        self.assertEqual(counters.get_counts(self.employees[0].pk), (1, 0, 1))
+        self.assertEqual(counters.find_mismatches(), {})
+
+    @override_settings(ATTENDANCE_WRITE_BEHIND=True)
+    def test_employee_deleted_before_enqueue_is_not_found(self):
+        """Test that a check-in for an employee deleted after validation gets a 404."""
+        lookup = employee_directory.get
+        with mock.patch.object(
+            employee_directory, 'get', side_effect=[lookup('EMP001'), None]
+        ):
+            response = self.client.post('/api/attendance/', {
+                'employee_id': 'EMP001', 'date': self.today.isoformat(), 'status': 'Present'
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['message'], 'Employee not found.')
+        self.assertEqual(self.queue.pending(), 0)
+
+    def test_flush_updates_existing_records_and_counters(self):
+        """Test that a batch overwrites existing marks and adjusts counters."""
+        Attendance.objects.create(employee=self.employees[0], date=self.today, status='Present')
+        self.queue.enqueue(self.employees[0].pk, self.today, 'Absent')
+        self.queue.enqueue(self.employees[1].pk, self.today, 'Present')
+        self.queue.flush()
+        self.assertEqual(counters.get_counts(self.employees[0].pk), (1, 0, 1))
+        self.assertEqual(counters.get_counts(self.employees[1].pk), (1, 1, 0))
+        self.assertNotIn(self.employees[0].pk, counters.find_mismatches())
+
+    def test_unflushed_log_is_replayed(self):
+        """Test that marks left in the log by a crashed process are replayed."""
+        crashed = ingest.CheckinQueue(self.log_dir, autostart=False)
+        crashed.enqueue(self.employees[0].pk, self.today, 'Present')
+        crashed.enqueue(self.employees[1].pk, self.today, 'Absent')
+        crashed._log.close()  # the process dies, releasing its lock
+
+        out = StringIO()
+        call_command('replay_checkin_log', dir=self.log_dir, stdout=out)
+        self.assertIn('Replayed 2 attendance mark(s)', out.getvalue())
+        self.assertEqual(Attendance.objects.filter(date=self.today).count(), 2)
+        self.assertEqual(ingest.replay_logs(self.log_dir), 0)
+
+
+class AttendanceUpsertTestCase(TestCase):
+    """
+    Test cases for the single-statement attendance upsert.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.employee = Employee.objects.create(
+            employee_id='EMP001',
+            name='John Doe',
+            email='john.doe@example.com',
+            department=department('Engineering')
+        )
+        self.today = date.today()
+
+    def mark(self, record_status):
+        return self.client.post('/api/attendance/', {
+            'employee_id': 'EMP001',
+            'date': self.today.isoformat(),
+            'status': record_status
+        }, format='json')
+
+    def test_repeated_marks_update_one_record(self):
+        """Test that marking twice updates the same row and its counters."""
+        first = self.mark('Present').data['data']
+        with self.assertNumQueries(4):
+            # SAVEPOINT, the locked read of the current status, the upsert, RELEASE
+            second = self.mark('Present').data['data']
+        third = self.mark('Absent').data['data']
+
+        self.assertEqual(first['id'], second['id'])
+        self.assertEqual(first['id'], third['id'])
+        self.assertEqual(third['status'], 'Absent')
+        self.assertEqual(third['created_at'], first['created_at'])
+        self.assertEqual(third['employee']['employee_id'], 'EMP001')
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(counters.get_counts(self.employee.pk), (1, 0, 1))
+
+    def test_marking_an_archived_day_updates_the_archive(self):
+        """Test that re-marking an archived day never adds a hot duplicate."""
+        old_day = self.today - timedelta(days=400)
+        AttendanceArchive.objects.create(employee=self.employee, date=old_day, status='Present')
+        counters.rebuild()
+
+        response = self.client.post('/api/attendance/', {
+            'employee_id': 'EMP001', 'date': old_day.isoformat(), 'status': 'Absent'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['data']['archived'])
+        self.assertEqual(response.data['data']['status'], 'Absent')
+
+        self.assertEqual(upsert.upsert_marks({(self.employee.pk, old_day): 'Present'}), 1)
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(AttendanceArchive.objects.get().status, 'Present')
+        self.assertEqual(counters.count_range(self.employee.pk, old_day, old_day), (1, 1, 0))
+        self.assertEqual(counters.get_counts(self.employee.pk), (1, 1, 0))
+        self.assertEqual(counters.find_mismatches(), {})
+
+
+class AttendanceStressTestCase(TestCase):
+    """
+    Multi-threaded stress test of the upsert on a scratch database.
+    """
+
+    def test_concurrent_marks_are_correct(self):
+        """Test that concurrent upserts of the same marks never fail or drift."""
+        out = StringIO()
+        call_command(
+            'stress_attendance', threads=8, employees=5, days=3, rounds=2,
+            strategy=['upsert'], stdout=out
+        )
+        row = next(line for line in out.getvalue().splitlines() if line.startswith('upsert'))
+        marks, errors, _, rows_ok, counters_ok = row.split()[1:]
+        self.assertEqual((errors, rows_ok, counters_ok), ('0', 'True', 'True'))
+
+
+class IdempotencyKeyTestCase(TestCase):
+    """
+    Test cases for Idempotency-Key handling on write endpoints.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.employee_data = {
+            'employee_id': 'EMP001',
+            'name': 'John Doe',
+            'email': 'john.doe@example.com',
+            'department': 'Engineering'
+        }
+
+    def test_retry_replays_stored_response(self):
+        """Test that a retried create returns the first response untouched."""
+        first = self.client.post('/api/employees/', self.employee_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(1):
+            retry = self.client.post('/api/employees/', self.employee_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Employee.objects.count(), 1)
+
+    def test_key_reused_with_different_body(self):
+        """Test that reusing a key for a different request is rejected."""
+        self.client.post('/api/employees/', self.employee_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        response = self.client.post('/api/employees/', dict(self.employee_data, name='Jane Doe'),
+                                    format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_keys_are_scoped_and_optional(self):
+        """Test that keys are per endpoint and that requests without one run normally."""
+        self.client.post('/api/employees/', self.employee_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        response = self.client.post('/api/attendance/', {
+            'employee_id': 'EMP001', 'date': date.today().isoformat(), 'status': 'Present'
+        }, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+        response = self.client.post('/api/employees/', self.employee_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_in_progress_key_conflicts(self):
+        """Test that a retry racing the original request gets 409."""
+        IdempotencyKey.objects.create(key='abc', scope='POST:/api/employees/', request_hash='x')
+        response = self.client.post('/api/employees/', self.employee_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_expired_keys_are_purged(self):
+        """Test TTL cleanup and that expired keys run the request again."""
+        self.client.post('/api/employees/', self.employee_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        response = self.client.post('/api/employees/', self.employee_data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('Purged 1 expired', out.getvalue())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class AttendanceMatrixTestCase(TestCase):
+    """
+    Test cases for the employees x days attendance matrix.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.engineer = Employee.objects.create(
+            employee_id='EMP001', name='John Doe', email='john@example.com',
+            department=department('Engineering')
+        )
+        self.seller = Employee.objects.create(
+            employee_id='EMP002', name='Jane Roe', email='jane@example.com',
+            department=department('Sales')
+        )
+        self.start = date(2024, 2, 1)
+        Attendance.objects.create(employee=self.engineer, date=date(2024, 2, 1), status='Present')
+        Attendance.objects.create(employee=self.seller, date=date(2024, 2, 29), status='Absent')
+        AttendanceArchive.objects.create(employee=self.engineer, date=date(2024, 2, 2), status='Absent')
+
+    def get_matrix(self, **params):
+        params.setdefault('month', '2024-02')
+        return self.client.get('/api/attendance/matrix/', params)
+
+    def check_grid(self):
+        response = self.get_matrix()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(len(data['days']), 29)
+        self.assertEqual(data['employee_id'], ['EMP001', 'EMP002'])
+        self.assertEqual(data['cells'][0][:3], [1, 2, 0])
+        self.assertEqual(data['cells'][1][28], 2)
+        self.assertEqual(data['totals'], {'Present': [1, 0], 'Absent': [1, 1]})
+        self.assertIsNone(data['next_cursor'])
+
+    def test_grid(self):
+        """Test that hot and archived records land in the right cells."""
+        self.check_grid()
+
+    def test_grid_without_numpy(self):
+        """Test the pure-Python fallback gives the same grid."""
+        with mock.patch.object(matrix, 'np', None):
+            self.check_grid()
+
+    def test_department_filter_and_blocks(self):
+        """Test department filtering and employee-block pagination."""
+        data = self.get_matrix(department='Sales').data['data']
+        self.assertEqual(data['employee_id'], ['EMP002'])
+
+        first = self.get_matrix(page_size=1).data['data']
+        self.assertEqual(first['employee_id'], ['EMP001'])
+        second = self.get_matrix(page_size=1, cursor=first['next_cursor']).data['data']
+        self.assertEqual(second['employee_id'], ['EMP002'])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_csv_export(self):
+        """Test that the grid streams as CSV across employee blocks."""
+        response = self.get_matrix(export='csv', page_size=1)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('employee_id,name,department,2024-02-01,2024-02-02'))
+        self.assertTrue(lines[1].startswith('EMP001,John Doe,Engineering,Present,Absent,,'))
+
+    def test_invalid_range_rejected(self):
+        """Test that malformed or oversized ranges return 400."""
+        self.assertEqual(self.get_matrix(month='2024-13').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/attendance/matrix/', {'start': '2020-01-01', 'end': '2024-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AttendanceAnalyticsTestCase(TestCase):
+    """
+    Test cases for the vectorized attendance analytics.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.steady = Employee.objects.create(
+            employee_id='EMP001', name='John Doe', email='john@example.com',
+            department=department('Engineering')
+        )
+        self.fading = Employee.objects.create(
+            employee_id='EMP002', name='Jane Roe', email='jane@example.com',
+            department=department('Sales')
+        )
+        # Four weeks from Monday 2024-01-01, weekdays only: EMP001 is absent
+        # every Monday and Friday, EMP002 is present for two weeks and then
+        # absent for two.
+        self.start, self.end = date(2024, 1, 1), date(2024, 1, 28)
+        for offset in range(28):
+            day = self.start + timedelta(days=offset)
+            if day.weekday() > 4:
+                continue
+            steady = 'Absent' if day.weekday() in (0, 4) else 'Present'
+            model = AttendanceArchive if offset == 0 else Attendance
+            model.objects.create(employee=self.steady, date=day, status=steady)
+            Attendance.objects.create(
+                employee=self.fading, date=day, status='Present' if offset < 14 else 'Absent'
+            )
+        # Superseded by the hot record for the same day.
+        AttendanceArchive.objects.create(employee=self.fading, date=date(2024, 1, 15), status='Present')
+
+    def engines(self):
+        return ['python'] if analytics.np is None else ['numpy', 'python']
+
+    def test_metrics(self):
+        """Test every metric with each available engine."""
+        data = analytics.load(self.start, self.end)
+        self.assertEqual(len(data), 40)
+        for engine in self.engines():
+            with self.subTest(engine=engine):
+                self.assertEqual(analytics.longest_absence_streaks(data, engine), [
+                    (2, date(2024, 1, 22)), (10, date(2024, 1, 26))
+                ])
+                rates = analytics.rolling_rates(data, window=7, engine=engine)
+                self.assertEqual(rates['latest'], [60.0, 0.0])
+                self.assertEqual(rates['series'][0], (self.start, 50.0))
+                self.assertEqual(rates['series'][-1], (self.end, 30.0))
+                self.assertEqual(analytics.weekday_skew(data, engine), [100.0, 0.0])
+                steady, fading = analytics.attendance_trends(data, engine)
+                self.assertGreater(steady, -analytics.TREND_DOWN_THRESHOLD)
+                self.assertLess(fading, -analytics.TREND_DOWN_THRESHOLD)
+
+    @unittest.skipIf(analytics.np is None, 'NumPy is not installed')
+    def test_engines_agree_on_synthetic_data(self):
+        """Test the NumPy and pure-Python engines give identical results."""
+        data = analytics.synthetic(50, 120, absent_rate=0.3)
+        for func in (
+            analytics.longest_absence_streaks, analytics.weekday_skew, analytics.attendance_trends
+        ):
+            self.assertEqual(func(data, 'numpy'), func(data, 'python'))
+        self.assertEqual(
+            analytics.rolling_rates(data, engine='numpy'), analytics.rolling_rates(data, engine='python')
+        )
+
+    def test_api(self):
+        """Test the analytics endpoints rank employees and validate input."""
+        params = {'start': '2024-01-01', 'end': '2024-01-28'}
+        response = self.client.get('/api/attendance/analytics/absence_streaks/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = response.data['data']['employees']
+        self.assertEqual([row['employee_id'] for row in rows], ['EMP002', 'EMP001'])
+        self.assertEqual(rows[0]['longest_streak'], 10)
+
+        data = self.client.get('/api/attendance/analytics/weekday_skew/', params).data['data']
+        self.assertEqual(data['employees'], [
+            {'employee_id': 'EMP001', 'name': 'John Doe', 'department': 'Engineering', 'skew': 100.0}
+        ])
+        data = self.client.get('/api/attendance/analytics/trending_down/', params).data['data']
+        self.assertEqual([row['employee_id'] for row in data['employees']], ['EMP002'])
+        data = self.client.get(
+            '/api/attendance/analytics/rolling_rates/', dict(params, window=7, department='Engineering')
+        ).data['data']
+        self.assertEqual(data['lowest'][0]['rate'], 60.0)
+        self.assertEqual(len(data['series']), 28)
+
+        response = self.client.get('/api/attendance/analytics/unknown/', params)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(
+            '/api/attendance/analytics/absence_streaks/', {'start': '2024-02-01', 'end': '2024-01-01'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_command(self):
+        """Test the report and benchmark modes of attendance_analytics."""
+        out = StringIO()
+        call_command(
+            'attendance_analytics', 'absence_streaks', '--start', '2024-01-01', '--end', '2024-01-28',
+            stdout=out
+        )
+        self.assertIn('EMP002  Jane Roe', out.getvalue())
+
+        out = StringIO()
+        call_command('attendance_analytics', '--benchmark', '--employees', '20', '--days', '30', stdout=out)
+        self.assertIn('600 records synthetic', out.getvalue())
+        self.assertIn('trending_down', out.getvalue())
+
+
+class WorkCalendarTestCase(TestCase):
+    """
+    Test cases for working-day counts and the rates built on them.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        WorkCalendar.objects.clear_cache()
+        self.client = APIClient()
+        self.employee = Employee.objects.create(
+            employee_id='EMP001', name='John Doe', email='john@example.com',
+            department=department('Engineering')
+        )
+
+    def test_working_days(self):
+        """Test weekday counts with holidays, working weekends and year boundaries."""
+        days = WorkCalendar.objects.working_days
+        self.assertEqual(days(date(2024, 1, 1), date(2024, 1, 31)), 23)
+        self.assertEqual(days(date(2023, 12, 25), date(2024, 1, 5)), 10)
+        self.assertEqual(days(date(2024, 1, 6), date(2024, 1, 7)), 0)
+        self.assertEqual(days(date(2024, 1, 2), date(2024, 1, 1)), 0)
+        self.assertEqual(days(date(2022, 1, 1), date(2024, 12, 31)), 260 + 260 + 262)
+
+        WorkCalendar.objects.create(date=date(2024, 1, 1), name='New Year')
+        WorkCalendar.objects.create(date=date(2024, 1, 6), is_working=True)
+        self.assertEqual(days(date(2024, 1, 1), date(2024, 1, 31)), 23)
+        self.assertEqual(days(date(2023, 12, 25), date(2024, 1, 5)), 9)
+        self.assertFalse(WorkCalendar.objects.is_working_day(date(2024, 1, 1)))
+        self.assertTrue(WorkCalendar.objects.is_working_day(date(2024, 1, 6)))
+
+    def test_history_rate_uses_working_days(self):
+        """Test that the history rate is present days over working days."""
+        WorkCalendar.objects.create(date=date(2024, 1, 1), name='New Year')
+        for offset, record_status in enumerate(['Present', 'Present', 'Absent']):
+            Attendance.objects.create(
+                employee=self.employee, date=date(2024, 1, 2) + timedelta(days=offset), status=record_status
+            )
+        response = self.client.get('/api/attendance/by_employee/', {
+            'employee_id': 'EMP001', 'start': '2024-01-01', 'end': '2024-01-07'
+        })
+        data = response.data['data']
+        self.assertEqual((data['total_days'], data['working_days']), (3, 4))
+        self.assertEqual(data['attendance_rate'], 50.0)
+
+        data = self.client.get('/api/attendance/by_employee/', {'employee_id': 'EMP001'}).data['data']
+        self.assertEqual(
+            data['working_days'], WorkCalendar.objects.working_days(date(2024, 1, 2), date.today())
+        )
+
+    def test_statistics_report_working_days(self):
+        """Test that dashboard statistics expose the working-day basis."""
+        data = self.client.get('/api/attendance/statistics/').data['data']
+        today = date.today()
+        self.assertEqual(
+            data['working_days'], WorkCalendar.objects.working_days(today.replace(day=1), today)
+        )
+        self.assertEqual(data['is_working_day'], today.weekday() < 5)
+
+
+class RequestProfilingTestCase(TestCase):
+    """
+    Test cases for the on-demand request profiler.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        reports = tempfile.TemporaryDirectory()
+        self.addCleanup(reports.cleanup)
+        overrides = override_settings(PROFILE_REPORTS_DIR=reports.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.staff = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        Employee.objects.create(
+            employee_id='EMP001', name='John Doe', email='john@example.com',
+            department=department('Engineering')
+        )
+
+    def test_staff_request_is_profiled(self):
+        """Test that a staff request with the header stores a full report."""
+        self.client.force_login(self.staff)
+        response = self.client.get('/api/attendance/statistics/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = ProfileReport.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((report.trigger, report.user, report.status_code), ('staff', 'admin', 200))
+        self.assertGreater(report.sql_count, 0)
+        self.assertTrue(any('views.py' in frame for query in report.queries for frame in query['origin']))
+        self.assertIn('cumulative', report.summary)
+        self.assertTrue(profiling.report_path(report.stats_file).exists())
+        with open(profiling.report_path(report.collapsed_file)) as collapsed:
+            for line in collapsed:
+                stack, microseconds = line.rsplit(' ', 1)
+                self.assertGreater(int(microseconds), 0)
+
+        response = self.client.get(f'/admin/employees/profilereport/{report.pk}/change/')
+        self.assertContains(response, 'SQL queries')
+        response = self.client.get(f'/admin/employees/profilereport/{report.pk}/download/collapsed/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_stack_sampler_collapses_frames(self):
+        """Test that stack samples are collapsed outermost first."""
+        def outer():
+            return inner()
+
+        def inner():
+            sampler.sample(250)
+
+        sampler = profiling.StackSampler(threading.get_ident(), sys._getframe())
+        outer()
+        outer()
+        [(stack, microseconds)] = sampler.stacks.items()
+        self.assertEqual([frame.split(' ')[0] for frame in stack.split(';')], ['outer', 'inner', 'sample'])
+        self.assertEqual(microseconds, 500)
+
+    def test_only_staff_or_sampling_triggers(self):
+        """Test that anonymous requests are only profiled when sampled."""
+        response = self.client.get('/api/attendance/statistics/', {'profile': '1'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(ProfileReport.objects.exists())
+
+        with override_settings(PROFILE_SAMPLE_RATE=1.0):
+            response = self.client.get('/api/employees/')
+        self.assertEqual(ProfileReport.objects.get(pk=response['X-Profile-Id']).trigger, 'sampled')
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Test cases for the query-plan snapshot and index advisor.
+    """
+
+    def test_plans_match_snapshot(self):
+        """Test that no representative query plan regressed."""
+        out = StringIO()
+        call_command('index_advisor', '--check', stdout=out)
+        self.assertIn('match the sqlite snapshot', out.getvalue())
+
+    def test_regression_fails_check(self):
+        """Test that a query losing its index fails the check."""
+        queries = dict(queryplans.REPRESENTATIVE_QUERIES)
+        queries['employee_by_email'] = queryplans.Representative(
+            'GET /api/employees/', lambda: Employee.objects.filter(name='John Doe'), False
+        )
+        with mock.patch.object(queryplans, 'REPRESENTATIVE_QUERIES', queries):
+            with self.assertRaisesMessage(CommandError, 'employee_by_email: full scan of employees_employee'):
+                call_command('index_advisor', '--check', stdout=StringIO())
+
+    def test_no_unused_or_redundant_indexes(self):
+        """Test that every non-unique index is used and none duplicates another."""
+        unused, redundant = queryplans.index_report(queryplans.analyze())
+        self.assertEqual((unused, redundant), ([], []))
+
+
+class SparseFieldsTestCase(TestCase):
+    """
+    Test cases for ?fields= / ?expand= on employee and attendance reads.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.employee = Employee.objects.create(
+            employee_id='EMP001', name='John Doe', email='john@example.com',
+            department=department('Engineering')
+        )
+        self.today = date.today()
+        for offset in range(3):
+            Attendance.objects.create(
+                employee=self.employee,
+                date=self.today - timedelta(days=offset),
+                status='Present' if offset else 'Absent'
+            )
+        counters.rebuild([self.employee.pk])
+
+    def test_fields_limit_employee_list(self):
+        """Test that only the requested fields are returned."""
+        response = self.client.get('/api/employees/', {'fields': 'employee_id,name'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'], [{'employee_id': 'EMP001', 'name': 'John Doe'}])
+
+    def test_expand_attendance_summary(self):
+        """Test that attendance_summary is only present when expanded."""
+        response = self.client.get('/api/employees/')
+        self.assertNotIn('attendance_summary', response.data['data'][0])
+
+        response = self.client.get(
+            '/api/employees/', {'fields': 'employee_id', 'expand': 'attendance_summary'}
+        )
+        self.assertEqual(response.data['data'], [{
+            'employee_id': 'EMP001',
+            'attendance_summary': {'total': 3, 'present': 2, 'absent': 1},
+        }])
+
+    def test_nested_fields_and_expand(self):
+        """Test dotted names on the nested employee of attendance records."""
+        response = self.client.get('/api/attendance/', {
+            'fields': 'date,employee.name',
+            'expand': 'employee.attendance_summary',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        record = response.data['data'][0]
+        self.assertEqual(set(record), {'date', 'employee'})
+        self.assertEqual(record['employee'], {
+            'name': 'John Doe',
+            'attendance_summary': {'total': 3, 'present': 2, 'absent': 1},
+        })
+
+    def test_selection_is_pushed_into_sql(self):
+        """Test that unselected columns are not fetched and relations are joined."""
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get('/api/attendance/', {'fields': 'status,employee.employee_id'})
+        self.assertEqual(len(response.data['data']), 3)
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('JOIN', sql)
+        self.assertNotIn('"employees_attendance"."created_at"', sql)
+        self.assertNotIn('"employees_employee"."email"', sql)
+
+    def test_history_honours_fields(self):
+        """Test that by_employee applies the selection to its records."""
+        response = self.client.get(
+            '/api/attendance/by_employee/', {'employee_id': 'EMP001', 'fields': 'date,status'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['data']['records'][0]), {'date', 'status'})
+
+    def test_unknown_field_is_rejected(self):
+        """Test that unknown or write-only names return 400."""
+        for params in ({'fields': 'salary'}, {'fields': 'employee.salary'}, {'expand': 'name.x'}):
+            response = self.client.get('/api/attendance/', params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+        response = self.client.get('/api/attendance/', {'fields': 'employee_id'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('employee_id', str(response.data))
+
+
+class AdmissionControlTestCase(TestCase):
+    """
+    Test cases for request coalescing and per-endpoint admission control.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        Employee.objects.create(
+            employee_id='EMP001', name='John Doe', email='john@example.com',
+            department=department('Engineering')
+        )
+
+    def get(self, path):
+        return Request(RequestFactory().get(path))
+
+    def test_concurrent_identical_requests_share_one_computation(self):
+        """Test that followers wait for the leader and get a copy of its response."""
+        calls = []
+        release = threading.Event()
+
+        @admission.coalesced
+        def view(viewset, request):
+            calls.append(request)
+            release.wait(5)
+            return Response({'calls': len(calls)})
+
+        responses = {}
+
+        def leader():
+            responses['leader'] = view(None, self.get('/api/attendance/statistics/?b=2&a=1'))
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        key = admission.request_key(view.__wrapped__, self.get('/api/attendance/statistics/?a=1&b=2'))
+        while key not in admission._flights._calls:
+            time.sleep(0.001)
+        follower = threading.Thread(
+            target=lambda: responses.setdefault(
+                'follower', view(None, self.get('/api/attendance/statistics/?a=1&b=2'))
+            )
+        )
+        follower.start()
+        while admission._flights._calls[key].followers == 0:
+            time.sleep(0.001)
+        release.set()
+        thread.join()
+        follower.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(responses['follower'].data, {'calls': 1})
+        self.assertEqual(responses['follower'][admission.COALESCED_HEADER], 'true')
+        self.assertNotIn(admission.COALESCED_HEADER, responses['leader'])
+        self.assertEqual(admission._flights._calls, {})
+
+    @override_settings(
+        EXPENSIVE_READ_QUEUE=1, EXPENSIVE_READ_QUEUE_TIMEOUT=0.05, EXPENSIVE_READ_COALESCE_TIMEOUT=0.05
+    )
+    def test_followers_are_bounded_in_number_and_wait(self):
+        """Test that followers of a slow leader are shed with 503 instead of piling up."""
+        release = threading.Event()
+
+        @admission.coalesced
+        def view(viewset, request):
+            release.wait(5)
+            return Response({'ok': True})
+
+        path = '/api/attendance/statistics/'
+        key = admission.request_key(view.__wrapped__, self.get(path))
+        responses = {}
+        leader = threading.Thread(target=lambda: responses.setdefault('leader', view(None, self.get(path))))
+        leader.start()
+        while key not in admission._flights._calls:
+            time.sleep(0.001)
+
+        # A follower gives up after the queue plus coalesce timeouts
+        response = view(None, self.get(path))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(admission._flights._calls[key].followers, 0)
+
+        # Beyond EXPENSIVE_READ_QUEUE followers, requests are shed at once
+        with override_settings(EXPENSIVE_READ_COALESCE_TIMEOUT=5):
+            follower = threading.Thread(
+                target=lambda: responses.setdefault('follower', view(None, self.get(path)))
+            )
+            follower.start()
+            while admission._flights._calls[key].followers == 0:
+                time.sleep(0.001)
+            started = time.monotonic()
+            response = view(None, self.get(path))
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertLess(time.monotonic() - started, 0.05)
+            release.set()
+            leader.join()
+            follower.join()
+        self.assertEqual(responses['follower'].data, {'ok': True})
+        self.assertEqual(responses['follower'][admission.COALESCED_HEADER], 'true')
+
+    def test_different_requests_are_not_coalesced(self):
+        """Test that the query string is part of the coalescing key."""
+        first = admission.request_key(AttendanceViewSet.by_date, self.get('/x/?date=2024-01-01'))
+        second = admission.request_key(AttendanceViewSet.by_date, self.get('/x/?date=2024-01-02'))
+        self.assertNotEqual(first, second)
+
+    @override_settings(EXPENSIVE_READ_CONCURRENCY=1, EXPENSIVE_READ_QUEUE=0)
+    def test_saturated_endpoint_sheds_with_503(self):
+        """Test that a full gate sheds reads but leaves writes alone."""
+        with admission.gate_for('statistics').admit():
+            response = self.client.get('/api/attendance/statistics/')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response['Retry-After'], '2')
+            self.assertEqual(response.data['message'], 'Server busy.')
+
+            response = self.client.post('/api/attendance/', {
+                'employee_id': 'EMP001', 'date': date.today().isoformat(), 'status': 'Present'
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            response = self.client.get('/api/attendance/by_date/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get('/api/attendance/statistics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(EXPENSIVE_READ_CONCURRENCY=1, EXPENSIVE_READ_QUEUE=0)
+    def test_streaming_export_holds_its_slot_until_sent(self):
+        """Test that a concurrent export is shed while another is still streaming."""
+        streaming = self.client.get('/api/attendance/matrix/?export=csv')
+        self.assertEqual(streaming.status_code, status.HTTP_200_OK)
+        content = iter(streaming.streaming_content)
+        header = next(content)
+
+        response = self.client.get('/api/attendance/matrix/?export=csv&department=Engineering')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        body = header + b''.join(content)
+        self.assertIn(b'EMP001', body)
+        response = self.client.get('/api/attendance/matrix/?export=csv&department=Engineering')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+
+        # A response closed before it is read gives its slot back too
+        self.assertEqual(self.client.get('/api/attendance/matrix/?export=csv').status_code, status.HTTP_200_OK)
+
+    def test_queued_request_waits_for_a_slot(self):
+        """Test that a queued request is admitted once a slot frees up."""
+        gate = admission.AdmissionGate('test', limit=1, queue=1, timeout=5)
+        held = threading.Event()
+
+        def hold():
+            with gate.admit():
+                held.set()
+                time.sleep(0.05)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait(5)
+        with gate.admit():
+            self.assertEqual(gate.waiting, 0)
+        thread.join()
+
+        with gate.admit():
+            gate.queue = 0
+            with self.assertRaises(admission.Overloaded):
+                with gate.admit():
+                    pass
+
+
+@unittest.skipIf(columnar.pa is None, 'PyArrow is not installed')
+class ColumnarExportTestCase(TestCase):
+    """
+    Test cases for the Arrow/Parquet attendance exports.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.today = date.today()
+        self.old_date = self.today - timedelta(days=400)
+        for index, name in enumerate(('Engineering', 'Sales')):
+            employee = Employee.objects.create(
+                employee_id=f'EMP00{index + 1}', name=f'Employee {index + 1}',
+                email=f'employee{index + 1}@example.com', department=department(name)
+            )
+            for offset in range(3):
+                Attendance.objects.create(
+                    employee=employee, date=self.today - timedelta(days=offset),
+                    status='Absent' if offset == 1 else 'Present'
+                )
+            AttendanceArchive.objects.create(employee=employee, date=self.old_date, status='Absent')
+
+    def read(self, response, file_type):
+        import pyarrow.parquet as pq
+        data = columnar.pa.py_buffer(b''.join(response.streaming_content))
+        if file_type == 'parquet':
+            return pq.read_table(columnar.pa.BufferReader(data))
+        return columnar.pa.ipc.open_file(data).read_all()
+
+    def test_parquet_export_streams_joined_records(self):
+        """Test that the export includes department, status and archived rows."""
+        response = self.client.get('/api/attendance/export/', {
+            'start': self.old_date.isoformat(), 'end': self.today.isoformat()
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        table = self.read(response, 'parquet')
+        self.assertEqual(table.num_rows, 8)
+        self.assertEqual(table.column_names, ['employee_id', 'name', 'department', 'date', 'status'])
+        rows = table.to_pylist()
+        self.assertEqual(rows[0], {
+            'employee_id': 'EMP001', 'name': 'Employee 1', 'department': 'Engineering',
+            'date': self.old_date, 'status': 'Absent',
+        })
+        self.assertEqual(sum(row['status'] == 'Absent' for row in rows), 4)
+
+    def test_arrow_export_in_small_batches_by_department(self):
+        """Test the Arrow file written across several record batches."""
+        with mock.patch.object(columnar, 'BATCH_SIZE', 2):
+            response = self.client.get('/api/attendance/export/', {
+                'type': 'arrow', 'department': 'Sales', 'start': self.old_date.isoformat()
+            })
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            table = self.read(response, 'arrow')
+        self.assertEqual(len(table.to_batches()), 2)
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(set(table.column('department').to_pylist()), {'Sales'})
+
+    def test_invalid_or_unavailable_export(self):
+        """Test that a bad type is a 400 and a missing PyArrow a 501."""
+        response = self.client.get('/api/attendance/export/', {'type': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with mock.patch.object(columnar, 'pa', None):
+            response = self.client.get('/api/attendance/export/')
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    def test_partitioned_export_command(self):
+        """Test that --partition writes one file per day with data."""
+        import pyarrow.parquet as pq
+        with tempfile.TemporaryDirectory() as directory:
+            out = StringIO()
+            call_command(
+                'export_attendance', '--partition', 'day', '--output', directory,
+                '--start', self.old_date.isoformat(), stdout=out
+            )
+            self.assertIn('Exported 8 record(s)', out.getvalue())
+            self.assertIn('into 4 file(s)', out.getvalue())
+            table = pq.read_table(directory)
+            self.assertEqual(table.num_rows, 8)
+            self.assertIn('day', table.column_names)
+
+    def test_export_job_writes_parquet(self):
+        """Test the background attendance_export job with format=parquet."""
+        import pyarrow.parquet as pq
+        with tempfile.TemporaryDirectory() as results, override_settings(JOB_RESULTS_DIR=results):
+            job = jobs.submit('attendance_export', {
+                'start': (self.today - timedelta(days=7)).isoformat(),
+                'end': self.today.isoformat(),
+                'format': 'parquet',
+            })
+            self.assertEqual(jobs.execute(job.pk), Job.SUCCEEDED)
+            job.refresh_from_db()
+            self.assertEqual(job.result_content_type, 'application/vnd.apache.parquet')
+            self.assertEqual(pq.read_table(str(jobs.result_path(job))).num_rows, 6)
+
+
+class CaseInsensitiveKeysTestCase(TestCase):
+    """
+    Test cases for normalized, case-insensitively unique employee IDs and emails.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        self.client = APIClient()
+        self.payload = {
+            'employee_id': ' emp009 ',
+            'name': 'John Doe',
+            'email': 'John.Doe@Example.COM',
+            'department': 'Engineering'
+        }
+
+    def test_keys_are_stored_normalized(self):
+        """Test that employee_id is stored upper case and email lower case."""
+        response = self.client.post('/api/employees/', self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        employee = Employee.objects.get()
+        self.assertEqual((employee.employee_id, employee.email), ('EMP009', 'john.doe@example.com'))
+
+        response = self.client.get('/api/employees/emp009/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['employee_id'], 'EMP009')
+
+    def test_update_and_delete_match_ids_case_insensitively(self):
+        """Test that PATCH and DELETE accept a lowercase employee ID."""
+        self.client.post('/api/employees/', self.payload, format='json')
+        response = self.client.patch('/api/employees/emp009/', {'name': 'Jane Doe'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Employee.objects.get().name, 'Jane Doe')
+
+        response = self.client.delete('/api/employees/emp009/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Employee.objects.exists())
+
+    def test_duplicates_differing_by_case_are_rejected(self):
+        """Test that the API rejects IDs and emails that only differ by case."""
+        self.client.post('/api/employees/', self.payload, format='json')
+        response = self.client.post(
+            '/api/employees/', dict(self.payload, email='other@example.com', employee_id='Emp009'),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('employee_id', response.data['error'])
+        response = self.client.post(
+            '/api/employees/', dict(self.payload, employee_id='EMP010', email='JOHN.DOE@example.com'),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data['error'])
+
+    def test_functional_indexes_enforce_uniqueness(self):
+        """Test that writes bypassing normalization still hit the unique indexes."""
+        Employee.objects.create(
+            employee_id='EMP009', name='John Doe', email='john@example.com',
+            department=department('Engineering')
+        )
+        for employee_id, email in (('emp009', 'other@example.com'), ('EMP010', 'JOHN@example.com')):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                Employee.objects.bulk_create([Employee(
+                    employee_id=employee_id, name='Jane Doe', email=email,
+                    department=department('Sales')
+                )])
+
+    def test_lookups_use_functional_indexes(self):
+        """Test that case-insensitive lookups are answered from the indexes."""
+        plan = Employee.objects.filter(email__lower='john@example.com').explain()
+        self.assertIn('unique_employee_email_ci', plan)
+        plan = Employee.objects.filter(employee_id__upper='EMP009').explain()
+        self.assertIn('unique_employee_id_ci', plan)
+
+
+class CloseAttendanceDayTestCase(TestCase):
+    """
+    Test cases for the end-of-day auto-absent close.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        WorkCalendar.objects.clear_cache()
+        self.today = date.today()
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP00{index}', name=f'Employee {index}',
+                email=f'employee{index}@example.com', department=department('Engineering')
+            )
+            for index in range(1, 4)
+        ]
+        Employee.objects.update(created_at=timezone.now() - timedelta(days=800))
+        Attendance.objects.create(employee=self.employees[0], date=self.today, status='Present')
+        counters.rebuild()
+
+    def test_close_marks_unmarked_employees_once(self):
+        """Test one INSERT marks the rest absent and a rerun inserts nothing."""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(upsert.close_day(self.today), 2)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            Attendance.objects.filter(date=self.today, status='Absent').count(), 2
+        )
+        self.assertEqual(counters.get_counts(self.employees[1].pk), (1, 0, 1))
+        self.assertEqual(counters.find_mismatches(), {})
+
+        self.assertEqual(upsert.close_day(self.today), 0)
+        self.assertEqual(Attendance.objects.filter(date=self.today).count(), 3)
+
+        response = APIClient().get('/api/attendance/statistics/')
+        self.assertEqual(response.data['data']['not_marked_today'], 0)
+
+    def test_new_and_archived_employees_are_skipped(self):
+        """Test that later hires and archived records are not marked."""
+        old_day = self.today - timedelta(days=400)
+        AttendanceArchive.objects.create(employee=self.employees[1], date=old_day, status='Present')
+        Employee.objects.filter(pk=self.employees[2].pk).update(created_at=timezone.now())
+        self.assertEqual(upsert.close_day(old_day, dry_run=True), 1)
+        self.assertEqual(upsert.close_day(old_day), 1)
+        self.assertEqual(
+            list(Attendance.objects.filter(date=old_day).values_list('employee_id', flat=True)),
+            [self.employees[0].pk]
+        )
+
+    def test_range_skips_days_off(self):
+        """Test that backfills only close working days."""
+        start = self.today - timedelta(days=13)
+        holiday = next(
+            start + timedelta(days=offset) for offset in range(14)
+            if (start + timedelta(days=offset)).weekday() < 5
+        )
+        WorkCalendar.objects.create(date=holiday, name='Holiday')
+        closed = upsert.close_days(start, self.today - timedelta(days=1))
+        self.assertNotIn(holiday, closed)
+        self.assertEqual(len(closed), WorkCalendar.objects.working_days(start, self.today - timedelta(days=1)))
+        self.assertTrue(all(marked == 3 for marked in closed.values()))
+
+    def test_command_backfill_and_dry_run(self):
+        """Test the close_attendance_day command."""
+        start = (self.today - timedelta(days=6)).isoformat()
+        out = StringIO()
+        call_command(
+            'close_attendance_day', '--start', start, '--include-non-working', '--dry-run', stdout=out
+        )
+        self.assertIn('Would mark 20 absence(s) across 7 day(s).', out.getvalue())
+        self.assertEqual(Attendance.objects.count(), 1)
+
+        call_command('close_attendance_day', '--start', start, '--include-non-working', stdout=StringIO())
+        self.assertEqual(Attendance.objects.count(), 21)
+        with self.assertRaisesMessage(CommandError, 'future'):
+            call_command('close_attendance_day', '--date', (self.today + timedelta(days=1)).isoformat())
+
+
+class AttendanceRangeMarkTestCase(TestCase):
+    """
+    Test cases for marking attendance over a date range.
+    """
+
+    def setUp(self):
+        employee_directory.clear()
+        WorkCalendar.objects.clear_cache()
+        self.client = APIClient()
+        self.end = date.today()
+        self.start = self.end - timedelta(days=13)
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP00{index}', name=f'Employee {index}',
+                email=f'employee{index}@example.com', department=department('Engineering')
+            )
+            for index in range(1, 4)
+        ]
+        self.working_days = [
+            self.start + timedelta(days=offset) for offset in range(14)
+            if WorkCalendar.objects.is_working_day(self.start + timedelta(days=offset))
+        ]
+        Attendance.objects.create(employee=self.employees[0], date=self.working_days[0], status='Present')
+        Attendance.objects.create(employee=self.employees[1], date=self.working_days[0], status='Absent')
+        counters.rebuild()
+
+    def payload(self, **extra):
+        return dict({
+            'employee_ids': ['emp001', 'EMP002', 'EMP003', 'EMP404'],
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'status': 'Absent',
+        }, **extra)
+
+    def test_marks_working_days_with_one_insert(self):
+        """Test that rows are generated by one INSERT and conflicts are kept."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/attendance/range/', self.payload(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+
+        data = response.data['data']
+        days = len(self.working_days)
+        self.assertEqual(data['days'], days)
+        self.assertEqual(data['created'], 3 * days - 2)
+        self.assertEqual(data['updated'], 0)
+        self.assertEqual(data['unchanged'], 1)
+        self.assertEqual(data['conflict_count'], 1)
+        self.assertEqual(data['conflicts'], [{
+            'employee_id': 'EMP001', 'date': self.working_days[0], 'status': 'Present', 'archived': False,
+        }])
+        self.assertEqual(data['not_found'], ['EMP404'])
+        self.assertEqual(
+            Attendance.objects.get(employee=self.employees[0], date=self.working_days[0]).status, 'Present'
+        )
+        self.assertFalse(
+            Attendance.objects.exclude(date__in=self.working_days).exists()
+        )
+        self.assertEqual(counters.find_mismatches(), {})
+
+    def test_overwrite_and_all_days(self):
+        """Test overwrite replaces conflicts and days off can be included."""
+        response = self.client.post(
+            '/api/attendance/range/',
+            self.payload(overwrite=True, working_days_only=False),
+            format='json'
+        )
+        data = response.data['data']
+        self.assertEqual(data['days'], 14)
+        self.assertEqual(data['created'], 3 * 14 - 2)
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual(data['conflicts'], [])
+        self.assertEqual(Attendance.objects.filter(status='Absent').count(), 42)
+        self.assertEqual(counters.find_mismatches(), {})
+
+        response = self.client.post(
+            '/api/attendance/range/',
+            self.payload(overwrite=True, working_days_only=False),
+            format='json'
+        )
+        self.assertEqual(response.data['data']['created'], 0)
+        self.assertEqual(response.data['data']['unchanged'], 42)
+
+    def test_archived_days_are_conflicts(self):
+        """Test that days with an archived record are reported and skipped."""
+        old_day = self.end - timedelta(days=400)
+        AttendanceArchive.objects.create(employee=self.employees[1], date=old_day, status='Present')
+        result = upsert.mark_range(
+            [employee.pk for employee in self.employees], [old_day], 'Absent', overwrite=True
+        )
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(result['conflicts'], [(self.employees[1].pk, old_day, 'Present', True)])
+        self.assertFalse(Attendance.objects.filter(employee=self.employees[1], date=old_day).exists())
+
+    def test_validation(self):
+        """Test that future, reversed and overlong ranges are rejected."""
+        for extra in (
+            {'end': (self.end + timedelta(days=1)).isoformat()},
+            {'start': self.end.isoformat(), 'end': self.start.isoformat()},
+            {'start': (self.end - timedelta(days=400)).isoformat()},
+            {'status': 'Leave'},
+        ):
+            response = self.client.post('/api/attendance/range/', self.payload(**extra), format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, extra)
+        self.assertEqual(Attendance.objects.count(), 2)
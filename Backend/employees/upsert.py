@@ -0,0 +1,421 @@
+"""
+Single-statement attendance upserts.
+
+Marks are written with ``INSERT ... ON CONFLICT (employee_id, date) DO
+UPDATE``, supported natively by SQLite (3.35+) and PostgreSQL. Unlike
+``update_or_create`` (SELECT, then INSERT or UPDATE) this cannot race into an
+IntegrityError when two requests mark the same employee and date. The status
+being replaced is read under a row lock just before, and ``updated_at`` only
+moves when the status actually changes, so the attendance counters are
+adjusted exactly. Days whose records were archived are updated in the
+archive table instead, so a key never lives in both tables.
+
+``close_day`` marks everyone still unmarked on a day as Absent with a single
+``INSERT ... SELECT ... WHERE NOT EXISTS``, and ``mark_range`` writes one
+status for many employees over many days with one ``INSERT ... SELECT``.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import counters
+from .archive import may_be_archived
+from .models import Attendance, AttendanceArchive, AttendanceCounter, Employee, WorkCalendar
+
+
+UPSERT_COLUMNS = ('employee_id', 'date', 'status', 'created_at', 'updated_at')
+
+# Columns returned by upsert_attendance, in Attendance's concrete field order
+RETURNED_COLUMNS = ('id', 'employee_id', 'date', 'status', 'created_at', 'updated_at')
+
+
+def upsert_attendance(employee, day, record_status):
+    """
+    Mark ``employee`` as ``record_status`` on ``day`` with one upsert.
+
+    The current row is locked and read first so the counters know the
+    status it replaces. A day whose record was archived has that record
+    updated in place instead, and the ``AttendanceArchive`` is returned.
+
+    Returns ``(record, created)``. The counters are updated in the same
+    transaction.
+    """
+    quote = connection.ops.quote_name
+    returning = ', '.join(quote(column) for column in RETURNED_COLUMNS)
+    now = timezone.now()
+    with transaction.atomic():
+        previous = _lock_status(employee.pk, day)
+        if previous is None and may_be_archived(day):
+            archived = _mark_archived({(employee.pk, day): record_status})
+            if archived:
+                record = AttendanceArchive.objects.get(employee_id=employee.pk, date=day)
+                record.employee = employee
+                _apply_counter_deltas({(employee.pk, day): record_status}, archived)
+                return record, False
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{_upsert_sql(1, guarded=False)} RETURNING {returning}',
+                _upsert_params([((employee.pk, day), record_status)], now)
+            )
+            record = _instance_from_row(cursor.fetchone())
+
+        created = record.created_at == record.updated_at == now
+        if not created and previous is None:
+            # Inserted by a concurrent mark after the read: the status it
+            # held is unknown, so recount this employee.
+            counters.rebuild([employee.pk])
+        elif previous != record_status:
+            counters.record_change(
+                employee.pk, added=record_status, removed=None if created else previous
+            )
+
+    record.employee = employee
+    return record, created
+
+
+def upsert_marks(marks):
+    """
+    Write ``{(employee_pk, date): status}`` marks with batched
+    ``INSERT ... ON CONFLICT (employee_id, date) DO UPDATE`` statements and
+    adjust the affected counters. Marks for employees that no longer exist
+    are dropped, and marks for archived records update them in place.
+    Returns the number of marks written.
+    """
+    if not marks:
+        return 0
+
+    with transaction.atomic():
+        live = set(
+            Employee.objects.filter(pk__in={pk for pk, _ in marks}).values_list('pk', flat=True)
+        )
+        marks = {key: value for key, value in marks.items() if key[0] in live}
+        if not marks:
+            return 0
+
+        existing = {
+            (employee_pk, day): record_status
+            for employee_pk, day, record_status in Attendance.objects.select_for_update().filter(
+                employee_id__in={pk for pk, _ in marks},
+                date__in={day for _, day in marks}
+            ).values_list('employee_id', 'date', 'status')
+            if (employee_pk, day) in marks
+        }
+        archived = _mark_archived({
+            key: value for key, value in marks.items()
+            if key not in existing and may_be_archived(key[1])
+        })
+
+        rows = [(key, value) for key, value in marks.items() if key not in archived]
+        chunk_size = (connection.features.max_query_params or 5000) // len(UPSERT_COLUMNS)
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                cursor.execute(_upsert_sql(len(chunk)), _upsert_params(chunk, now))
+
+        _apply_counter_deltas(marks, {**existing, **archived})
+    return len(marks)
+
+
+def close_day(day, dry_run=False):
+    """
+    Mark every employee without a record on ``day`` as Absent with one
+    ``INSERT ... SELECT ... WHERE NOT EXISTS`` and adjust their counters.
+
+    Employees created after ``day`` are skipped, as are employees with an
+    archived record for it. Running it again inserts nothing, and marks made
+    concurrently win (``ON CONFLICT DO NOTHING``). Returns the number of
+    employees marked (or, with ``dry_run``, that would be).
+    """
+    quote = connection.ops.quote_name
+    employee_table = quote(Employee._meta.db_table)
+    day_ends = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    conditions = [f'e.{quote("created_at")} < %s', _not_marked(Attendance)]
+    condition_params = [connection.ops.adapt_datetimefield_value(day_ends)]
+    if may_be_archived(day):
+        conditions.append(_not_marked(AttendanceArchive))
+    where = ' AND '.join(conditions)
+    day_param = connection.ops.adapt_datefield_value(day)
+    condition_params += [day_param] * (len(conditions) - 1)
+
+    if dry_run:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {employee_table} e WHERE {where}', condition_params)
+            return cursor.fetchone()[0]
+
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    absent = Attendance._meta.get_field('status').code_for('Absent')
+    table = quote(Attendance._meta.db_table)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(quote(column) for column in UPSERT_COLUMNS)}) '
+                f'SELECT e.{quote("id")}, %s, %s, %s, %s FROM {employee_table} e WHERE {where} '
+                f'ON CONFLICT ({quote("employee_id")}, {quote("date")}) DO NOTHING '
+                f'RETURNING {quote("employee_id")}',
+                [day_param, absent, now, now] + condition_params
+            )
+            marked = [row[0] for row in cursor.fetchall()]
+        _apply_counter_deltas({(pk, day): 'Absent' for pk in marked}, {})
+    return len(marked)
+
+
+def close_days(start, end, include_non_working=False, dry_run=False):
+    """
+    Run ``close_day`` for each working day in ``[start, end]`` (every day
+    with ``include_non_working``); returns ``{day: employees marked}``.
+    """
+    closed = {}
+    day = start
+    while day <= end:
+        if include_non_working or WorkCalendar.objects.is_working_day(day):
+            closed[day] = close_day(day, dry_run=dry_run)
+        day += timedelta(days=1)
+    return closed
+
+
+def mark_range(employee_pks, days, record_status, overwrite=False):
+    """
+    Mark each employee in ``employee_pks`` as ``record_status`` on each of
+    ``days`` with one ``INSERT ... SELECT`` over employees x days.
+
+    Existing records with another status are conflicts: they are reported
+    and left alone, or replaced when ``overwrite`` is set. Days with an
+    archived record are always conflicts. Counters are adjusted for the rows
+    written. Returns ``{'created', 'updated', 'unchanged', 'conflicts'}``,
+    conflicts being ``(employee_pk, day, existing status, archived)``.
+    """
+    summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'conflicts': []}
+    employee_pks, days = sorted(set(employee_pks)), sorted(set(days))
+    if not employee_pks or not days:
+        return summary
+
+    wanted = set(days)
+    scope = {'employee_id__in': employee_pks, 'date__gte': days[0], 'date__lte': days[-1]}
+    with transaction.atomic():
+        existing = {
+            (employee_pk, day): stored
+            for employee_pk, day, stored in Attendance.objects.select_for_update().filter(
+                **scope
+            ).values_list('employee_id', 'date', 'status')
+            if day in wanted
+        }
+        archived = set()
+        if may_be_archived(days[0]):
+            for employee_pk, day, stored in AttendanceArchive.objects.filter(**scope).values_list(
+                'employee_id', 'date', 'status'
+            ):
+                if day in wanted:
+                    archived.add((employee_pk, day))
+                    summary['conflicts'].append((employee_pk, day, stored, True))
+
+        for (employee_pk, day), stored in sorted(existing.items()):
+            if stored == record_status:
+                summary['unchanged'] += 1
+            elif not overwrite:
+                summary['conflicts'].append((employee_pk, day, stored, False))
+        summary['conflicts'].sort()
+
+        written = _insert_range(employee_pks, days, record_status, overwrite, bool(archived))
+        for key in written:
+            if key in existing:
+                summary['updated'] += 1
+            else:
+                summary['created'] += 1
+        _apply_counter_deltas({key: record_status for key in written}, existing)
+    return summary
+
+
+def _insert_range(employee_pks, days, record_status, overwrite, skip_archived):
+    """
+    Run the employees x days INSERT ... SELECT; return the written
+    ``(employee_pk, day)`` keys.
+    """
+    quote = connection.ops.quote_name
+    table = quote(Attendance._meta.db_table)
+    employee_table = quote(Employee._meta.db_table)
+    day_rows = ' UNION ALL '.join([f'SELECT %s AS {quote("day")}'] * len(days))
+    where = f'e.{quote("id")} IN ({", ".join(["%s"] * len(employee_pks))})'
+    if skip_archived:
+        where += (
+            f' AND NOT EXISTS (SELECT 1 FROM {quote(AttendanceArchive._meta.db_table)} r '
+            f'WHERE r.{quote("employee_id")} = e.{quote("id")} AND r.{quote("date")} = d.{quote("day")})'
+        )
+    if overwrite:
+        conflict = (
+            f'DO UPDATE SET {quote("status")} = excluded.{quote("status")}, '
+            f'{quote("updated_at")} = excluded.{quote("updated_at")} '
+            f'WHERE {table}.{quote("status")} <> excluded.{quote("status")}'
+        )
+    else:
+        conflict = 'DO NOTHING'
+
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    params = [Attendance._meta.get_field('status').code_for(record_status), now, now]
+    params += [connection.ops.adapt_datefield_value(day) for day in days]
+    params += list(employee_pks)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({", ".join(quote(column) for column in UPSERT_COLUMNS)}) '
+            f'SELECT e.{quote("id")}, d.{quote("day")}, %s, %s, %s '
+            f'FROM {employee_table} e CROSS JOIN ({day_rows}) d WHERE {where} '
+            f'ON CONFLICT ({quote("employee_id")}, {quote("date")}) {conflict} '
+            f'RETURNING {quote("employee_id")}, {quote("date")}',
+            params
+        )
+        return {
+            (employee_pk, day if isinstance(day, date) else date.fromisoformat(day))
+            for employee_pk, day in cursor.fetchall()
+        }
+
+
+def _lock_status(employee_pk, day):
+    """
+    Lock an employee's record for ``day`` and return its status, or None.
+
+    A no-op UPDATE rather than SELECT ... FOR UPDATE: it locks the row on
+    PostgreSQL and takes SQLite's write lock up front, where a read followed
+    by a write would fail with "database is locked" instead of waiting.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {quote(Attendance._meta.db_table)} SET {quote("status")} = {quote("status")} '
+            f'WHERE {quote("employee_id")} = %s AND {quote("date")} = %s RETURNING {quote("status")}',
+            [employee_pk, connection.ops.adapt_datefield_value(day)]
+        )
+        row = cursor.fetchone()
+    return None if row is None else _from_db('status', row[0])
+
+
+def _mark_archived(marks):
+    """
+    Update the archived records among ``marks`` in place, with one UPDATE
+    per status; return ``{(employee_pk, date): previous status}`` for every
+    archived record found. The hot table is left alone for those keys.
+    """
+    if not marks:
+        return {}
+    rows = AttendanceArchive.objects.select_for_update().filter(
+        employee_id__in={pk for pk, _ in marks},
+        date__in={day for _, day in marks}
+    ).values_list('pk', 'employee_id', 'date', 'status')
+
+    archived = {}
+    changed = defaultdict(list)
+    for pk, employee_pk, day, stored in rows:
+        key = (employee_pk, day)
+        if key not in marks:
+            continue
+        archived[key] = stored
+        if stored != marks[key]:
+            changed[marks[key]].append(pk)
+    for record_status, pks in changed.items():
+        AttendanceArchive.objects.filter(pk__in=pks).update(status=record_status)
+    return archived
+
+
+def _not_marked(model):
+    quote = connection.ops.quote_name
+    return (
+        f'NOT EXISTS (SELECT 1 FROM {quote(model._meta.db_table)} r '
+        f'WHERE r.{quote("employee_id")} = e.{quote("id")} AND r.{quote("date")} = %s)'
+    )
+
+
+def _apply_counter_deltas(marks, existing):
+    """
+    Apply counter changes with one UPDATE per distinct delta, rebuilding
+    counter rows that do not exist yet.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for key, record_status in marks.items():
+        previous = existing.get(key)
+        if previous == record_status:
+            continue
+        delta = deltas[key[0]]
+        delta[counters.STATUS_COLUMNS[record_status]] += 1
+        if previous is None:
+            delta['total'] += 1
+        else:
+            delta[counters.STATUS_COLUMNS[previous]] -= 1
+
+    groups = defaultdict(list)
+    for employee_pk, delta in deltas.items():
+        groups[tuple(sorted((column, value) for column, value in delta.items() if value))].append(
+            employee_pk
+        )
+
+    missing = []
+    for delta, employee_pks in groups.items():
+        if not delta:
+            continue
+        updates = {column: F(column) + value for column, value in delta}
+        updated = AttendanceCounter.objects.filter(employee_id__in=employee_pks).update(**updates)
+        if updated < len(employee_pks):
+            present = set(
+                AttendanceCounter.objects.filter(employee_id__in=employee_pks)
+                .values_list('employee_id', flat=True)
+            )
+            missing.extend(pk for pk in employee_pks if pk not in present)
+    if missing:
+        counters.rebuild(missing)
+
+
+def _upsert_sql(row_count, guarded=True):
+    """
+    Build the upsert for ``row_count`` rows. Guarded upserts skip rows whose
+    status is unchanged; unguarded ones touch them (so RETURNING always
+    yields the row) but keep their ``updated_at``.
+    """
+    quote = connection.ops.quote_name
+    table = quote(Attendance._meta.db_table)
+    placeholders = '(' + ', '.join(['%s'] * len(UPSERT_COLUMNS)) + ')'
+    changed = f'{table}.{quote("status")} <> excluded.{quote("status")}'
+    sql = (
+        f'INSERT INTO {table} ({", ".join(quote(column) for column in UPSERT_COLUMNS)}) '
+        f'VALUES {", ".join([placeholders] * row_count)} '
+        f'ON CONFLICT ({quote("employee_id")}, {quote("date")}) DO UPDATE SET '
+        f'{quote("status")} = excluded.{quote("status")}, '
+    )
+    if guarded:
+        return sql + f'{quote("updated_at")} = excluded.{quote("updated_at")} WHERE {changed}'
+    return sql + (
+        f'{quote("updated_at")} = CASE WHEN {changed} '
+        f'THEN excluded.{quote("updated_at")} ELSE {table}.{quote("updated_at")} END'
+    )
+
+
+def _upsert_params(rows, now):
+    status_field = Attendance._meta.get_field('status')
+    now = connection.ops.adapt_datetimefield_value(now)
+    params = []
+    for (employee_pk, day), record_status in rows:
+        params.extend([
+            employee_pk,
+            connection.ops.adapt_datefield_value(day),
+            status_field.code_for(record_status),
+            now,
+            now,
+        ])
+    return params
+
+
+def _instance_from_row(row):
+    """
+    Build an Attendance from a RETURNING row, applying the same backend and
+    field converters a queryset would.
+    """
+    values = [_from_db(column, value) for column, value in zip(RETURNED_COLUMNS, row)]
+    return Attendance.from_db(connection.alias, RETURNED_COLUMNS, values)
+
+
+def _from_db(column, value):
+    col = Attendance._meta.get_field(column).cached_col
+    for converter in connection.ops.get_db_converters(col) + col.get_db_converters(connection):
+        value = converter(value, col, connection)
+    return value
@@ -3,11 +3,12 @@ URL configuration for employees app.
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EmployeeViewSet, AttendanceViewSet
+from .views import EmployeeViewSet, AttendanceViewSet, JobViewSet
 
 router = DefaultRouter()
 router.register(r'employees', EmployeeViewSet, basename='employee')
 router.register(r'attendance', AttendanceViewSet, basename='attendance')
+router.register(r'jobs', JobViewSet, basename='job')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -3,40 +3,76 @@ API Views for Employee and Attendance management.
 """
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count
+from django.db import transaction
+from django.db.models import Q, Count, Exists, OuterRef
+from django.utils import timezone
 from datetime import date, datetime, timedelta
-from .models import Employee, Attendance
+import csv
+import io
+from .models import (
+    Department, Employee, Attendance, AttendanceArchive, AttendanceCounter, Job, WorkCalendar
+)
+from . import analytics, columnar, counters, ingest, jobs, upsert
+from .admission import admission_limited, coalesced
+from .archive import may_be_archived
+from .directory import employee_directory
+from .idempotency import idempotent
+from .matrix import build_matrix
+from .pagination import decode_date_cursor, decode_pk_cursor, encode_date_cursor, encode_pk_cursor
+from .routers import ReplicaReadMixin
+from .sparse import SparseFieldsMixin
 from .serializers import (
     EmployeeSerializer,
+    BulkEmployeeUpdateSerializer,
+    BulkEmployeeDeleteSerializer,
     AttendanceSerializer,
+    AttendanceRangeSerializer,
+    ArchivedAttendanceSerializer,
     AttendanceHistorySerializer,
-    DashboardStatsSerializer
+    DashboardStatsSerializer,
+    JobSerializer,
+    JobSubmitSerializer
 )
 from .utils import success_response, error_response
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ReplicaReadMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for Employee CRUD operations.
     
     Endpoints:
     - GET /api/employees/ - List all employees
+    - GET /api/employees/?ids=EMP001,EMP002,42 - Retrieve many employees at once
     - POST /api/employees/ - Create a new employee
     - GET /api/employees/{id}/ - Retrieve an employee
     - PUT /api/employees/{id}/ - Update an employee
     - PATCH /api/employees/{id}/ - Partial update an employee
     - DELETE /api/employees/{id}/ - Delete an employee
     - GET /api/employees/search/?q=query - Search employees
+    - PATCH /api/employees/bulk/ - Update many employees in one statement
+    - DELETE /api/employees/bulk/ - Delete many employees and their attendance
+
+    Reads accept ?fields=employee_id,name to return only those fields and
+    ?expand=attendance_summary to add the employee's attendance totals.
+
+    POST and bulk requests honour an Idempotency-Key header.
     """
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
+    replica_actions = ('list', 'search')
 
     def list(self, request):
         """
         List all employees with optional search.
         """
+        if request.query_params.get('ids'):
+            return self._retrieve_many(request)
+
         try:
             queryset = self.get_queryset()
             
@@ -47,13 +83,15 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                     Q(employee_id__icontains=search_query) |
                     Q(name__icontains=search_query) |
                     Q(email__icontains=search_query) |
-                    Q(department__icontains=search_query)
+                    Q(department__name__icontains=search_query)
                 )
 
             # Department filter
             department = request.query_params.get('department', None)
             if department:
-                queryset = queryset.filter(department=department)
+                queryset = queryset.filter(
+                    department_id=Department.objects.id_for(department)
+                )
 
             serializer = self.get_serializer(queryset, many=True)
             return success_response(
@@ -67,6 +105,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @idempotent
     def create(self, request):
         """
         Create a new employee.
@@ -95,16 +134,21 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, pk=None):
         """
         Retrieve a single employee by ID or employee_id.
+
+        Served from the per-process employee directory. Changes made through
+        another worker process show up once that entry expires, after at most
+        EMPLOYEE_DIRECTORY_TTL seconds.
         """
         try:
-            # Try to get by primary key first
+            # Try to get by primary key first, then by employee_id
             if pk.isdigit():
-                employee = get_object_or_404(Employee, pk=pk)
+                entry = employee_directory.get_by_pk(pk)
             else:
-                # Try to get by employee_id
-                employee = get_object_or_404(Employee, employee_id=pk)
+                entry = employee_directory.get(pk)
+            if entry is None:
+                raise Http404('No Employee matches the given query.')
 
-            serializer = self.get_serializer(employee)
+            serializer = self.get_serializer(entry.as_employee())
             return success_response(
                 data=serializer.data,
                 message='Employee retrieved successfully.'
@@ -116,6 +160,66 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_404_NOT_FOUND
             )
 
+    def _retrieve_many(self, request):
+        """
+        Retrieve several employees with one IN query.
+
+        Each comma-separated ID is resolved like ``retrieve``: numeric values
+        are treated as primary keys, anything else as an employee_id. The
+        result is keyed by the ID exactly as it was requested.
+        """
+        try:
+            requested = list(dict.fromkeys(
+                item.strip()
+                for item in request.query_params.get('ids', '').split(',')
+                if item.strip()
+            ))
+            max_ids = settings.EMPLOYEE_LOOKUP_MAX_IDS
+            if len(requested) > max_ids:
+                return error_response(
+                    error=f'At most {max_ids} ids can be requested at once.',
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+
+            pks = [int(item) for item in requested if item.isdigit()]
+            employee_ids = [
+                Employee.normalize_employee_id(item) for item in requested if not item.isdigit()
+            ]
+            employees = list(
+                self.get_queryset().filter(
+                    Q(pk__in=pks) | Q(employee_id__upper__in=employee_ids)
+                )
+            )
+            by_pk = {str(employee.pk): employee for employee in employees}
+            by_employee_id = {
+                Employee.normalize_employee_id(employee.employee_id): employee
+                for employee in employees
+            }
+
+            found = {}
+            not_found = []
+            for item in requested:
+                employee = (
+                    by_pk.get(item) if item.isdigit()
+                    else by_employee_id.get(Employee.normalize_employee_id(item))
+                )
+                if employee is None:
+                    not_found.append(item)
+                else:
+                    found[item] = self.get_serializer(employee).data
+
+            return success_response(
+                data={'employees': found, 'not_found': not_found},
+                message=f'{len(found)} employee(s) retrieved successfully.'
+            )
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Failed to retrieve employees.',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     def update(self, request, pk=None):
         """
         Update an employee (full update).
@@ -124,7 +228,9 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             if pk.isdigit():
                 employee = get_object_or_404(Employee, pk=pk)
             else:
-                employee = get_object_or_404(Employee, employee_id=pk)
+                employee = get_object_or_404(
+                    Employee, employee_id__upper=Employee.normalize_employee_id(pk)
+                )
 
             serializer = self.get_serializer(employee, data=request.data)
             if serializer.is_valid():
@@ -153,7 +259,9 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             if pk.isdigit():
                 employee = get_object_or_404(Employee, pk=pk)
             else:
-                employee = get_object_or_404(Employee, employee_id=pk)
+                employee = get_object_or_404(
+                    Employee, employee_id__upper=Employee.normalize_employee_id(pk)
+                )
 
             serializer = self.get_serializer(employee, data=request.data, partial=True)
             if serializer.is_valid():
@@ -182,7 +290,9 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             if pk.isdigit():
                 employee = get_object_or_404(Employee, pk=pk)
             else:
-                employee = get_object_or_404(Employee, employee_id=pk)
+                employee = get_object_or_404(
+                    Employee, employee_id__upper=Employee.normalize_employee_id(pk)
+                )
 
             employee_data = self.get_serializer(employee).data
             employee.delete()
@@ -205,8 +315,123 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         """
         return self.list(request)
 
+    @action(detail=False, methods=['patch', 'delete'])
+    @idempotent
+    def bulk(self, request):
+        """
+        Bulk update (PATCH) or bulk delete (DELETE) employees by employee_id.
+        """
+        if request.method == 'DELETE':
+            return self._bulk_delete(request)
+        return self._bulk_update(request)
+
+    def _bulk_update(self, request):
+        """
+        Move a set of employees to another department with a single UPDATE.
+        """
+        try:
+            serializer = BulkEmployeeUpdateSerializer(data=request.data)
+            if not serializer.is_valid():
+                return error_response(
+                    error=serializer.errors,
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+
+            employee_ids = serializer.validated_data['employee_ids']
+            department_id = serializer.validated_data['department_id']
+
+            with transaction.atomic():
+                queryset = Employee.objects.filter(employee_id__upper__in=employee_ids)
+                found = {
+                    Employee.normalize_employee_id(employee_id)
+                    for employee_id in queryset.values_list('employee_id', flat=True)
+                }
+                updated = queryset.update(
+                    department_id=department_id,
+                    updated_at=timezone.now()
+                )
+            # Set-based UPDATEs bypass model signals
+            employee_directory.invalidate()
+
+            summary = {
+                'requested': len(employee_ids),
+                'updated': updated,
+                'department': Department.objects.name_for(department_id),
+                'not_found': [eid for eid in employee_ids if eid not in found],
+            }
+            return success_response(
+                data=summary,
+                message=f'{updated} employee(s) updated successfully.'
+            )
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Failed to update employees.',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def _bulk_delete(self, request):
+        """
+        Delete a set of employees and their attendance with set-based DELETEs.
+
+        Attendance rows are removed with a single raw DELETE instead of going
+        through Django's deletion collector, which would fetch and delete
+        them row by row.
+        """
+        try:
+            serializer = BulkEmployeeDeleteSerializer(data=request.data)
+            if not serializer.is_valid():
+                return error_response(
+                    error=serializer.errors,
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+
+            employee_ids = serializer.validated_data['employee_ids']
+
+            with transaction.atomic():
+                found = {
+                    Employee.normalize_employee_id(employee_id): pk
+                    for employee_id, pk in Employee.objects.filter(
+                        employee_id__upper__in=employee_ids
+                    ).values_list('employee_id', 'pk')
+                }
+                pks = list(found.values())
+
+                attendance_qs = Attendance.objects.filter(employee_id__in=pks)
+                deleted_attendance = attendance_qs._raw_delete(attendance_qs.db)
+
+                archive_qs = AttendanceArchive.objects.filter(employee_id__in=pks)
+                deleted_attendance += archive_qs._raw_delete(archive_qs.db)
+
+                counter_qs = AttendanceCounter.objects.filter(employee_id__in=pks)
+                counter_qs._raw_delete(counter_qs.db)
+
+                employee_qs = Employee.objects.filter(pk__in=pks)
+                deleted_employees = employee_qs._raw_delete(employee_qs.db)
+            # Raw DELETEs bypass model signals
+            employee_directory.invalidate()
+
+            summary = {
+                'requested': len(employee_ids),
+                'deleted_employees': deleted_employees,
+                'deleted_attendance': deleted_attendance,
+                'not_found': [eid for eid in employee_ids if eid not in found],
+            }
+            return success_response(
+                data=summary,
+                message=f'{deleted_employees} employee(s) deleted successfully.'
+            )
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Failed to delete employees.',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(ReplicaReadMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for Attendance CRUD operations.
     
@@ -218,10 +443,28 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     - DELETE /api/attendance/{id}/ - Delete attendance record
     - GET /api/attendance/by-date/?date=YYYY-MM-DD - Get attendance by date
     - GET /api/attendance/by-employee/?employee_id=EMP001 - Get employee attendance history
+      (supports start, end, cursor and page_size)
     - GET /api/attendance/statistics/ - Get attendance statistics
+    - GET /api/attendance/matrix/?month=YYYY-MM - Employees x days status grid
+      (supports department, page_size, cursor and export=csv)
+    - GET /api/attendance/analytics/<metric>/ - Absence analytics: absence_streaks,
+      rolling_rates, weekday_skew or trending_down (supports start, end,
+      department, limit and window)
+    - GET /api/attendance/export/?type=parquet - Attendance with employee and
+      department as Parquet or Arrow (supports start, end and department)
+
+    Record reads accept ?fields=date,status,employee.name to return only
+    those fields and ?expand=employee.attendance_summary.
+
+    Concurrent identical by_date, statistics, matrix and analytics requests
+    share one computation, and these endpoints and export shed load with a
+    503 once their concurrency limit and queue are full.
+
+    POST requests honour an Idempotency-Key header.
     """
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
+    replica_actions = ('list', 'statistics', 'by_date', 'by_employee', 'matrix', 'analytics')
 
     def list(self, request):
         """
@@ -238,12 +481,17 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             # Filter by employee
             employee_id = request.query_params.get('employee_id', None)
             if employee_id:
-                queryset = queryset.filter(employee__employee_id=employee_id)
+                queryset = queryset.filter(
+                    employee__employee_id__upper=Employee.normalize_employee_id(employee_id)
+                )
 
             # Filter by status
             status_param = request.query_params.get('status', None)
             if status_param:
-                queryset = queryset.filter(status=status_param)
+                if status_param in Attendance.STATUS_CODES:
+                    queryset = queryset.filter(status=status_param)
+                else:
+                    queryset = queryset.none()
 
             serializer = self.get_serializer(queryset, many=True)
             return success_response(
@@ -257,13 +505,19 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @idempotent
     def create(self, request):
         """
         Mark attendance for an employee.
+
+        With ATTENDANCE_WRITE_BEHIND enabled the mark is queued for the next
+        batched flush and the response is 202 Accepted.
         """
         try:
             serializer = self.get_serializer(data=request.data)
             if serializer.is_valid():
+                if settings.ATTENDANCE_WRITE_BEHIND:
+                    return self._enqueue(serializer.validated_data)
                 serializer.save()
                 return success_response(
                     data=serializer.data,
@@ -282,21 +536,136 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def _enqueue(self, validated_data):
+        entry = employee_directory.get(validated_data['employee_id'])
+        if entry is None:
+            # Deleted since validation, possibly by another process
+            return error_response(
+                error=f'Employee with ID {validated_data["employee_id"]} does not exist.',
+                message='Employee not found.',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        ingest.checkin_queue.enqueue(entry.id, validated_data['date'], validated_data['status'])
+        return success_response(
+            data={
+                'employee_id': entry.employee_id,
+                'employee_name': entry.name,
+                'date': validated_data['date'],
+                'status': validated_data['status'],
+                'queued': True
+            },
+            message='Attendance queued successfully.',
+            status_code=status.HTTP_202_ACCEPTED
+        )
+
+    def perform_destroy(self, instance):
+        employee_id, record_status = instance.employee_id, instance.status
+        instance.delete()
+        counters.record_change(employee_id, removed=record_status)
+
+    @action(detail=False, methods=['post'], url_path='range')
+    @idempotent
+    def mark_range(self, request):
+        """
+        Mark a set of employees with one status over a date range, e.g. to
+        enter leave.
+
+        The employees x days rows are generated by the database and written
+        with one INSERT ... SELECT. Days off are skipped unless
+        working_days_only is false. Records that already hold another status
+        (or are archived) are reported as conflicts and kept, unless
+        overwrite is true.
+        """
+        try:
+            serializer = AttendanceRangeSerializer(data=request.data)
+            if not serializer.is_valid():
+                return error_response(
+                    error=serializer.errors,
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+
+            data = serializer.validated_data
+            employee_ids = data['employee_ids']
+            found = {
+                pk: Employee.normalize_employee_id(employee_id)
+                for pk, employee_id in Employee.objects.filter(
+                    employee_id__upper__in=employee_ids
+                ).values_list('pk', 'employee_id')
+            }
+            days = [
+                data['start'] + timedelta(days=offset)
+                for offset in range((data['end'] - data['start']).days + 1)
+            ]
+            if data['working_days_only']:
+                days = [day for day in days if WorkCalendar.objects.is_working_day(day)]
+
+            result = upsert.mark_range(found, days, data['status'], overwrite=data['overwrite'])
+            found_ids = set(found.values())
+            summary = {
+                'requested': len(employee_ids),
+                'days': len(days),
+                'created': result['created'],
+                'updated': result['updated'],
+                'unchanged': result['unchanged'],
+                'conflict_count': len(result['conflicts']),
+                'conflicts': [
+                    {
+                        'employee_id': found[employee_pk],
+                        'date': day,
+                        'status': existing_status,
+                        'archived': archived,
+                    }
+                    for employee_pk, day, existing_status, archived
+                    in result['conflicts'][:settings.ATTENDANCE_RANGE_MAX_CONFLICTS]
+                ],
+                'not_found': [eid for eid in employee_ids if eid not in found_ids],
+            }
+            return success_response(
+                data=summary,
+                message=f'{result["created"] + result["updated"]} attendance record(s) marked successfully.'
+            )
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Failed to mark attendance.',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     @action(detail=False, methods=['get'])
+    @coalesced
+    @admission_limited
     def by_date(self, request):
         """
         Get attendance records for a specific date.
+
+        Dates before the current month are also looked up in the archive;
+        an archived record is left out when the hot table holds the same day.
         """
         try:
             date_param = request.query_params.get('date', None)
             if not date_param:
                 date_param = date.today().isoformat()
+            day = date.fromisoformat(date_param)
 
-            queryset = self.get_queryset().filter(date=date_param)
+            queryset = self.get_queryset().filter(date=day)
             serializer = self.get_serializer(queryset, many=True)
-            
+            records = serializer.data
+
+            if may_be_archived(day):
+                archive_serializer = ArchivedAttendanceSerializer(
+                    many=True, selection=self.field_selection
+                )
+                archived = archive_serializer.child.select_columns(
+                    AttendanceArchive.objects.filter(date=day).exclude(
+                        Exists(Attendance.objects.filter(employee_id=OuterRef('employee_id'), date=day))
+                    )
+                )
+                archive_serializer.instance = archived
+                records = records + archive_serializer.data
+
             return success_response(
-                data=serializer.data,
+                data=records,
                 message=f'Attendance records for {date_param} retrieved successfully.'
             )
         except Exception as e:
@@ -309,7 +678,19 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def by_employee(self, request):
         """
-        Get attendance history for a specific employee.
+        Get a page of attendance history for a specific employee.
+
+        Query parameters:
+        - employee_id (required)
+        - start / end: optional YYYY-MM-DD bounds (inclusive)
+        - cursor: value of ``next_cursor`` from the previous page
+        - page_size: records per page (defaults to PAGE_SIZE)
+
+        Records are returned newest first, keyset-paginated on the
+        ``(employee, date)`` index. History includes archived records, and the
+        summary stats cover the whole requested range, not just the page;
+        ``attendance_rate`` is present days over working days (see
+        ``WorkCalendar``).
         """
         try:
             employee_id = request.query_params.get('employee_id', None)
@@ -320,24 +701,103 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
 
-            employee = get_object_or_404(Employee, employee_id=employee_id)
-            queryset = self.get_queryset().filter(employee=employee)
-            serializer = self.get_serializer(queryset, many=True)
+            try:
+                start = self._date_param(request, 'start')
+                end = self._date_param(request, 'end')
+                cursor = request.query_params.get('cursor', None)
+                before = decode_date_cursor(cursor) if cursor else None
+                page_size = int(request.query_params.get(
+                    'page_size', settings.REST_FRAMEWORK['PAGE_SIZE']
+                ))
+            except ValueError as e:
+                return error_response(
+                    error=str(e),
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            page_size = max(1, min(page_size, settings.ATTENDANCE_HISTORY_MAX_PAGE_SIZE))
 
-            # Calculate statistics
-            total_days = queryset.count()
-            present_count = queryset.filter(status='Present').count()
-            absent_count = queryset.filter(status='Absent').count()
-            attendance_rate = (present_count / total_days * 100) if total_days > 0 else 0
+            entry = employee_directory.get(employee_id)
+            if entry is None:
+                raise Http404('No Employee matches the given query.')
+            employee = entry.as_employee()
+
+            date_filters = {}
+            if start is not None:
+                date_filters['date__gte'] = start
+            if end is not None:
+                date_filters['date__lte'] = end
+            if before is not None:
+                date_filters['date__lt'] = before
+
+            # The employee is attached below, so it is not joined.
+            hot_serializer = self.get_serializer()
+            archive_serializer = ArchivedAttendanceSerializer(selection=self.field_selection)
+            hot = list(
+                hot_serializer.select_columns(
+                    Attendance.objects.filter(employee=employee, **date_filters),
+                    'date', follow_related=False
+                ).order_by('-date')[:page_size + 1]
+            )
+            archived = []
+            if start is None or may_be_archived(start):
+                archived = list(
+                    archive_serializer.select_columns(
+                        AttendanceArchive.objects.filter(employee=employee, **date_filters),
+                        'date', follow_related=False
+                    ).order_by('-date')[:page_size + 1]
+                )
+
+            # Merge both tables newest first; a hot record wins over an
+            # archived one for the same date.
+            hot_dates = {record.date for record in hot}
+            merged = sorted(
+                hot + [record for record in archived if record.date not in hot_dates],
+                key=lambda record: record.date,
+                reverse=True
+            )
+            page = merged[:page_size]
+            for record in page:
+                record.employee = employee
+
+            records = [
+                ArchivedAttendanceSerializer(record, selection=self.field_selection).data
+                if isinstance(record, AttendanceArchive)
+                else self.get_serializer(record).data
+                for record in page
+            ]
+            next_cursor = (
+                encode_date_cursor(page[-1].date) if len(merged) > page_size else None
+            )
+
+            total_days, present_count, absent_count = counters.count_range(
+                employee.pk, start, end
+            )
+            # Rate against the working days the employee was expected in:
+            # from the first record (or start) to end, never past today.
+            today = date.today()
+            expected_from = start or counters.first_record_date(employee.pk)
+            expected_to = min(end or today, today)
+            working_days = (
+                WorkCalendar.objects.working_days(expected_from, expected_to)
+                if expected_from is not None else 0
+            )
+            attendance_rate = (
+                min(present_count / working_days * 100, 100) if working_days > 0 else 0
+            )
 
             history_data = {
                 'employee_id': employee.employee_id,
                 'employee_name': employee.name,
+                'start': start,
+                'end': end,
                 'total_days': total_days,
+                'working_days': working_days,
                 'present_count': present_count,
                 'absent_count': absent_count,
                 'attendance_rate': round(attendance_rate, 1),
-                'records': serializer.data
+                'records': records,
+                'next_cursor': next_cursor
             }
 
             return success_response(
@@ -351,10 +811,297 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @staticmethod
+    def _date_param(request, name):
+        """
+        Parse an optional YYYY-MM-DD query parameter; raises ValueError.
+        """
+        value = request.query_params.get(name, None)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f'{name} must be a date in YYYY-MM-DD format.')
+
+    @action(detail=False, methods=['get'])
+    @coalesced
+    @admission_limited
+    def matrix(self, request):
+        """
+        Get an employees x days attendance grid.
+
+        Query parameters:
+        - month: YYYY-MM (defaults to the current month), or start / end
+        - department: only employees of this department
+        - page_size: employees per block; cursor: next_cursor of the previous block
+        - export=csv: stream every block as CSV instead of one JSON block
+
+        JSON is columnar: employee columns plus ``cells``, one list of status
+        codes per employee (0 = not marked, see ``codes``).
+        """
+        try:
+            try:
+                start, end = self._matrix_range(request)
+                cursor = request.query_params.get('cursor', None)
+                after_pk = decode_pk_cursor(cursor) if cursor else None
+                page_size = int(request.query_params.get(
+                    'page_size', settings.ATTENDANCE_MATRIX_MAX_EMPLOYEES
+                ))
+            except ValueError as e:
+                return error_response(
+                    error=str(e),
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            page_size = max(1, min(page_size, settings.ATTENDANCE_MATRIX_MAX_EMPLOYEES))
+
+            department_id = None
+            department = request.query_params.get('department', None)
+            if department:
+                department_id = Department.objects.id_for(department)
+                if department_id is None:
+                    return error_response(
+                        error='Select a valid department.',
+                        message='Validation failed.',
+                        status_code=status.HTTP_400_BAD_REQUEST
+                    )
+
+            if request.query_params.get('export', None) == 'csv':
+                response = StreamingHttpResponse(
+                    self._matrix_csv(start, end, department_id, after_pk, page_size),
+                    content_type='text/csv'
+                )
+                response['Content-Disposition'] = (
+                    f'attachment; filename="attendance-matrix-{start}-{end}.csv"'
+                )
+                return response
+
+            grid, has_more = build_matrix(
+                start, end, department_id=department_id, after_pk=after_pk, limit=page_size
+            )
+            data = grid.as_columns()
+            data['next_cursor'] = (
+                encode_pk_cursor(grid.employees[-1][0]) if has_more else None
+            )
+            return success_response(
+                data=data,
+                message='Attendance matrix retrieved successfully.'
+            )
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Failed to retrieve attendance matrix.',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def _matrix_range(self, request):
+        """
+        Return the inclusive date range requested; raises ValueError.
+        """
+        start = self._date_param(request, 'start')
+        end = self._date_param(request, 'end')
+        if start is None and end is None:
+            month = request.query_params.get('month', None) or date.today().strftime('%Y-%m')
+            try:
+                start = datetime.strptime(month, '%Y-%m').date()
+            except ValueError:
+                raise ValueError('month must be in YYYY-MM format.')
+            end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        elif start is None or end is None:
+            raise ValueError('start and end must be given together.')
+        if end < start:
+            raise ValueError('end must not be before start.')
+        if (end - start).days >= settings.ATTENDANCE_MATRIX_MAX_DAYS:
+            raise ValueError(f'The range may span at most {settings.ATTENDANCE_MATRIX_MAX_DAYS} days.')
+        return start, end
+
+    @staticmethod
+    def _matrix_csv(start, end, department_id, after_pk, page_size):
+        """
+        Yield the matrix as CSV lines, one employee block at a time.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        labels = {code: label for label, code in Attendance.STATUS_CODES.items()}
+        labels[0] = ''
+
+        def drain():
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return value
+
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        writer.writerow(['employee_id', 'name', 'department'] + [day.isoformat() for day in days])
+        yield drain()
+
+        has_more = True
+        while has_more:
+            grid, has_more = build_matrix(
+                start, end, department_id=department_id, after_pk=after_pk, limit=page_size
+            )
+            for index, (_, employee_id, name, employee_department) in enumerate(grid.employees):
+                writer.writerow(
+                    [employee_id, name, Department.objects.name_for(employee_department)]
+                    + [labels[code] for code in grid.row(index)]
+                )
+            if grid.employees:
+                after_pk = grid.employees[-1][0]
+                yield drain()
+
+    @action(detail=False, methods=['get'], url_path=r'analytics/(?P<metric>[a-z_]+)')
+    @coalesced
+    @admission_limited
+    def analytics(self, request, metric=None):
+        """
+        Rank employees by an absence metric over a date range.
+
+        Metrics:
+        - absence_streaks: longest runs of consecutive absences
+        - rolling_rates: rolling ``window``-day rate series and the lowest rates
+        - weekday_skew: Monday/Friday absence rate above Tuesday-Thursday
+        - trending_down: attendance rate falling over the range
+
+        Query parameters: start / end (default: the last 90 days), department,
+        limit (employees returned, default 20) and window (days, default 30).
+        """
+        if metric not in analytics.METRICS:
+            return error_response(
+                error=f'Unknown metric. Choose one of: {", ".join(analytics.METRICS)}.',
+                message='Metric not found.',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        try:
+            try:
+                start, end = analytics.default_range(
+                    self._date_param(request, 'start'), self._date_param(request, 'end')
+                )
+                limit = int(request.query_params.get('limit', 20))
+                window = int(request.query_params.get('window', 30))
+            except ValueError as e:
+                return error_response(
+                    error=str(e),
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            if end < start:
+                return error_response(
+                    error='end must not be before start.',
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            if (end - start).days >= settings.ATTENDANCE_ANALYTICS_MAX_DAYS:
+                return error_response(
+                    error=f'The range may span at most {settings.ATTENDANCE_ANALYTICS_MAX_DAYS} days.',
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            limit = max(1, min(limit, 500))
+            window = max(1, min(window, 366))
+
+            department_id = None
+            department = request.query_params.get('department', None)
+            if department:
+                department_id = Department.objects.id_for(department)
+                if department_id is None:
+                    return error_response(
+                        error='Select a valid department.',
+                        message='Validation failed.',
+                        status_code=status.HTTP_400_BAD_REQUEST
+                    )
+
+            data = analytics.load(start, end, department_id=department_id)
+            result = analytics.report(data, metric, limit=limit, window=window)
+            result.update({'metric': metric, 'start': start, 'end': end, 'records': len(data)})
+            return success_response(
+                data=result,
+                message='Attendance analytics retrieved successfully.'
+            )
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Failed to retrieve attendance analytics.',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'])
+    @admission_limited
+    def export(self, request):
+        """
+        Stream attendance with employee ID, name and department as a
+        columnar file for analytics tools (pandas, DuckDB, Spark).
+
+        Query parameters: type (parquet, the default, or arrow), start / end
+        (default: the last 90 days) and department. Requires PyArrow.
+        """
+        file_type = request.query_params.get('type', None) or 'parquet'
+        if file_type not in columnar.FORMATS:
+            return error_response(
+                error=f'type must be one of: {", ".join(columnar.FORMATS)}.',
+                message='Validation failed.',
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if not columnar.available():
+            return error_response(
+                error='Columnar exports require PyArrow, which is not installed on the server.',
+                message='Export unavailable.',
+                status_code=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        try:
+            try:
+                start, end = analytics.default_range(
+                    self._date_param(request, 'start'), self._date_param(request, 'end')
+                )
+            except ValueError as e:
+                return error_response(
+                    error=str(e),
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            if end < start:
+                return error_response(
+                    error='end must not be before start.',
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+
+            department_id = None
+            department = request.query_params.get('department', None)
+            if department:
+                department_id = Department.objects.id_for(department)
+                if department_id is None:
+                    return error_response(
+                        error='Select a valid department.',
+                        message='Validation failed.',
+                        status_code=status.HTTP_400_BAD_REQUEST
+                    )
+
+            extension, content_type = columnar.FORMATS[file_type]
+            response = StreamingHttpResponse(
+                columnar.stream(file_type, columnar.record_batches(start, end, department_id)),
+                content_type=content_type
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="attendance-{start}-{end}.{extension}"'
+            )
+            return response
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Failed to export attendance records.',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     @action(detail=False, methods=['get'])
+    @coalesced
+    @admission_limited
     def statistics(self, request):
         """
         Get overall attendance statistics for dashboard.
+
+        ``attendance_rate`` is this month's present records over the working
+        days so far times the number of employees.
         """
         try:
             today = date.today()
@@ -369,24 +1116,35 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             absent_today = today_attendance.filter(status='Absent').count()
             not_marked_today = total_employees - today_attendance.count()
 
-            # This month's attendance rate
-            month_attendance = Attendance.objects.filter(date__gte=this_month)
-            month_present = month_attendance.filter(status='Present').count()
-            total_records = month_attendance.count()
-            attendance_rate = (month_present / total_records * 100) if total_records > 0 else 0
+            # This month's attendance rate against the working days so far
+            month_present = Attendance.objects.filter(
+                date__gte=this_month, status='Present'
+            ).count()
+            working_days = WorkCalendar.objects.working_days(this_month, today)
+            expected = working_days * total_employees
+            attendance_rate = min(month_present / expected * 100, 100) if expected > 0 else 0
 
-            # Department breakdown
-            department_stats = Employee.objects.values('department').annotate(
-                count=Count('id')
-            ).order_by('-count')
+            # Department breakdown (grouped by the small-integer FK, names
+            # come from the cached lookup table)
+            department_stats = [
+                {
+                    'department': Department.objects.name_for(row['department_id']),
+                    'count': row['count'],
+                }
+                for row in Employee.objects.values('department_id').annotate(
+                    count=Count('id')
+                ).order_by('-count')
+            ]
 
             stats_data = {
                 'total_employees': total_employees,
                 'present_today': present_today,
                 'absent_today': absent_today,
                 'not_marked_today': not_marked_today,
+                'is_working_day': WorkCalendar.objects.is_working_day(today),
+                'working_days': working_days,
                 'attendance_rate': round(attendance_rate, 1),
-                'department_breakdown': list(department_stats)
+                'department_breakdown': department_stats
             }
 
             return success_response(
@@ -399,3 +1157,130 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 message='Failed to retrieve statistics.',
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class JobViewSet(viewsets.GenericViewSet):
+    """
+    ViewSet for background jobs run by ``python manage.py run_jobs``.
+
+    Endpoints:
+    - GET /api/jobs/ - List recent jobs (optionally ?status=queued)
+    - POST /api/jobs/ - Submit a job ({"kind": ..., "params": {...}}, or
+      multipart with a "file" for imports)
+    - GET /api/jobs/{id}/ - Poll a job's status and progress
+    - GET /api/jobs/{id}/download/ - Download a finished job's result file
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    # Imports upload their input file as multipart form data
+    parser_classes = [JSONParser, MultiPartParser]
+
+    # Most recent jobs returned by the list endpoint
+    list_limit = 50
+
+    def list(self, request):
+        """
+        List the most recent jobs.
+        """
+        try:
+            queryset = self.get_queryset()
+            job_status = request.query_params.get('status', None)
+            if job_status:
+                queryset = queryset.filter(status=job_status)
+            serializer = self.get_serializer(queryset[:self.list_limit], many=True)
+            return success_response(
+                data=serializer.data,
+                message='Jobs retrieved successfully.'
+            )
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Failed to retrieve jobs.',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def create(self, request):
+        """
+        Validate and queue a job; returns 202 with the job to poll.
+        """
+        try:
+            serializer = JobSubmitSerializer(data=request.data)
+            if not serializer.is_valid():
+                return error_response(
+                    error=serializer.errors,
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                job = jobs.submit(
+                    serializer.validated_data['kind'],
+                    serializer.validated_data['params'],
+                    upload=serializer.validated_data.get('file')
+                )
+            except ValueError as e:
+                return error_response(
+                    error=str(e),
+                    message='Validation failed.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            return success_response(
+                data=self.get_serializer(job).data,
+                message='Job queued successfully.',
+                status_code=status.HTTP_202_ACCEPTED
+            )
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Failed to queue job.',
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def retrieve(self, request, pk=None):
+        """
+        Return a job's status and progress.
+        """
+        try:
+            job = get_object_or_404(Job, pk=pk)
+            return success_response(
+                data=self.get_serializer(job).data,
+                message='Job retrieved successfully.'
+            )
+        except Exception as e:
+            return error_response(
+                error=str(e),
+                message='Job not found.',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Stream a finished job's result file as an attachment.
+        """
+        try:
+            job = get_object_or_404(Job, pk=pk)
+        except Http404 as e:
+            return error_response(
+                error=str(e),
+                message='Job not found.',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        if job.status != Job.SUCCEEDED or not job.result_file:
+            return error_response(
+                error=f'Job {job.pk} has no result to download (status: {job.status}).',
+                message='Result not available.',
+                status_code=status.HTTP_409_CONFLICT
+            )
+        path = jobs.result_path(job)
+        if not path.exists():
+            return error_response(
+                error=f'Result file for job {job.pk} no longer exists.',
+                message='Result not available.',
+                status_code=status.HTTP_410_GONE
+            )
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=job.result_file.split('-', 1)[1],
+            content_type=job.result_content_type or 'application/octet-stream'
+        )
@@ -3,7 +3,7 @@ Django settings for hrm_backend project.
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -33,9 +33,11 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'employees.routers.ReplicaStickinessMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'employees.profiling.ProfilingMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -83,10 +85,34 @@ else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
         }
     }
 
+# Optional read replicas. DB_REPLICAS is a comma-separated list of replica
+# hosts (host or host:port) for PostgreSQL, or of database file paths for
+# SQLite (e.g. a copy of db.sqlite3 for local testing). Replicas are exposed
+# as replica_0, replica_1, ... and only serve reads routed by ReplicaRouter.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config('DB_REPLICAS', default='', cast=Csv())):
+    alias = f'replica_{index}'
+    if DB_ENGINE == 'postgresql':
+        host, _, port = replica.partition(':')
+        DATABASES[alias] = dict(
+            DATABASES['default'],
+            HOST=host,
+            PORT=port or DATABASES['default']['PORT'],
+        )
+    else:
+        DATABASES[alias] = dict(DATABASES['default'], NAME=replica)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['employees.routers.ReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write
+DB_REPLICA_STICKY_SECONDS = config('DB_REPLICA_STICKY_SECONDS', default=5, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -128,6 +154,85 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'employees.utils.custom_exception_handler',
 }
 
+# Maximum number of employees a single bulk update/delete request may touch
+EMPLOYEE_BULK_MAX_IDS = config('EMPLOYEE_BULK_MAX_IDS', default=5000, cast=int)
+
+# Maximum number of IDs accepted by GET /api/employees/?ids=...
+EMPLOYEE_LOOKUP_MAX_IDS = config('EMPLOYEE_LOOKUP_MAX_IDS', default=500, cast=int)
+
+# Attendance older than this many days is moved to the archive table by
+# `python manage.py archive_attendance` (the current month is never archived)
+ATTENDANCE_ARCHIVE_DAYS = config('ATTENDANCE_ARCHIVE_DAYS', default=365, cast=int)
+
+# In-process employee directory cache (employee_id -> employee snapshot).
+# Writes invalidate it only in their own process, so other processes may serve
+# a stale employee (e.g. GET /api/employees/<id>/) for up to the TTL in seconds
+EMPLOYEE_DIRECTORY_SIZE = config('EMPLOYEE_DIRECTORY_SIZE', default=10000, cast=int)
+EMPLOYEE_DIRECTORY_TTL = config('EMPLOYEE_DIRECTORY_TTL', default=30, cast=int)
+
+# Largest page_size accepted by GET /api/attendance/by_employee/
+ATTENDANCE_HISTORY_MAX_PAGE_SIZE = config('ATTENDANCE_HISTORY_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Background jobs (`python manage.py run_jobs`): where inputs and results are
+# stored, how many jobs a worker runs at once, how often an idle worker polls,
+# and after how many seconds without a heartbeat a running job is requeued
+JOB_RESULTS_DIR = config('JOB_RESULTS_DIR', default=str(BASE_DIR / 'job_results'))
+JOB_WORKER_CONCURRENCY = config('JOB_WORKER_CONCURRENCY', default=2, cast=int)
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=2.0, cast=float)
+JOB_STALE_SECONDS = config('JOB_STALE_SECONDS', default=300, cast=int)
+
+# Write-behind check-ins: when enabled, POST /api/attendance/ answers 202 once
+# the mark is in a local append-only log and an in-process queue, which is
+# flushed as one batched upsert every ATTENDANCE_FLUSH_INTERVAL_MS or as soon
+# as ATTENDANCE_FLUSH_BATCH_SIZE marks are waiting
+ATTENDANCE_WRITE_BEHIND = config('ATTENDANCE_WRITE_BEHIND', default=False, cast=bool)
+ATTENDANCE_FLUSH_INTERVAL_MS = config('ATTENDANCE_FLUSH_INTERVAL_MS', default=200, cast=int)
+ATTENDANCE_FLUSH_BATCH_SIZE = config('ATTENDANCE_FLUSH_BATCH_SIZE', default=500, cast=int)
+ATTENDANCE_INGEST_DIR = config('ATTENDANCE_INGEST_DIR', default=str(BASE_DIR / 'ingest_logs'))
+
+# Seconds an Idempotency-Key response is kept for replay; expired keys are
+# removed by `python manage.py purge_idempotency_keys`
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+
+# GET /api/attendance/matrix/: employees per block (also the default) and the
+# longest date range accepted
+ATTENDANCE_MATRIX_MAX_EMPLOYEES = config('ATTENDANCE_MATRIX_MAX_EMPLOYEES', default=5000, cast=int)
+ATTENDANCE_MATRIX_MAX_DAYS = config('ATTENDANCE_MATRIX_MAX_DAYS', default=366, cast=int)
+
+# POST /api/attendance/range/: longest date range accepted, and how many
+# conflicts are listed in the response (all of them are counted)
+ATTENDANCE_RANGE_MAX_DAYS = config('ATTENDANCE_RANGE_MAX_DAYS', default=93, cast=int)
+ATTENDANCE_RANGE_MAX_CONFLICTS = config('ATTENDANCE_RANGE_MAX_CONFLICTS', default=1000, cast=int)
+
+# GET /api/attendance/analytics/<metric>/: longest date range accepted
+ATTENDANCE_ANALYTICS_MAX_DAYS = config('ATTENDANCE_ANALYTICS_MAX_DAYS', default=731, cast=int)
+
+# Expensive reads (statistics, by_date, matrix, analytics): computations
+# running at once per endpoint and process, how many more requests may wait
+# for a slot and for how many seconds before they get a 503 with Retry-After.
+# EXPENSIVE_READ_LIMITS overrides the concurrency per endpoint, e.g.
+# "analytics=1,statistics=8"
+EXPENSIVE_READ_CONCURRENCY = config('EXPENSIVE_READ_CONCURRENCY', default=4, cast=int)
+EXPENSIVE_READ_QUEUE = config('EXPENSIVE_READ_QUEUE', default=16, cast=int)
+EXPENSIVE_READ_QUEUE_TIMEOUT = config('EXPENSIVE_READ_QUEUE_TIMEOUT', default=2.0, cast=float)
+# Identical requests waiting on one shared computation count against the same
+# queue; they wait for the queue timeout plus this long (the expected compute
+# time) before they get a 503 as well
+EXPENSIVE_READ_COALESCE_TIMEOUT = config('EXPENSIVE_READ_COALESCE_TIMEOUT', default=10.0, cast=float)
+EXPENSIVE_READ_LIMITS = {
+    name.strip(): int(limit)
+    for name, _, limit in (
+        item.partition('=') for item in config('EXPENSIVE_READ_LIMITS', default='', cast=Csv())
+    )
+}
+
+# Request profiling: staff requests sent with `X-Profile: 1` (or ?profile=1)
+# are always profiled; PROFILE_SAMPLE_RATE (0-1) profiles that fraction of all
+# requests. Reports are listed in the admin; their files live in
+# PROFILE_REPORTS_DIR
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+PROFILE_REPORTS_DIR = config('PROFILE_REPORTS_DIR', default=str(BASE_DIR / 'profile_reports'))
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -151,8 +256,17 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
+    'x-profile',
     'x-requested-with',
+]
+
+CORS_EXPOSE_HEADERS = [
+    'idempotent-replayed',
+    'retry-after',
+    'x-coalesced',
+    'x-profile-id',
 ]
\ No newline at end of file
@@ -81,7 +81,7 @@ const AttendanceManagement = () => {
     setHistoryData(null);
     
     try {
-      const response = await attendanceAPI.getByEmployee(employee.employee_id);
+      const response = await attendanceAPI.getFullHistory(employee.employee_id);
       if (response.success) {
         setHistoryData(response.data);
       }
@@ -171,7 +171,7 @@ export const EmployeeProvider = ({ children }) => {
   // Get attendance for an employee
   const getEmployeeAttendance = async (employeeId) => {
     try {
-      const response = await attendanceAPI.getByEmployee(employeeId);
+      const response = await attendanceAPI.getFullHistory(employeeId);
       if (response.success) {
         return response.data;
       }
@@ -127,10 +127,10 @@ export const attendanceAPI = {
   },
 
   // Get employee attendance history
-  getByEmployee: async (employeeId) => {
+  getByEmployee: async (employeeId, options = {}) => {
     try {
       const response = await api.get('/attendance/by_employee/', {
-        params: { employee_id: employeeId },
+        params: { employee_id: employeeId, ...options },
       });
       return response.data;
     } catch (error) {
@@ -138,6 +138,26 @@ export const attendanceAPI = {
     }
   },
 
+  // Get an employee's whole attendance history, following next_cursor
+  // through every page of records
+  getFullHistory: async (employeeId, options = {}) => {
+    const first = await attendanceAPI.getByEmployee(employeeId, { page_size: 500, ...options });
+    if (!first.success) {
+      return first;
+    }
+    const records = [...first.data.records];
+    let cursor = first.data.next_cursor;
+    while (cursor) {
+      const page = await attendanceAPI.getByEmployee(employeeId, { page_size: 500, ...options, cursor });
+      if (!page.success) {
+        return page;
+      }
+      records.push(...page.data.records);
+      cursor = page.data.next_cursor;
+    }
+    return { ...first, data: { ...first.data, records, next_cursor: null } };
+  },
+
   // Get dashboard statistics
   getStatistics: async () => {
     try {